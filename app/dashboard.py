@@ -205,7 +205,6 @@ def init_db():
     # Update initial metrics
     metrics.update_service_status("dashboard", True)
     metrics.update_system_metrics()
-    metrics.update_log_metrics()
 
 
 def get_database():
@@ -258,11 +257,8 @@ def after_request(response):
 def prometheus_metrics():
     """Prometheus metrics endpoint"""
     try:
-        # Update dynamic metrics before exporting
-        metrics.update_system_metrics()
-        metrics.update_log_metrics()
-        
-        # Update database metrics
+        # System and log gauges are refreshed by the metrics sampler thread;
+        # only database metrics are updated per scrape
         if db:
             try:
                 size_info = db.get_database_size()
@@ -962,9 +958,7 @@ def predict_attack(ip):
             return jsonify({"prediction": "no_data", "confidence": 0.0})
         
         # Extract features
-        features_dict = feature_extractor.extract_from_events(events)
-        feature_names = feature_extractor.get_feature_names()
-        feature_vector = [features_dict.get(name, 0) for name in feature_names]
+        features_dict, feature_vector = feature_extractor.extract_event_vector(events)
         
         # Predict
         attack_type, confidence = ml_model.predict(feature_vector)
@@ -1031,9 +1025,7 @@ def batch_predict():
             try:
                 events = db.get_events_by_ip(ip, limit=limit)
                 if events:
-                    features_dict = feature_extractor.extract_from_events(events)
-                    feature_names = feature_extractor.get_feature_names()
-                    feature_vector = [features_dict.get(name, 0) for name in feature_names]
+                    _, feature_vector = feature_extractor.extract_event_vector(events)
                     attack_type, confidence = ml_model.predict(feature_vector)
                     predictions[ip] = {
                         'prediction': attack_type,
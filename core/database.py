@@ -33,6 +33,11 @@ class HoneypotDatabase:
         # Enable WAL mode for better concurrent access
         self.conn.execute("PRAGMA journal_mode=WAL")
         self.conn.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
+        # Read-heavy workload: map the file, enlarge the page cache (64MB)
+        # and keep temp b-trees for sorts/GROUP BY in memory
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         self._lock = threading.RLock()  # Recursive lock for thread safety
         self._create_tables()
     
@@ -54,10 +59,17 @@ class HoneypotDatabase:
             )
         """)
         
-        # Create indexes for events table
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_source_ip ON events(source_ip)")
+        # Create indexes for events table; idx_events_ip_ts below serves every source_ip
+        # lookup, so the older single-column index is dropped from existing databases
+        cursor.execute("DROP INDEX IF EXISTS idx_events_source_ip")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_protocol ON events(protocol)")
+        # Covering index for per-IP lookups (profile aggregation, get_events_by_ip):
+        # SQLite has no INCLUDE clause, so the payload columns are appended to the key
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_ip_ts
+            ON events(source_ip, timestamp, port, protocol, payload_size, event_type)
+        """)
         
         # IP Profiles table - aggregated statistics per IP
         cursor.execute("""
@@ -367,7 +379,7 @@ class HoneypotDatabase:
         """Add an attack event to the database and update IP profile"""
         if timestamp is None:
             timestamp = time.time()
-        
+            
             # Record metrics
             try:
                 from telemetry.prometheus_metrics import get_metrics
@@ -387,6 +399,62 @@ class HoneypotDatabase:
         self.conn.commit()
 
         # Update or create IP profile based on aggregated stats
+        self._refresh_profile(cursor, source_ip, timestamp, protocol)
+        
+        return int(cursor.lastrowid) if cursor.lastrowid else 0
+    
+    def add_events_bulk(self, events: List[Tuple]) -> int:
+        """
+        Add many attack events in a single transaction, then refresh each source
+        IP's profile once. Events are (source_ip, port, protocol, payload_size,
+        event_type) tuples with an optional trailing timestamp (default: now).
+        """
+        now = time.time()
+        rows = []
+        live = []  # Events stamped with the current time, as opposed to backfills
+        for event in events:
+            timestamp = event[5] if len(event) > 5 else None
+            if timestamp is None:
+                timestamp = now
+                live.append(event)
+            rows.append((timestamp, *event[:5]))
+        if not rows:
+            return 0
+        
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                cursor.executemany(
+                    """
+                    INSERT INTO events (timestamp, source_ip, port, protocol, payload_size, event_type)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        
+        # Like add_event, only live events (no explicit timestamp) feed the metrics
+        try:
+            from telemetry.prometheus_metrics import get_metrics
+            metrics = get_metrics()
+            for _, _, protocol, payload_size, event_type, *_ in live:
+                metrics.record_attack_event(protocol, event_type, payload_size)
+        except Exception:
+            pass  # Don't fail if metrics unavailable
+        
+        # Each IP's profile is rebuilt from the stored events, so once per IP suffices
+        latest = {source_ip: (timestamp, protocol) for timestamp, source_ip, _, protocol, _, _ in rows}
+        for source_ip, (timestamp, protocol) in latest.items():
+            self._refresh_profile(cursor, source_ip, timestamp, protocol)
+        
+        return len(rows)
+    
+    def _refresh_profile(self, cursor: sqlite3.Cursor, source_ip: str, timestamp: float, protocol: str):
+        """Update or create the IP profile from the IP's aggregated events"""
         try:
             cursor.execute(
                 """
@@ -435,8 +503,6 @@ class HoneypotDatabase:
             # Profile updates should not interrupt event ingestion
             pass
 
-        return int(cursor.lastrowid) if cursor.lastrowid else 0
-    
     def get_events_by_ip(self, source_ip: str, limit: int = 100) -> List[Dict]:
         """Retrieve all events from a specific IP"""
         cursor = self.conn.cursor()
@@ -466,6 +532,25 @@ class HoneypotDatabase:
         """Retrieve events from the last N minutes"""
         start_time = time.time() - (minutes * 60)
         return self.get_events_in_timerange(start_time, time.time(), limit)
+    
+    def get_recent_event_rows(self, minutes: int = 60, limit: int = 20) -> List[Tuple]:
+        """Retrieve recent events as display-ready tuples.
+        
+        Returns (timestamp, source_ip, port, protocol, payload_size, event_type)
+        with the timestamp already formatted by SQLite in local time, so
+        callers can feed rows straight into a text formatter.
+        """
+        start_time = time.time() - (minutes * 60)
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT strftime('%Y-%m-%d %H:%M:%S', timestamp, 'unixepoch', 'localtime'),
+                   source_ip, port, protocol, payload_size, event_type
+            FROM events
+            WHERE timestamp > ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """, (start_time, limit))
+        return [tuple(row) for row in cursor.fetchall()]
 
     def get_recent_events_filtered(self, minutes: int = 60, limit: int = 100, offset: int = 0,
                                    ip: Optional[str] = None, protocol: Optional[str] = None,
@@ -919,23 +1004,28 @@ class HoneypotDatabase:
         """, (current_time, rule_id))
         self.conn.commit()
 
+    def get_counts(self) -> Dict:
+        """Get event, profile and active blacklist counts in a single query"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM events) AS event_count,
+                   (SELECT COUNT(*) FROM ip_profiles) AS profile_count,
+                   (SELECT COUNT(*) FROM blacklist WHERE expiration_time > ?) AS blacklist_count
+        """, (time.time(),))
+        return dict(cursor.fetchone())
+    
     def get_database_size(self) -> Dict:
         """Get database size and event count"""
         db_file = Path(self.db_path)
-        
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) as count FROM events")
-        event_count = cursor.fetchone()['count']
-        
-        cursor.execute("SELECT COUNT(*) as count FROM ip_profiles")
-        profile_count = cursor.fetchone()['count']
+        counts = self.get_counts()
         
         size_mb = db_file.stat().st_size / (1024 * 1024) if db_file.exists() else 0
         
         return {
             "size_mb": round(size_mb, 2),
-            "event_count": event_count,
-            "profile_count": profile_count,
+            "event_count": counts["event_count"],
+            "profile_count": counts["profile_count"],
+            "blacklist_count": counts["blacklist_count"],
             "file_path": str(db_file.absolute()),
         }
     
@@ -1141,7 +1231,7 @@ class HoneypotDatabase:
             protocol: Filter by protocol
             port: Filter by port
             last_timestamp: Only return events after this timestamp (for real-time)
-            
+        
         Returns:
             Tuple of (events list, total count)
         """
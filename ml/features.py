@@ -118,6 +118,23 @@ class TrafficFeatures:
             self.packet_inter_arrival_max
         ], dtype=np.float32)
 
+# Per-attacker features computed from honeypot events (database rows), in the
+# column order of ml.train's synthetic training data
+EVENT_FEATURE_NAMES = (
+    'event_count', 'unique_ips', 'protocol_diversity', 'dominant_protocol_ratio',
+    'time_span_seconds', 'events_per_second',
+    'avg_payload_size', 'max_payload_size', 'min_payload_size', 'payload_variance',
+    'port_diversity', 'ports_per_ip_avg',
+    'has_high_rate', 'has_amplification', 'has_multi_protocol', 'has_port_scanning',
+    'http_ratio', 'dns_ratio', 'ssdp_ratio', 'ntp_ratio'
+)
+
+# Flag thresholds, matching the labelling rules in ml.train
+HIGH_RATE_EVENTS_PER_SECOND = 50
+AMPLIFICATION_PAYLOAD_BYTES = 5000
+MULTI_PROTOCOL_MIN = 3
+PORT_SCAN_MIN_PORTS = 10
+
 # ============================================================================
 # FEATURE EXTRACTION
 # ============================================================================
@@ -127,6 +144,18 @@ class FeatureExtractor:
     Extracts ML features from network traffic
     """
     
+    # Order of TrafficFeatures.to_array()
+    FEATURE_NAMES = (
+        'packet_count', 'byte_count', 'avg_packet_size', 'packet_rate', 'byte_rate',
+        'unique_src_ips', 'src_ip_concentration', 'top_src_ip_count',
+        'unique_dst_ports', 'port_concentration', 'top_dst_port_count',
+        'tcp_count', 'udp_count', 'icmp_count', 'tcp_ratio', 'udp_ratio',
+        'syn_count', 'ack_count', 'fin_count', 'rst_count', 'syn_ack_ratio',
+        'avg_payload_size', 'payload_entropy', 'zero_payload_ratio',
+        'packet_inter_arrival_mean', 'packet_inter_arrival_std',
+        'packet_inter_arrival_min', 'packet_inter_arrival_max'
+    )
+    
     def __init__(self, window_size: int = 5):
         """
         Initialize feature extractor
@@ -136,16 +165,7 @@ class FeatureExtractor:
         """
         self.window_size = window_size
         self.packet_buffer: deque = deque(maxlen=10000)
-        self.feature_names = [
-            'packet_count', 'byte_count', 'avg_packet_size', 'packet_rate', 'byte_rate',
-            'unique_src_ips', 'src_ip_concentration', 'top_src_ip_count',
-            'unique_dst_ports', 'port_concentration', 'top_dst_port_count',
-            'tcp_count', 'udp_count', 'icmp_count', 'tcp_ratio', 'udp_ratio',
-            'syn_count', 'ack_count', 'fin_count', 'rst_count', 'syn_ack_ratio',
-            'avg_payload_size', 'payload_entropy', 'zero_payload_ratio',
-            'packet_inter_arrival_mean', 'packet_inter_arrival_std',
-            'packet_inter_arrival_min', 'packet_inter_arrival_max'
-        ]
+        self.feature_names = list(self.FEATURE_NAMES)
         
         logger.info('[ML] Feature extractor initialized with 28 features')
     
@@ -294,6 +314,87 @@ class FeatureExtractor:
         
         return features
     
+    def extract_from_events(self, events) -> Dict[str, float]:
+        """
+        Extract EVENT_FEATURE_NAMES features from honeypot events
+        
+        Args:
+            events: List of event dicts (source_ip, protocol, payload_size,
+                timestamp, port), or a record array with those fields
+        """
+        if isinstance(events, np.ndarray) and events.dtype.names:
+            return self.extract_from_arrays(
+                events['source_ip'], events['protocol'], events['payload_size'],
+                events['timestamp'], events['port']
+            )
+        
+        return self.extract_from_arrays(
+            [e.get('source_ip', '') for e in events],
+            [e.get('protocol', '') for e in events],
+            [e.get('payload_size', 0) for e in events],
+            [e.get('timestamp', 0.0) for e in events],
+            [e.get('port', 0) for e in events]
+        )
+    
+    def extract_event_vector(self, events) -> Tuple[Dict[str, float], List[float]]:
+        """
+        Extract event features plus the matching model input row
+        
+        Returns:
+            (extract_from_events dict, its values in EVENT_FEATURE_NAMES order)
+        """
+        features = self.extract_from_events(events)
+        return features, [features.get(name, 0) for name in EVENT_FEATURE_NAMES]
+    
+    def extract_from_arrays(self, source_ips, protocols, payload_sizes,
+                            timestamps, ports) -> Dict[str, float]:
+        """Extract EVENT_FEATURE_NAMES features from per-event columns"""
+        payload_sizes = np.asarray(payload_sizes, dtype=np.float64)
+        event_count = payload_sizes.size
+        if event_count == 0:
+            return dict.fromkeys(EVENT_FEATURE_NAMES, 0)
+        
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        _, ip_ids = np.unique(np.asarray(source_ips, dtype=str), return_inverse=True)
+        port_values, port_ids = np.unique(np.asarray(ports), return_inverse=True)
+        protocol_names, protocol_counts = np.unique(
+            np.char.upper(np.asarray(protocols, dtype=str)), return_counts=True
+        )
+        
+        unique_ips = int(ip_ids.max()) + 1
+        # Distinct (ip, port) pairs, encoded as one integer per event
+        ip_port_pairs = np.unique(ip_ids * port_values.size + port_ids).size
+        
+        time_span = float(timestamps.max() - timestamps.min())
+        events_per_second = event_count / time_span if time_span > 0 else float(event_count)
+        max_payload = float(payload_sizes.max())
+        protocol_diversity = protocol_names.size
+        port_diversity = port_values.size
+        protocol_ratios = dict(zip(protocol_names.tolist(), (protocol_counts / event_count).tolist()))
+        
+        return {
+            'event_count': event_count,
+            'unique_ips': unique_ips,
+            'protocol_diversity': protocol_diversity,
+            'dominant_protocol_ratio': float(protocol_counts.max()) / event_count,
+            'time_span_seconds': time_span,
+            'events_per_second': events_per_second,
+            'avg_payload_size': float(payload_sizes.mean()),
+            'max_payload_size': max_payload,
+            'min_payload_size': float(payload_sizes.min()),
+            'payload_variance': float(payload_sizes.var()),
+            'port_diversity': port_diversity,
+            'ports_per_ip_avg': ip_port_pairs / unique_ips,
+            'has_high_rate': int(events_per_second > HIGH_RATE_EVENTS_PER_SECOND),
+            'has_amplification': int(max_payload > AMPLIFICATION_PAYLOAD_BYTES),
+            'has_multi_protocol': int(protocol_diversity >= MULTI_PROTOCOL_MIN),
+            'has_port_scanning': int(port_diversity >= PORT_SCAN_MIN_PORTS),
+            'http_ratio': protocol_ratios.get('HTTP', 0.0),
+            'dns_ratio': protocol_ratios.get('DNS', 0.0),
+            'ssdp_ratio': protocol_ratios.get('SSDP', 0.0),
+            'ntp_ratio': protocol_ratios.get('NTP', 0.0),
+        }
+    
     def _entropy(self, values: List, bins: Optional[int] = None) -> float:
         """Calculate Shannon entropy of values"""
         if not values:
@@ -314,8 +415,8 @@ class FeatureExtractor:
         return float(entropy)
     
     def get_feature_names(self) -> List[str]:
-        """Get list of feature names"""
-        return self.feature_names.copy()
+        """Get list of feature names (use FEATURE_NAMES to avoid the copy)"""
+        return list(self.FEATURE_NAMES)
 
 # ============================================================================
 # FEATURE NORMALIZATION
@@ -10,7 +10,9 @@ from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
 try:
-    from sklearn.ensemble import RandomForestClassifier
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+    from sklearn.inspection import permutation_importance
     from sklearn.preprocessing import StandardScaler
     from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
     SKLEARN_AVAILABLE = True
@@ -33,12 +35,25 @@ class AttackClassifier:
         'sustained': 3,
         'normal': 4
     }
+    ATTACK_NAMES = {index: name for name, index in ATTACK_TYPES.items()}
     
-    def __init__(self, model_path: str = 'ml/attack_model.pkl'):
+    # Smaller prediction batches run on one thread; joblib pool startup would dominate
+    PARALLEL_PREDICT_MIN_ROWS = 256
+    
+    # 'hgbt' trains a HistGradientBoostingClassifier: binned, depth-bounded
+    # trees that predict single rows much faster than the forest
+    BACKENDS = ('random_forest', 'hgbt')
+    
+    def __init__(self, model_path: str = 'ml/attack_model.pkl', backend: str = 'random_forest'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f'Unknown model backend: {backend}')
         self.model_path = model_path
+        self.backend = backend
         self.model = None
         self.scaler = None
         self.feature_names = []
+        # Permutation importances, for estimators without feature_importances_
+        self.feature_importances = {}
         self.training_history = {
             'accuracy': [],
             'precision': [],
@@ -58,6 +73,7 @@ class AttackClassifier:
                     self.model = data.get('model')
                     self.scaler = data.get('scaler')
                     self.feature_names = data.get('feature_names', [])
+                    self.feature_importances = data.get('feature_importances', {})
                     self.is_trained = True
                     logger.info(f'Loaded trained model from {self.model_path}')
         except Exception as e:
@@ -91,19 +107,19 @@ class AttackClassifier:
             self.scaler = StandardScaler()
             X_scaled = self.scaler.fit_transform(X_train)
             
-            # Train Random Forest
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1
-            )
-            
+            self.model = self._build_estimator()
             self.model.fit(X_scaled, y_train)
             self.is_trained = True
             
+            if hasattr(self.model, 'feature_importances_'):
+                self.feature_importances = {}
+            else:
+                result = permutation_importance(self.model, X_scaled, y_train, n_repeats=5, random_state=42)
+                self.feature_importances = {
+                    name: float(importance)
+                    for name, importance in zip(feature_names, result.importances_mean)
+                }
+            
             # Evaluate
             metrics = {}
             y_pred = self.model.predict(X_scaled)
@@ -149,28 +165,77 @@ class AttackClassifier:
         
         try:
             if self.scaler and len(features) == len(self.feature_names):
+                self._set_predict_jobs(1)
                 X_scaled = self.scaler.transform([features])
                 prediction = self.model.predict(X_scaled)[0]
                 probabilities = self.model.predict_proba(X_scaled)[0]
                 confidence = float(max(probabilities))
                 
                 # Get attack type name
-                attack_type = [k for k, v in self.ATTACK_TYPES.items() if v == prediction][0]
-                return attack_type, confidence
+                return self.ATTACK_NAMES[prediction], confidence
         except Exception as e:
             logger.debug(f'Prediction error: {e}')
         
         return 'normal', 0.0
     
     def predict_batch(self, feature_list: List[List[float]]) -> List[Tuple[str, float]]:
-        """Predict for multiple feature vectors"""
-        return [self.predict(features) for features in feature_list]
+        """
+        Predict for multiple feature vectors with a single scaler and model call.
+        
+        Returns:
+            (attack_type, confidence) per vector, as predict() would give it
+        """
+        results = [('normal', 0.0)] * len(feature_list)
+        if not self.is_trained or self.model is None or not self.scaler:
+            return results
+        
+        rows = [i for i, features in enumerate(feature_list) if len(features) == len(self.feature_names)]
+        if not rows:
+            return results
+        
+        try:
+            self._set_predict_jobs(len(rows))
+            X_scaled = self.scaler.transform(np.array([feature_list[i] for i in rows], dtype=float))
+            # The forest's predict() is the argmax of predict_proba(); take both from one pass
+            probabilities = self.model.predict_proba(X_scaled)
+            predictions = self.model.classes_[probabilities.argmax(axis=1)]
+            for i, prediction, confidence in zip(rows, predictions, probabilities.max(axis=1)):
+                attack_type = self.ATTACK_NAMES.get(prediction)
+                if attack_type is not None:
+                    results[i] = (attack_type, float(confidence))
+        except Exception as e:
+            logger.debug(f'Batch prediction error: {e}')
+        
+        return results
+    
+    def _build_estimator(self):
+        """Untrained estimator for the configured backend"""
+        if self.backend == 'hgbt':
+            # Early stopping keeps the ensemble (one tree per class per iteration) small
+            return HistGradientBoostingClassifier(max_depth=8, max_iter=200, early_stopping=True, random_state=42)
+        
+        return RandomForestClassifier(
+            n_estimators=100,
+            max_depth=15,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1
+        )
+    
+    def _set_predict_jobs(self, rows: int):
+        """Use all cores only for prediction batches large enough to amortize them"""
+        if hasattr(self.model, 'n_jobs'):
+            self.model.n_jobs = -1 if rows >= self.PARALLEL_PREDICT_MIN_ROWS else 1
     
     def get_feature_importance(self) -> Dict[str, float]:
-        """Get importance scores for each feature"""
+        """Get importance scores for each feature (permutation importances for 'hgbt')"""
         if not self.is_trained or self.model is None:
             return {}
         
+        if self.feature_importances:
+            return dict(self.feature_importances)
+        
         try:
             importances = self.model.feature_importances_
             return {
@@ -189,7 +254,8 @@ class AttackClassifier:
                 pickle.dump({
                     'model': self.model,
                     'scaler': self.scaler,
-                    'feature_names': self.feature_names
+                    'feature_names': self.feature_names,
+                    'feature_importances': self.feature_importances
                 }, f)
             logger.info(f'Model saved to {self.model_path}')
         except Exception as e:
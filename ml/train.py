@@ -15,153 +15,156 @@ logger = logging.getLogger(__name__)
 # Import honeypot modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.database import HoneypotDatabase
-from ml.features import FeatureExtractor
+from ml.features import FeatureExtractor, EVENT_FEATURE_NAMES
 from ml.model import get_model
 
 try:
+    import numpy as np
     NUMPY_AVAILABLE = True
 except ImportError:
     NUMPY_AVAILABLE = False
 
 
-def generate_synthetic_training_data(num_samples: int = 100) -> Tuple[List[List[float]], List[int], List[str]]:
+def _synthetic_columns(attack_type: int, n: int) -> List:
+    """Feature columns for n synthetic samples of one attack type"""
+    def uniform(low, high):
+        return np.random.uniform(low, high, n)
+    
+    def randint(low, high):
+        return np.random.randint(low, high, n)
+    
+    if attack_type == 0:  # Volumetric
+        event_count = randint(1000, 10000)
+        events_per_sec = uniform(50, 200)
+        return [
+            event_count,  # event_count
+            randint(1, 50),  # unique_ips
+            randint(1, 3),  # protocol_diversity
+            uniform(0.3, 0.8),  # dominant_protocol_ratio
+            event_count / events_per_sec,  # time_span_seconds
+            events_per_sec,  # events_per_second
+            uniform(100, 500),  # avg_payload_size
+            uniform(500, 2000),  # max_payload_size
+            uniform(50, 200),  # min_payload_size
+            uniform(1000, 5000),  # payload_variance
+            randint(1, 5),  # port_diversity
+            uniform(1, 5),  # ports_per_ip_avg
+            1, 0, 0, 0,  # has_high_rate, amplification, multi_protocol, port_scanning
+            uniform(0.7, 1.0),  # http_ratio
+            uniform(0, 0.1),  # dns_ratio
+            uniform(0, 0.1),  # ssdp_ratio
+            uniform(0, 0.1),  # ntp_ratio
+        ]
+    
+    if attack_type == 1:  # Multi-protocol
+        return [
+            randint(500, 3000),  # event_count
+            randint(3, 20),  # unique_ips
+            randint(3, 6),  # protocol_diversity
+            uniform(0.2, 0.4),  # dominant_protocol_ratio
+            uniform(60, 300),  # time_span_seconds
+            uniform(5, 30),  # events_per_second
+            uniform(200, 800),  # avg_payload_size
+            uniform(1000, 3000),  # max_payload_size
+            uniform(50, 300),  # min_payload_size
+            uniform(2000, 8000),  # payload_variance
+            randint(5, 15),  # port_diversity
+            uniform(5, 15),  # ports_per_ip_avg
+            0, 0, 1, 0,  # flags
+            uniform(0.2, 0.4),  # http_ratio
+            uniform(0.2, 0.4),  # dns_ratio
+            uniform(0.1, 0.3),  # ssdp_ratio
+            uniform(0.1, 0.3),  # ntp_ratio
+        ]
+    
+    if attack_type == 2:  # Amplification
+        return [
+            randint(500, 5000),  # event_count
+            randint(5, 30),  # unique_ips
+            randint(2, 4),  # protocol_diversity
+            uniform(0.6, 0.9),  # dominant_protocol_ratio
+            uniform(30, 180),  # time_span_seconds
+            uniform(10, 50),  # events_per_second
+            uniform(3000, 8000),  # avg_payload_size (large!)
+            uniform(8000, 15000),  # max_payload_size
+            uniform(1000, 5000),  # min_payload_size
+            uniform(5000, 15000),  # payload_variance
+            randint(3, 8),  # port_diversity
+            uniform(3, 10),  # ports_per_ip_avg
+            0, 1, 0, 0,  # has_high_rate, amplification flag
+            uniform(0.1, 0.3),  # http_ratio
+            uniform(0.2, 0.4),  # dns_ratio
+            uniform(0.1, 0.3),  # ssdp_ratio
+            uniform(0.2, 0.4),  # ntp_ratio
+        ]
+    
+    if attack_type == 3:  # Sustained
+        return [
+            randint(5000, 20000),  # event_count (very high!)
+            randint(10, 100),  # unique_ips
+            randint(2, 5),  # protocol_diversity
+            uniform(0.4, 0.7),  # dominant_protocol_ratio
+            uniform(600, 3600),  # time_span_seconds (long!)
+            uniform(5, 30),  # events_per_second
+            uniform(200, 1000),  # avg_payload_size
+            uniform(1000, 3000),  # max_payload_size
+            uniform(50, 300),  # min_payload_size
+            uniform(2000, 8000),  # payload_variance
+            randint(5, 20),  # port_diversity
+            uniform(5, 20),  # ports_per_ip_avg
+            0, 0, 0, 0,  # flags
+            uniform(0.2, 0.5),  # http_ratio
+            uniform(0.1, 0.3),  # dns_ratio
+            uniform(0.1, 0.3),  # ssdp_ratio
+            uniform(0.1, 0.3),  # ntp_ratio
+        ]
+    
+    # Normal (label 4)
+    return [
+        randint(1, 50),  # event_count (low)
+        randint(1, 5),  # unique_ips
+        1,  # protocol_diversity
+        1.0,  # dominant_protocol_ratio
+        uniform(1, 30),  # time_span_seconds
+        uniform(0.1, 2),  # events_per_second (low)
+        uniform(50, 200),  # avg_payload_size (small)
+        uniform(100, 500),  # max_payload_size
+        uniform(10, 100),  # min_payload_size
+        uniform(100, 1000),  # payload_variance
+        1,  # port_diversity (single port)
+        1.0,  # ports_per_ip_avg
+        0, 0, 0, 0,  # flags
+        1.0,  # http_ratio (single protocol)
+        0, 0, 0,  # other protocols
+    ]
+
+
+def generate_synthetic_training_data(num_samples: int = 100) -> Tuple['np.ndarray', 'np.ndarray', List[str]]:
     """
     Generate synthetic training data for model pre-training.
     
     Returns:
-        (features_list, labels_list, feature_names)
+        (features array of shape (num_samples, n_features), labels array, feature_names)
     """
     if not NUMPY_AVAILABLE:
         logger.warning('NumPy not available, cannot generate synthetic data')
         return [], [], []
     
-    import numpy as np
-    
     logger.info(f'Generating {num_samples} synthetic training samples...')
     
-    extractor = FeatureExtractor()
-    feature_names = extractor.get_feature_names()
-    
-    X = []
-    y = []
+    feature_names = list(EVENT_FEATURE_NAMES)
     
     # Attack type labels:
     # 0: volumetric, 1: multi_protocol, 2: amplification, 3: sustained, 4: normal
+    y = np.arange(num_samples, dtype=np.int32) % 5  # Cycle through attack types
     
-    for i in range(num_samples):
-        attack_type = i % 5  # Cycle through attack types
-        
-        # Generate feature values based on attack type
-        features = []
-        
-        if attack_type == 0:  # Volumetric
-            event_count = np.random.randint(1000, 10000)
-            events_per_sec = np.random.uniform(50, 200)
-            protocol_div = np.random.randint(1, 3)
-            features = [
-                event_count,  # event_count
-                np.random.randint(1, 50),  # unique_ips
-                protocol_div,  # protocol_diversity
-                np.random.uniform(0.3, 0.8),  # dominant_protocol_ratio
-                event_count / events_per_sec,  # time_span_seconds
-                events_per_sec,  # events_per_second
-                np.random.uniform(100, 500),  # avg_payload_size
-                np.random.uniform(500, 2000),  # max_payload_size
-                np.random.uniform(50, 200),  # min_payload_size
-                np.random.uniform(1000, 5000),  # payload_variance
-                np.random.randint(1, 5),  # port_diversity
-                np.random.uniform(1, 5),  # ports_per_ip_avg
-                1, 0, 0, 0,  # has_high_rate, amplification, multi_protocol, port_scanning
-                np.random.uniform(0.7, 1.0),  # http_ratio
-                np.random.uniform(0, 0.1),  # dns_ratio
-                np.random.uniform(0, 0.1),  # ssdp_ratio
-                np.random.uniform(0, 0.1),  # ntp_ratio
-            ]
-        
-        elif attack_type == 1:  # Multi-protocol
-            features = [
-                np.random.randint(500, 3000),  # event_count
-                np.random.randint(3, 20),  # unique_ips
-                np.random.randint(3, 6),  # protocol_diversity
-                np.random.uniform(0.2, 0.4),  # dominant_protocol_ratio
-                np.random.uniform(60, 300),  # time_span_seconds
-                np.random.uniform(5, 30),  # events_per_second
-                np.random.uniform(200, 800),  # avg_payload_size
-                np.random.uniform(1000, 3000),  # max_payload_size
-                np.random.uniform(50, 300),  # min_payload_size
-                np.random.uniform(2000, 8000),  # payload_variance
-                np.random.randint(5, 15),  # port_diversity
-                np.random.uniform(5, 15),  # ports_per_ip_avg
-                np.random.randint(0, 1), 0, 1, 0,  # flags
-                np.random.uniform(0.2, 0.4),  # http_ratio
-                np.random.uniform(0.2, 0.4),  # dns_ratio
-                np.random.uniform(0.1, 0.3),  # ssdp_ratio
-                np.random.uniform(0.1, 0.3),  # ntp_ratio
-            ]
-        
-        elif attack_type == 2:  # Amplification
-            features = [
-                np.random.randint(500, 5000),  # event_count
-                np.random.randint(5, 30),  # unique_ips
-                np.random.randint(2, 4),  # protocol_diversity
-                np.random.uniform(0.6, 0.9),  # dominant_protocol_ratio
-                np.random.uniform(30, 180),  # time_span_seconds
-                np.random.uniform(10, 50),  # events_per_second
-                np.random.uniform(3000, 8000),  # avg_payload_size (large!)
-                np.random.uniform(8000, 15000),  # max_payload_size
-                np.random.uniform(1000, 5000),  # min_payload_size
-                np.random.uniform(5000, 15000),  # payload_variance
-                np.random.randint(3, 8),  # port_diversity
-                np.random.uniform(3, 10),  # ports_per_ip_avg
-                np.random.randint(0, 1), 1, 0, 0,  # has_high_rate, amplification flag
-                np.random.uniform(0.1, 0.3),  # http_ratio
-                np.random.uniform(0.2, 0.4),  # dns_ratio
-                np.random.uniform(0.1, 0.3),  # ssdp_ratio
-                np.random.uniform(0.2, 0.4),  # ntp_ratio
-            ]
-        
-        elif attack_type == 3:  # Sustained
-            features = [
-                np.random.randint(5000, 20000),  # event_count (very high!)
-                np.random.randint(10, 100),  # unique_ips
-                np.random.randint(2, 5),  # protocol_diversity
-                np.random.uniform(0.4, 0.7),  # dominant_protocol_ratio
-                np.random.uniform(600, 3600),  # time_span_seconds (long!)
-                np.random.uniform(5, 30),  # events_per_second
-                np.random.uniform(200, 1000),  # avg_payload_size
-                np.random.uniform(1000, 3000),  # max_payload_size
-                np.random.uniform(50, 300),  # min_payload_size
-                np.random.uniform(2000, 8000),  # payload_variance
-                np.random.randint(5, 20),  # port_diversity
-                np.random.uniform(5, 20),  # ports_per_ip_avg
-                0, 0, 0, 0,  # flags
-                np.random.uniform(0.2, 0.5),  # http_ratio
-                np.random.uniform(0.1, 0.3),  # dns_ratio
-                np.random.uniform(0.1, 0.3),  # ssdp_ratio
-                np.random.uniform(0.1, 0.3),  # ntp_ratio
-            ]
-        
-        else:  # Normal (label 4)
-            features = [
-                np.random.randint(1, 50),  # event_count (low)
-                np.random.randint(1, 5),  # unique_ips
-                1,  # protocol_diversity
-                1.0,  # dominant_protocol_ratio
-                np.random.uniform(1, 30),  # time_span_seconds
-                np.random.uniform(0.1, 2),  # events_per_second (low)
-                np.random.uniform(50, 200),  # avg_payload_size (small)
-                np.random.uniform(100, 500),  # max_payload_size
-                np.random.uniform(10, 100),  # min_payload_size
-                np.random.uniform(100, 1000),  # payload_variance
-                1,  # port_diversity (single port)
-                1.0,  # ports_per_ip_avg
-                0, 0, 0, 0,  # flags
-                1.0,  # http_ratio (single protocol)
-                0, 0, 0,  # other protocols
-            ]
-        
-        X.append(features)
-        y.append(attack_type)
+    # Fill each attack type's rows a whole column at a time
+    X = np.empty((num_samples, len(feature_names)), dtype=np.float32)
+    for attack_type in range(5):
+        rows = np.flatnonzero(y == attack_type)
+        columns = _synthetic_columns(attack_type, len(rows))
+        for col, values in enumerate(columns):
+            X[rows, col] = values
     
     logger.info(f'Generated {len(X)} synthetic samples with {len(feature_names)} features')
     return X, y, feature_names
@@ -182,7 +185,8 @@ def train_from_database(db_path: str = 'honeypot.db', use_synthetic: bool = True
     
     model = get_model()
     extractor = FeatureExtractor()
-    feature_names = extractor.get_feature_names()
+    # Database rows use the per-attacker event features, the same columns as the synthetic data
+    feature_names = list(EVENT_FEATURE_NAMES)
     
     X_train = []
     y_train = []
@@ -215,8 +219,7 @@ def train_from_database(db_path: str = 'honeypot.db', use_synthetic: bool = True
             
             # Extract features for each IP's events
             for ip, ip_event_list in ip_events.items():
-                features_dict = extractor.extract_from_events(ip_event_list)
-                feature_vector = [features_dict.get(name, 0) for name in feature_names]
+                features_dict, feature_vector = extractor.extract_event_vector(ip_event_list)
                 X_train.append(feature_vector)
                 
                 # Simple labeling based on patterns
@@ -68,7 +68,6 @@ for event in events:
 print("\n💾 DATABASE INFORMATION")
 print("-"*80)
 info = db.get_database_size()
-profiles = db.get_all_profiles()
 print(f"Database Size:       {info['size_bytes']:,} bytes ({info['size_mb']:.2f} MB)")
 print(f"Total Profiles:      {info['profile_count']}")
 print(f"Total Events:        {info['event_count']}")
@@ -10,6 +10,12 @@ import os
 import json
 from pathlib import Path
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 os.chdir('/home/hunter/Projekty/ddospot')
 
 # Configuration
@@ -54,6 +60,22 @@ def log_info(text):
 def log_warning(text):
     print(f"{YELLOW}[!]{NC} {text}")
 
+def _looks_like_html(resp, markers=(b"<html", b"<!doctype")):
+    """Sniff only the first 256 bytes of the body for an HTML marker"""
+    head = resp.content[:256].lower()
+    return any(m in head for m in markers)
+
+_exec_cache = {}
+
+def _is_exec(path):
+    """Single stat() check for an existing file with any execute bit set"""
+    if path not in _exec_cache:
+        try:
+            _exec_cache[path] = bool(os.stat(path).st_mode & 0o111)
+        except FileNotFoundError:
+            _exec_cache[path] = False
+    return _exec_cache[path]
+
 # ============================================================================
 # TEST 1: DASHBOARD
 # ============================================================================
@@ -73,7 +95,7 @@ except Exception as e:
 log_test("Dashboard serves HTML")
 try:
     resp = requests.get(f"{API_URL}/", timeout=TIMEOUT)
-    if resp.status_code == 200 and ("<html" in resp.text.lower() or "<!doctype" in resp.text.lower()):
+    if resp.status_code == 200 and _looks_like_html(resp):
         log_pass("Dashboard serves HTML")
     else:
         log_fail("Dashboard HTML not found")
@@ -83,7 +105,7 @@ except Exception as e:
 log_test("Advanced dashboard loads")
 try:
     resp = requests.get(f"{API_URL}/advanced", timeout=TIMEOUT)
-    if resp.status_code == 200 and "<html" in resp.text.lower():
+    if resp.status_code == 200 and _looks_like_html(resp, (b"<html",)):
         log_pass("Advanced dashboard loads")
     else:
         log_fail("Advanced dashboard failed")
@@ -99,7 +121,7 @@ log_header("TEST 2: Core API Endpoints")
 log_test("GET /api/stats returns JSON")
 try:
     resp = requests.get(f"{API_URL}/api/stats", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     total = data.get('total', 0)
     log_pass(f"GET /api/stats (total: {total} events)")
 except Exception as e:
@@ -108,7 +130,7 @@ except Exception as e:
 log_test("GET /api/events returns data")
 try:
     resp = requests.get(f"{API_URL}/api/events", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     log_pass("GET /api/events")
 except Exception as e:
     log_fail(f"GET /api/events: {str(e)[:50]}")
@@ -116,7 +138,7 @@ except Exception as e:
 log_test("GET /api/country-stats returns geographic data")
 try:
     resp = requests.get(f"{API_URL}/api/country-stats", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     countries = len(data) if isinstance(data, list) else 0
     log_pass(f"GET /api/country-stats ({countries} countries)")
 except Exception as e:
@@ -132,7 +154,7 @@ log_test("ML model prediction endpoint")
 try:
     resp = requests.get(f"{API_URL}/api/ml/predict/192.168.1.1", timeout=TIMEOUT)
     if resp.status_code == 200:
-        data = resp.json()
+        data = _loads(resp.content)
         log_pass("ML predictions available")
     else:
         log_warning(f"ML prediction returned {resp.status_code}")
@@ -164,7 +186,7 @@ except Exception as e:
 log_test("JSON export endpoint")
 try:
     resp = requests.get(f"{API_URL}/api/export/json", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     log_pass("JSON export working")
 except Exception as e:
     log_warning(f"JSON export: {str(e)[:50]}")
@@ -222,7 +244,7 @@ log_header("TEST 7: Geolocation & Geographic Data")
 log_test("Geolocation lookup for IP")
 try:
     resp = requests.get(f"{API_URL}/api/geolocation/8.8.8.8", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     country = data.get('country', 'unknown')
     log_pass(f"Geolocation lookup ({country})")
 except Exception as e:
@@ -231,7 +253,7 @@ except Exception as e:
 log_test("Map data endpoint")
 try:
     resp = requests.get(f"{API_URL}/api/map-data", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     log_pass("Map visualization data available")
 except Exception as e:
     log_warning(f"Map data: {str(e)[:50]}")
@@ -245,7 +267,7 @@ log_header("TEST 8: Alert Configuration System")
 log_test("Alert configuration endpoint")
 try:
     resp = requests.get(f"{API_URL}/api/alerts/config", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     enabled = data.get('enabled', False)
     log_pass(f"Alert config available (enabled: {enabled})")
 except Exception as e:
@@ -254,7 +276,7 @@ except Exception as e:
 log_test("Alert history endpoint")
 try:
     resp = requests.get(f"{API_URL}/api/alerts/history", timeout=TIMEOUT)
-    data = resp.json()
+    data = _loads(resp.content)
     alert_count = len(data) if isinstance(data, list) else 0
     log_pass(f"Alert history ({alert_count} alerts)")
 except Exception as e:
@@ -291,20 +313,21 @@ except Exception as e:
 log_header("TEST 10: Backup & Restore")
 
 log_test("Backup script exists")
-if Path("backup-local.sh").exists() and os.access("backup-local.sh", os.X_OK):
+if _is_exec("backup-local.sh"):
     log_pass("Backup script available")
 else:
     log_fail("Backup script not found")
 
 log_test("Restore script exists")
-if Path("restore-local.sh").exists() and os.access("restore-local.sh", os.X_OK):
+if _is_exec("restore-local.sh"):
     log_pass("Restore script available")
 else:
     log_fail("Restore script not found")
 
 log_test("Backups directory exists")
 if Path("backups").exists():
-    backup_count = len(list(Path("backups").glob("*.tar.gz")))
+    backup_count = sum(1 for e in os.scandir("backups")
+                       if e.name.endswith(".tar.gz") and e.is_file(follow_symlinks=False))
     log_pass(f"Backups directory available ({backup_count} backups)")
 else:
     log_warning("No backups created yet")
@@ -328,7 +351,7 @@ else:
     log_fail("Maintenance script not found")
 
 log_test("Cron management tool available")
-if Path("manage-cron.sh").exists() and os.access("manage-cron.sh", os.X_OK):
+if _is_exec("manage-cron.sh"):
     log_pass("Cron manager tool available")
 else:
     log_warning("Cron manager tool not found")
@@ -340,9 +363,11 @@ else:
 log_header("TEST 12: Test Suite & Testing Infrastructure")
 
 log_test("Test modules exist")
-test_files = list(Path("tests").glob("test_*.py"))
-if len(test_files) > 0:
-    log_pass(f"Test modules found ({len(test_files)} modules)")
+test_count = sum(1 for e in os.scandir("tests")
+                 if e.name.startswith("test_") and e.name.endswith(".py")
+                 and e.is_file(follow_symlinks=False))
+if test_count > 0:
+    log_pass(f"Test modules found ({test_count} modules)")
 else:
     log_fail("No test modules found")
 
@@ -353,7 +378,7 @@ else:
     log_warning("pytest.ini not found")
 
 log_test("Test runner script available")
-if Path("run-tests.sh").exists() and os.access("run-tests.sh", os.X_OK):
+if _is_exec("run-tests.sh"):
     log_pass("Test runner script available")
 else:
     log_warning("Test runner script not found")
@@ -371,7 +396,7 @@ else:
     log_fail("Demo data tool not found")
 
 log_test("Demo data script is executable")
-if Path("tools/populate_demo.py").exists() and os.access("tools/populate_demo.py", os.X_OK):
+if _is_exec("tools/populate_demo.py"):
     log_pass("Demo data tool is executable")
 else:
     log_warning("Demo data tool not executable")
@@ -395,13 +420,14 @@ docs = [
     "TASK_12_DEMO_DATA.md",
 ]
 
-doc_count = sum(1 for doc in docs if Path(doc).exists())
+existing_files = {e.name for e in os.scandir(".") if e.is_file(follow_symlinks=False)}
+doc_count = sum(1 for doc in docs if doc in existing_files)
 
 log_test("Task documentation")
 log_pass(f"Documentation created ({doc_count}/10 guides)")
 
 log_test("Comprehensive guide exists")
-if Path("ALL_TASKS_COMPLETE.md").exists():
+if "ALL_TASKS_COMPLETE.md" in existing_files:
     log_pass("Master summary documentation available")
 else:
     log_warning("Master summary not yet created")
@@ -5,11 +5,23 @@ Tests all 12 features, routes, APIs, and functionality
 """
 
 import sys
+import atexit
+import hashlib
+import importlib.util
 import subprocess
 import requests
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 # Colors for output
 GREEN = '\033[92m'
@@ -23,6 +35,19 @@ BASE_URL = "http://127.0.0.1:5000"
 TESTS_PASSED = 0
 TESTS_FAILED = 0
 
+# One keep-alive session for every probe against the dashboard
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=0))
+atexit.register(SESSION.close)
+
+# Static asset validation outcomes keyed by path, reused while the ETag matches
+ASSET_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".verify_cache.json")
+
+# Fingerprint of this script, which holds the validator checks; outcomes cached
+# by an older version of the checks are discarded rather than replayed
+with open(__file__, "rb") as _script:
+    CHECKS_VERSION = hashlib.sha256(_script.read()).hexdigest()
+
 def test_section(title):
     """Print a test section header"""
     print(f"\n{BLUE}{BOLD}{'='*70}")
@@ -43,13 +68,122 @@ def test_fail(test_name, error=""):
     if error:
         print(f"   {error}")
 
-def check_route(method, path, expected_status=200, name=""):
-    """Check if a route is accessible"""
+def fetch(path, method="GET", headers=None):
+    """Request a path through the shared session, returning (response, error)"""
     try:
-        if method == "GET":
-            response = requests.get(f"{BASE_URL}{path}", timeout=5)
+        return SESSION.request(method, f"{BASE_URL}{path}", headers=headers, timeout=5), None
+    except Exception as e:
+        return None, e
+
+def fetch_all(paths, headers=None):
+    """GET independent paths concurrently; results are keyed by path.
+
+    headers optionally maps a path to extra request headers. Only the
+    network I/O runs in worker threads - callers report results from the
+    main thread so the pass/fail counters stay race-free.
+    """
+    headers = headers or {}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return dict(zip(paths, executor.map(lambda p: fetch(p, headers=headers.get(p)), paths)))
+
+def unwrap(result):
+    """Return the response of a fetch() result, re-raising its error"""
+    response, error = result
+    if error is not None:
+        raise error
+    return response
+
+def content_results(text, checks):
+    """Run substring checks against one response body, returning [(desc, passed)].
+
+    Each check is (needles, ignore_case, desc) and passes when any needle is
+    present; the body is casefolded at most once for all case-insensitive checks.
+    """
+    folded = None
+    results = []
+    for needles, ignore_case, desc in checks:
+        haystack = text
+        if ignore_case:
+            if folded is None:
+                folded = text.casefold()
+            haystack = folded
+        results.append((desc, any(needle in haystack for needle in needles)))
+    return results
+
+def report(label, results):
+    """Print pass/fail lines for (desc, passed) pairs"""
+    for desc, passed in results:
+        if passed:
+            test_success(f"{label}: {desc}")
         else:
-            response = requests.post(f"{BASE_URL}{path}", timeout=5)
+            test_fail(f"{label}: {desc}")
+
+def check_content(label, text, checks):
+    """Report substring checks against one response body"""
+    report(label, content_results(text, checks))
+
+def load_asset_cache():
+    """Load cached asset validation outcomes ({path: {"etag", "results"}}) made by the current checks"""
+    try:
+        with open(ASSET_CACHE_FILE, "rb") as f:
+            data = _loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("checks") != CHECKS_VERSION:
+        return {}
+    return data.get("assets", {})
+
+def save_asset_cache(cache):
+    """Persist asset validation outcomes for the next run, tagged with the checks version"""
+    try:
+        with open(ASSET_CACHE_FILE, "w") as f:
+            json.dump({"checks": CHECKS_VERSION, "assets": cache}, f)
+    except OSError:
+        pass
+
+def check_asset(path, name, label, result, validate, cache):
+    """Check a static asset, re-validating its body only when its ETag changed.
+
+    The request was sent with If-None-Match when a cached entry exists, so a
+    304 replays the cached outcomes without downloading the body again.
+    validate(response) returns [(desc, passed)] for a fresh 200 body.
+    """
+    try:
+        response = unwrap(result)
+    except Exception as e:
+        test_fail(name, str(e))
+        test_fail(f"{label} validation", str(e))
+        return
+    
+    cached = cache.get(path)
+    if response.status_code == 304 and cached:
+        test_success(name)
+        report(label, cached["results"])
+        return
+    if response.status_code != 200:
+        test_fail(name, f"Got {response.status_code}, expected 200")
+        cache.pop(path, None)
+        return
+    
+    test_success(name)
+    try:
+        results = validate(response)
+    except Exception as e:
+        test_fail(f"{label} validation", str(e))
+        cache.pop(path, None)
+        return
+    report(label, results)
+    
+    etag = response.headers.get("ETag")
+    if etag:
+        cache[path] = {"etag": etag, "results": results}
+    else:
+        cache.pop(path, None)
+
+def check_route(method, path, expected_status=200, name="", result=None):
+    """Check if a route is accessible"""
+    try:
+        response = unwrap(result or fetch(path, method))
         
         if response.status_code == expected_status:
             test_success(name or f"{method} {path}")
@@ -61,22 +195,28 @@ def check_route(method, path, expected_status=200, name=""):
         test_fail(name or f"{method} {path}", str(e))
         return False
 
-def check_api(path, expected_fields=None, name="", headers=None):
+def _has_key(data, key):
+    """Check whether key appears anywhere in decoded JSON (dicts nested in dicts/lists)"""
+    if isinstance(data, dict):
+        return key in data or any(_has_key(v, key) for v in data.values())
+    if isinstance(data, list):
+        return any(_has_key(v, key) for v in data)
+    return False
+
+def check_api(path, expected_fields=None, name="", headers=None, result=None):
     """Check if an API returns valid JSON with expected fields"""
     try:
-        if headers is None:
-            headers = {}
-        response = requests.get(f"{BASE_URL}{path}", headers=headers, timeout=5)
+        response = unwrap(result or fetch(path, headers=headers))
         if response.status_code not in [200, 401]:
             test_fail(name or f"GET {path}", f"Status {response.status_code}")
             return False
         if response.status_code == 401:
             return True  # Auth required but endpoint exists
         
-        data = response.json()
+        data = _loads(response.content)
         if expected_fields:
             for field in expected_fields:
-                if field not in str(data):
+                if not _has_key(data, field):
                     test_fail(name or f"GET {path}", f"Missing field: {field}")
                     return False
         
@@ -86,165 +226,154 @@ def check_api(path, expected_fields=None, name="", headers=None):
         test_fail(name or f"GET {path}", str(e))
         return False
 
+# Run pytest tests, sharded across cores when pytest-xdist is installed
+# (--dist loadfile keeps each file's fixtures on a single worker)
+pytest_args = ["python", "-m", "pytest"]
+if importlib.util.find_spec("xdist") is not None:
+    pytest_args += ["-n", "auto", "--dist", "loadfile"]
+pytest_args += [
+    "tests/test_mobile_dashboard.py",
+    "tests/test_core_modules.py",
+    "tests/test_alerts.py",
+    "tools/test_feature11.py",
+    "--tb=no", "-q",
+]
+
+# Started up front so the suite runs while the HTTP probes below are in
+# flight; its output is collected in the Test Suite Status section
+pytest_proc = pytest_error = None
+try:
+    pytest_proc = subprocess.Popen(
+        pytest_args,
+        cwd="/home/hunter/Projekty/ddospot",
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+except Exception as e:
+    pytest_error = e
+
 # ============================================================================
 test_section("🌐 Feature #1-#10: Backend Infrastructure")
 # ============================================================================
 
-check_route("GET", "/", name="Simple Dashboard")
-check_route("GET", "/advanced", name="Advanced Dashboard")
-check_route("GET", "/profile/192.168.1.1", name="IP Profile Page")
-check_api("/api/stats", name="Stats API")
-check_api("/api/top-attackers", name="Top Attackers API")
-check_api("/api/recent-events", name="Recent Events API")
-check_api("/api/blacklist", name="Blacklist API")
-check_api("/api/database-info", name="Database Info API")
+fetched = fetch_all([
+    "/", "/advanced", "/profile/192.168.1.1",
+    "/api/stats", "/api/top-attackers", "/api/recent-events",
+    "/api/blacklist", "/api/database-info",
+])
+
+check_route("GET", "/", name="Simple Dashboard", result=fetched["/"])
+check_route("GET", "/advanced", name="Advanced Dashboard", result=fetched["/advanced"])
+check_route("GET", "/profile/192.168.1.1", name="IP Profile Page", result=fetched["/profile/192.168.1.1"])
+check_api("/api/stats", name="Stats API", result=fetched["/api/stats"])
+check_api("/api/top-attackers", name="Top Attackers API", result=fetched["/api/top-attackers"])
+check_api("/api/recent-events", name="Recent Events API", result=fetched["/api/recent-events"])
+check_api("/api/blacklist", name="Blacklist API", result=fetched["/api/blacklist"])
+check_api("/api/database-info", name="Database Info API", result=fetched["/api/database-info"])
 
 # ============================================================================
 test_section("⚙️ Feature #11: Web Configuration UI")
 # ============================================================================
 
-check_route("GET", "/settings", name="Settings Page (Feature #11)")
-check_api("/api/config/honeypot", name="Honeypot Config API (requires auth)")
-check_api("/api/config/alerts", name="Alerts Config API (requires auth)")
-check_api("/api/config/responses", name="Response Config API (requires auth)")
-check_api("/api/config/ui", name="UI Config API (requires auth)")
-check_api("/api/config/system", name="System Config API (requires auth)")
+fetched = fetch_all([
+    "/settings", "/api/config/honeypot", "/api/config/alerts",
+    "/api/config/responses", "/api/config/ui", "/api/config/system",
+])
+
+check_route("GET", "/settings", name="Settings Page (Feature #11)", result=fetched["/settings"])
+check_api("/api/config/honeypot", name="Honeypot Config API (requires auth)", result=fetched["/api/config/honeypot"])
+check_api("/api/config/alerts", name="Alerts Config API (requires auth)", result=fetched["/api/config/alerts"])
+check_api("/api/config/responses", name="Response Config API (requires auth)", result=fetched["/api/config/responses"])
+check_api("/api/config/ui", name="UI Config API (requires auth)", result=fetched["/api/config/ui"])
+check_api("/api/config/system", name="System Config API (requires auth)", result=fetched["/api/config/system"])
 
 # ============================================================================
 test_section("📱 Feature #12: Mobile Dashboard (NEW)")
 # ============================================================================
 
-check_route("GET", "/mobile", name="Mobile Dashboard Route")
+# Each asset is downloaded once, concurrently, and reused for the route and content checks;
+# static files are requested conditionally so unchanged ones come back as an empty 304
+asset_cache = load_asset_cache()
+fetched = fetch_all([
+    "/mobile", "/static/manifest.json", "/static/mobile-sw.js",
+    "/static/mobile-dashboard.css", "/static/mobile-dashboard.js",
+], headers={path: {"If-None-Match": entry["etag"]} for path, entry in asset_cache.items()})
+
+check_route("GET", "/mobile", name="Mobile Dashboard Route", result=fetched["/mobile"])
 
 # Check mobile dashboard HTML content
 try:
-    response = requests.get(f"{BASE_URL}/mobile", timeout=5)
+    response = unwrap(fetched["/mobile"])
     html = response.text
     
-    checks = [
-        ("DDoSPot" in html, "App title present"),
-        ("mobile-dashboard.js" in html, "Mobile JS included"),
-        ("mobile-dashboard.css" in html, "Mobile CSS included"),
-        ("tab" in html.lower(), "Tab navigation present"),
-        ("manifest.json" in html, "PWA manifest linked"),
-    ]
-    
-    for check, desc in checks:
-        if check:
-            test_success(f"Mobile HTML: {desc}")
-        else:
-            test_fail(f"Mobile HTML: {desc}")
+    check_content("Mobile HTML", html, [
+        (("DDoSPot",), False, "App title present"),
+        (("mobile-dashboard.js",), False, "Mobile JS included"),
+        (("mobile-dashboard.css",), False, "Mobile CSS included"),
+        (("tab",), True, "Tab navigation present"),
+        (("manifest.json",), False, "PWA manifest linked"),
+    ])
             
 except Exception as e:
     test_fail("Mobile Dashboard HTML check", str(e))
 
 # Check PWA Manifest
-check_route("GET", "/static/manifest.json", name="PWA Manifest File")
-try:
-    response = requests.get(f"{BASE_URL}/static/manifest.json", timeout=5)
-    manifest = response.json()
-    
-    checks = [
-        ("name" in manifest, "App name in manifest"),
-        ("display" in manifest, "Display mode in manifest"),
-        ("start_url" in manifest, "Start URL in manifest"),
-        (manifest.get("display") == "standalone", "PWA standalone mode"),
-        ("icons" in manifest, "Icons in manifest"),
+def validate_manifest(response):
+    manifest = _loads(response.content)
+    return [
+        ("App name in manifest", "name" in manifest),
+        ("Display mode in manifest", "display" in manifest),
+        ("Start URL in manifest", "start_url" in manifest),
+        ("PWA standalone mode", manifest.get("display") == "standalone"),
+        ("Icons in manifest", "icons" in manifest),
     ]
-    
-    for check, desc in checks:
-        if check:
-            test_success(f"PWA Manifest: {desc}")
-        else:
-            test_fail(f"PWA Manifest: {desc}")
-            
-except Exception as e:
-    test_fail("PWA Manifest validation", str(e))
+
+check_asset("/static/manifest.json", "PWA Manifest File", "PWA Manifest",
+            fetched["/static/manifest.json"], validate_manifest, asset_cache)
 
 # Check Service Worker
-check_route("GET", "/static/mobile-sw.js", name="Service Worker File")
-try:
-    response = requests.get(f"{BASE_URL}/static/mobile-sw.js", timeout=5)
-    sw_code = response.text
-    
-    checks = [
-        ("addEventListener" in sw_code, "Event listeners present"),
-        ("caches" in sw_code, "Cache API used"),
-        ("fetch" in sw_code, "Fetch handler present"),
-        ("offline" in sw_code.lower(), "Offline handling"),
-    ]
-    
-    for check, desc in checks:
-        if check:
-            test_success(f"Service Worker: {desc}")
-        else:
-            test_fail(f"Service Worker: {desc}")
-            
-except Exception as e:
-    test_fail("Service Worker validation", str(e))
+check_asset("/static/mobile-sw.js", "Service Worker File", "Service Worker",
+            fetched["/static/mobile-sw.js"], lambda response: content_results(response.text, [
+                (("addEventListener",), False, "Event listeners present"),
+                (("caches",), False, "Cache API used"),
+                (("fetch",), False, "Fetch handler present"),
+                (("offline",), True, "Offline handling"),
+            ]), asset_cache)
 
 # Check Mobile CSS
-check_route("GET", "/static/mobile-dashboard.css", name="Mobile CSS File")
-try:
-    response = requests.get(f"{BASE_URL}/static/mobile-dashboard.css", timeout=5)
-    css = response.text
-    
-    checks = [
-        ("--primary" in css or "#ff6b6b" in css, "Dark theme colors"),
-        ("@media" in css, "Responsive media queries"),
-        ("mobile" in css.lower(), "Mobile styling"),
-    ]
-    
-    for check, desc in checks:
-        if check:
-            test_success(f"Mobile CSS: {desc}")
-        else:
-            test_fail(f"Mobile CSS: {desc}")
-            
-except Exception as e:
-    test_fail("Mobile CSS validation", str(e))
+check_asset("/static/mobile-dashboard.css", "Mobile CSS File", "Mobile CSS",
+            fetched["/static/mobile-dashboard.css"], lambda response: content_results(response.text, [
+                (("--primary", "#ff6b6b"), False, "Dark theme colors"),
+                (("@media",), False, "Responsive media queries"),
+                (("mobile",), True, "Mobile styling"),
+            ]), asset_cache)
 
 # Check Mobile JavaScript
-check_route("GET", "/static/mobile-dashboard.js", name="Mobile JS File")
-try:
-    response = requests.get(f"{BASE_URL}/static/mobile-dashboard.js", timeout=5)
-    js = response.text
-    
-    checks = [
-        ("MobileDashboard" in js, "MobileDashboard class"),
-        ("addEventListener" in js, "Event listeners"),
-        ("fetch" in js, "Fetch API usage"),
-        ("offline" in js.lower() or "online" in js.lower(), "Offline detection"),
-    ]
-    
-    for check, desc in checks:
-        if check:
-            test_success(f"Mobile JS: {desc}")
-        else:
-            test_fail(f"Mobile JS: {desc}")
-            
-except Exception as e:
-    test_fail("Mobile JS validation", str(e))
+check_asset("/static/mobile-dashboard.js", "Mobile JS File", "Mobile JS",
+            fetched["/static/mobile-dashboard.js"], lambda response: content_results(response.text, [
+                (("MobileDashboard",), False, "MobileDashboard class"),
+                (("addEventListener",), False, "Event listeners"),
+                (("fetch",), False, "Fetch API usage"),
+                (("offline", "online"), True, "Offline detection"),
+            ]), asset_cache)
+
+save_asset_cache(asset_cache)
 
 # ============================================================================
 test_section("🧪 Test Suite Status")
 # ============================================================================
 
-# Run pytest tests
 try:
-    result = subprocess.run(
-        ["python", "-m", "pytest", 
-         "tests/test_mobile_dashboard.py",
-         "tests/test_core_modules.py",
-         "tests/test_alerts.py",
-         "tools/test_feature11.py",
-         "-v", "--tb=no", "-q"],
-        cwd="/home/hunter/Projekty/ddospot",
-        capture_output=True,
-        timeout=30
-    )
+    if pytest_proc is None:
+        raise pytest_error
+    try:
+        stdout, _ = pytest_proc.communicate(timeout=120)
+    except subprocess.TimeoutExpired:
+        pytest_proc.kill()
+        pytest_proc.communicate()
+        raise
     
-    output = result.stdout.decode('utf-8', errors='ignore')
+    output = stdout.decode('utf-8', errors='ignore')
     
     # Extract test count
     if "passed" in output:
@@ -5,32 +5,122 @@ Supports email, Discord webhooks, and custom integrations.
 
 import smtplib
 import json
+import functools
+import atexit
 import time
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
+from collections import deque
+from datetime import datetime, timezone
 from typing import Optional, Dict, List
-from urllib.request import Request, urlopen
-from urllib.error import URLError
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from telemetry.logger import get_logger
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
 logger = get_logger(__name__)
 
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Shared keep-alive session for webhook/bot alerts so sustained attacks reuse
+# the TLS connection to Discord/Telegram instead of handshaking per alert
+_HTTP = requests.Session()
+_HTTP.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+atexit.register(_HTTP.close)
+
+# Discord embed colors per severity
+_SEVERITY_COLORS = {
+    'low': 0x3498db,      # Blue
+    'medium': 0xf39c12,   # Orange
+    'high': 0xe74c3c,     # Red
+    'critical': 0xc0392b  # Dark Red
+}
+
+# Email HTML body pieces; the fields table is joined from _HTML_ROW
+_HTML_PRE = """
+        <html>
+            <body style="font-family: Arial, sans-serif;">
+                <h2 style="color: #ff3333;">🚨 {title}</h2>
+                <p>{message}</p>
+        """.format
+_HTML_ROW = """
+                <tr>
+                    <td style="padding: 8px; border: 1px solid #ddd;"><strong>{name}</strong></td>
+                    <td style="padding: 8px; border: 1px solid #ddd;">{value}</td>
+                </tr>
+                """.format
+_HTML_POST = """
+                <hr>
+                <p style="color: #666; font-size: 12px;">DDoSPot Honeypot Alert System</p>
+            </body>
+        </html>
+        """
+
+
+def _now() -> datetime:
+    """Current local time, timezone-aware so webhook timestamps are unambiguous"""
+    return datetime.now().astimezone()
+
+
+@functools.lru_cache(maxsize=None)
+def _color_for_severity(severity: str) -> int:
+    """Get Discord embed color for severity"""
+    return _SEVERITY_COLORS.get(severity.lower(), 0xff3333)
+
+
+def _flatten(config: Dict, prefix: str = '') -> Dict:
+    """Map every dotted key path (including nested sections) to its value"""
+    flat = {}
+    for key, value in config.items():
+        path = f'{prefix}{key}'
+        flat[path] = value
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{path}.'))
+    return flat
+
 
 class AlertConfig:
     """Alert configuration manager"""
     
+    # Value types for typed settings, applied once on load/set so senders can use them as-is
+    _SCHEMA = {
+        'email.smtp_server': str,
+        'email.smtp_port': int,
+        'email.sender': str,
+        'email.password': str,
+        'email.recipients': list,
+        'email.use_tls': bool,
+        'discord.webhook_url': str,
+        'telegram.bot_token': str,
+        'telegram.chat_id': str,
+        'throttle.min_interval_seconds': int,
+    }
+    
     def __init__(self, config_file: str = 'config/alert_config.json'):
         self.config_file = config_file
         self.config = self._load_config()
+        self._flat = _flatten(self.config)
     
     def _load_config(self) -> Dict:
         """Load configuration from JSON file"""
         try:
             with open(self.config_file, 'r') as f:
-                return json.load(f)
+                return self._coerce(json.load(f))
         except FileNotFoundError:
             # Return default config
             return self._get_default_config()
@@ -38,6 +128,22 @@ class AlertConfig:
             logger.error(f'Failed to load alert config: {e}')
             return self._get_default_config()
     
+    def _coerce(self, config: Dict) -> Dict:
+        """Cast typed settings in place; values that cannot be cast are dropped"""
+        for key, cast in self._SCHEMA.items():
+            *parents, name = key.split('.')
+            section = config
+            for parent in parents:
+                section = section.get(parent) if isinstance(section, dict) else None
+            if not isinstance(section, dict) or section.get(name) is None:
+                continue
+            try:
+                section[name] = cast(section[name])
+            except (TypeError, ValueError):
+                logger.warning(f'Ignoring invalid alert config value for {key}: {section[name]!r}')
+                del section[name]
+        return config
+    
     def _get_default_config(self) -> Dict:
         """Get default alert configuration"""
         return {
@@ -85,13 +191,7 @@ class AlertConfig:
     
     def get(self, key: str, default=None):
         """Get config value by key (supports nested with dots)"""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                return default
+        value = self._flat.get(key)
         return value if value is not None else default
     
     def set(self, key: str, value):
@@ -103,6 +203,8 @@ class AlertConfig:
                 config[k] = {}
             config = config[k]
         config[keys[-1]] = value
+        self._coerce(self.config)
+        self._flat = _flatten(self.config)
         self.save()
 
 
@@ -111,6 +213,40 @@ class EmailAlert:
     
     def __init__(self, config: AlertConfig):
         self.config = config
+        # Long-lived SMTP session, redialled when settings change or the server drops it
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_settings = None
+        self._smtp_lock = threading.Lock()
+        atexit.register(self._close_smtp)
+    
+    def _ensure_smtp(self, settings: tuple) -> smtplib.SMTP:
+        """Return the open SMTP session for these settings, dialling if needed"""
+        if self._smtp is not None and self._smtp_settings == settings:
+            return self._smtp
+        self._close_smtp()
+        
+        smtp_server, smtp_port, use_tls, sender, password = settings
+        server = smtplib.SMTP(smtp_server, smtp_port)
+        try:
+            if use_tls:
+                server.starttls()
+            server.login(sender, password)
+        except Exception:
+            server.close()
+            raise
+        
+        self._smtp = server
+        self._smtp_settings = settings
+        return server
+    
+    def _close_smtp(self):
+        """Quit the cached SMTP session, if any"""
+        server, self._smtp, self._smtp_settings = self._smtp, None, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
     
     def send(self, subject: str, message: str, html: Optional[str] = None) -> bool:
         """Send email alert"""
@@ -118,41 +254,38 @@ class EmailAlert:
             return False
         
         try:
-            sender = str(self.config.get('email.sender', ''))
-            password = str(self.config.get('email.password', ''))
-            recipients_data = self.config.get('email.recipients', [])
-            recipients = list(recipients_data) if recipients_data else []
+            sender = self.config.get('email.sender', '')
+            password = self.config.get('email.password', '')
+            recipients = self.config.get('email.recipients', [])
             
             if not sender or not password or not recipients:
                 logger.warning('Email alert not configured properly')
                 return False
             
-            msg = MIMEMultipart('alternative')
+            # Plain-text alerts skip the multipart wrapper entirely
+            if html:
+                msg = MIMEMultipart('alternative')
+                msg.attach(MIMEText(message, 'plain'))
+                msg.attach(MIMEText(html, 'html'))
+            else:
+                msg = MIMEText(message, 'plain')
             msg['Subject'] = subject
             msg['From'] = sender
             msg['To'] = ', '.join(recipients)
             
-            # Add plain text version
-            msg.attach(MIMEText(message, 'plain'))
-            
-            # Add HTML version if provided
-            if html:
-                msg.attach(MIMEText(html, 'html'))
-            
             # Send email
-            smtp_server = str(self.config.get('email.smtp_server', ''))
-            smtp_port_val = self.config.get('email.smtp_port', 587)
-            smtp_port = int(smtp_port_val) if isinstance(smtp_port_val, (int, str)) else 587
-            use_tls_val = self.config.get('email.use_tls', True)
-            use_tls = bool(use_tls_val) if use_tls_val is not None else True
-            
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            if use_tls:
-                server.starttls()
-            
-            server.login(sender, password)
-            server.sendmail(sender, recipients, msg.as_string())
-            server.quit()
+            smtp_server = self.config.get('email.smtp_server', '')
+            smtp_port = self.config.get('email.smtp_port', 587)
+            use_tls = self.config.get('email.use_tls', True)
+            settings = (smtp_server, smtp_port, use_tls, sender, password)
+            
+            with self._smtp_lock:
+                try:
+                    self._ensure_smtp(settings).send_message(msg, sender, recipients)
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    # Idle session was dropped by the server: redial once
+                    self._close_smtp()
+                    self._ensure_smtp(settings).send_message(msg, sender, recipients)
             
             logger.info(f'Email alert sent: {subject}')
             return True
@@ -167,13 +300,14 @@ class DiscordAlert:
     def __init__(self, config: AlertConfig):
         self.config = config
     
-    def send(self, title: str, message: str, color: int = 0xff3333, fields: Optional[List[Dict]] = None) -> bool:
+    def send(self, title: str, message: str, color: int = 0xff3333, fields: Optional[List[Dict]] = None,
+             now: Optional[datetime] = None) -> bool:
         """Send Discord alert via webhook"""
         if not self.config.get('discord.enabled'):
             return False
         
         try:
-            webhook_url = str(self.config.get('discord.webhook_url', ''))
+            webhook_url = self.config.get('discord.webhook_url', '')
             if not webhook_url:
                 logger.warning('Discord webhook not configured')
                 return False
@@ -183,7 +317,7 @@ class DiscordAlert:
                 'title': title,
                 'description': message,
                 'color': color,
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': (now or _now()).isoformat(),
             }
             
             if fields:
@@ -194,19 +328,12 @@ class DiscordAlert:
             }
             
             # Send to Discord
-            req = Request(
-                webhook_url,
-                data=json.dumps(payload).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            response = urlopen(req)
-            response.read()
-            response.close()
+            response = _HTTP.post(webhook_url, data=_dumps(payload), headers=_JSON_HEADERS, timeout=10)
+            response.raise_for_status()
             
             logger.info(f'Discord alert sent: {title}')
             return True
-        except URLError as e:
+        except requests.RequestException as e:
             logger.error(f'Failed to send Discord alert: {e}')
             return False
         except Exception as e:
@@ -220,14 +347,15 @@ class TelegramAlert:
     def __init__(self, config: AlertConfig):
         self.config = config
     
-    def send(self, title: str, message: str, fields: Optional[List[Dict]] = None) -> bool:
+    def send(self, title: str, message: str, fields: Optional[List[Dict]] = None,
+             now: Optional[datetime] = None) -> bool:
         """Send Telegram alert via bot"""
         if not self.config.get('telegram.enabled'):
             return False
         
         try:
-            bot_token = str(self.config.get('telegram.bot_token', ''))
-            chat_id = str(self.config.get('telegram.chat_id', ''))
+            bot_token = self.config.get('telegram.bot_token', '')
+            chat_id = self.config.get('telegram.chat_id', '')
             
             if not bot_token or not chat_id:
                 logger.warning('Telegram bot token or chat ID not configured')
@@ -242,7 +370,7 @@ class TelegramAlert:
                     value = field.get('value', 'N/A')
                     text += f"\n\n📊 *{name}:* `{value}`"
             
-            text += f"\n\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            text += f"\n\n⏰ {(now or _now()).strftime('%Y-%m-%d %H:%M:%S')}"
             
             # Send via Telegram API
             url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
@@ -252,19 +380,12 @@ class TelegramAlert:
                 'parse_mode': 'Markdown'
             }
             
-            req = Request(
-                url,
-                data=json.dumps(payload).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            response = urlopen(req, timeout=10)
-            response.read()
-            response.close()
+            response = _HTTP.post(url, data=_dumps(payload), headers=_JSON_HEADERS, timeout=10)
+            response.raise_for_status()
             
             logger.info(f'Telegram alert sent: {title}')
             return True
-        except URLError as e:
+        except requests.RequestException as e:
             logger.error(f'Failed to send Telegram alert: {e}')
             return False
         except Exception as e:
@@ -275,16 +396,45 @@ class TelegramAlert:
 class AlertThrottler:
     """Smart alert throttling to prevent spam"""
     
+    FLUSH_BATCH_SIZE = 64         # Pending history rows that force a write
+    FLUSH_INTERVAL_SECONDS = 2.0  # Max age of buffered rows before a write
+    
+    # Kept as one constant string so sqlite3's per-connection statement cache reuses it
+    _STMT_RECENT = '''
+        SELECT id, alert_type AS type, ip, severity, message, sent, created_at AS timestamp
+        FROM alert_history
+        ORDER BY created_at DESC
+        LIMIT ?
+    '''
+    
     def __init__(self, db_path: str = 'honeypot.db'):
         self.db_path = db_path
         self.memory_cache = {}  # Fast in-memory cache
+        self._local = threading.local()  # One long-lived connection per thread
+        self._pending: deque = deque()  # Alert history rows awaiting flush
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flush_wakeup = threading.Event()  # Set while buffered rows await a deadline flush
+        self._flusher: Optional[threading.Thread] = None  # Started on first use, keeps one connection
+        self._flusher_lock = threading.Lock()
         self._init_db()
+        atexit.register(self.flush)
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's pooled connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)  # Autocommit
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
     
     def _init_db(self):
         """Initialize alert history table"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn().cursor()
             
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS alert_history (
@@ -303,8 +453,11 @@ class AlertThrottler:
                 ON alert_history(alert_type, created_at)
             ''')
             
-            conn.commit()
-            conn.close()
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_created
+                ON alert_history(created_at DESC)
+            ''')
+            
             logger.info('Alert history table initialized')
         except Exception as e:
             logger.error(f'Failed to initialize alert history: {e}')
@@ -314,19 +467,23 @@ class AlertThrottler:
         cache_key = f'{alert_type}:{ip}'
         now = time.time()
         
-        # Check memory cache first (fastest)
-        if cache_key in self.memory_cache:
-            last_alert_time = self.memory_cache[cache_key]
-            if now - last_alert_time < min_interval_seconds:
-                return False
+        # Memory cache answers every call after the first one for a key;
+        # the database is only consulted to warm a key after a restart
+        last_alert_time = self.memory_cache.get(cache_key)
+        if last_alert_time is None:
+            last_alert_time = self._last_alert_time(alert_type, ip)
         
-        # Update memory cache
-        self.memory_cache[cache_key] = now
+        if last_alert_time is not None and now - last_alert_time < min_interval_seconds:
+            self.memory_cache[cache_key] = last_alert_time
+            return False
         
-        # Store in database for persistence
+        self.memory_cache[cache_key] = now
+        return True
+    
+    def _last_alert_time(self, alert_type: str, ip: Optional[str]) -> Optional[float]:
+        """Get the unix time of the last persisted alert for a type/IP"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self._conn().cursor()
             
             cursor.execute('''
                 SELECT created_at FROM alert_history 
@@ -335,61 +492,70 @@ class AlertThrottler:
             ''', (alert_type, ip))
             
             result = cursor.fetchone()
-            conn.close()
-            
             if result:
-                last_time = datetime.fromisoformat(result[0])
-                if datetime.now() - last_time < timedelta(seconds=min_interval_seconds):
-                    return False
+                # CURRENT_TIMESTAMP is stored in UTC
+                last_time = datetime.fromisoformat(result[0]).replace(tzinfo=timezone.utc)
+                return last_time.timestamp()
         except Exception as e:
             logger.error(f'Throttle check error: {e}')
-        
-        return True
+        return None
     
     def log_alert(self, alert_type: str, severity: str, message: str, ip: Optional[str] = None, sent: bool = True):
-        """Log alert to database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO alert_history (alert_type, severity, message, ip, sent)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (alert_type, severity, message, ip, sent))
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f'Failed to log alert: {e}')
+        """Queue alert for the history table, writing in batches"""
+        self._pending.append((alert_type, severity, message, ip, sent))
+        if (len(self._pending) >= self.FLUSH_BATCH_SIZE
+                or time.monotonic() - self._last_flush > self.FLUSH_INTERVAL_SECONDS):
+            self.flush()
+        elif not self._flush_wakeup.is_set():
+            self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Wake the flusher so buffered rows reach the database within FLUSH_INTERVAL_SECONDS"""
+        if self._flusher is None:
+            with self._flusher_lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name='alert-history-flusher', daemon=True)
+                    self._flusher.start()
+        self._flush_wakeup.set()
+    
+    def _flush_loop(self):
+        """Write buffered rows FLUSH_INTERVAL_SECONDS after the first one arrives"""
+        while True:
+            self._flush_wakeup.wait()
+            time.sleep(self.FLUSH_INTERVAL_SECONDS)
+            # Cleared before flushing, so rows queued from here on wake the next round
+            self._flush_wakeup.clear()
+            self.flush()
+    
+    def flush(self):
+        """Write all queued alerts in a single transaction"""
+        with self._flush_lock:
+            rows = []
+            while self._pending:
+                rows.append(self._pending.popleft())
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            
+            conn = self._conn()
+            try:
+                conn.execute('BEGIN')
+                conn.executemany('''
+                    INSERT INTO alert_history (alert_type, severity, message, ip, sent)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+                conn.execute('COMMIT')
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                logger.error(f'Failed to log {len(rows)} alert(s): {e}')
     
     def get_recent_alerts(self, limit: int = 50) -> List[Dict]:
         """Get recent alerts from history"""
+        self.flush()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, alert_type, ip, severity, message, sent, created_at
-                FROM alert_history
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            return [
-                {
-                    'id': row[0],
-                    'type': row[1],
-                    'ip': row[2],
-                    'severity': row[3],
-                    'message': row[4],
-                    'sent': bool(row[5]),
-                    'timestamp': row[6]
-                }
-                for row in rows
-            ]
+            rows = self._conn().execute(self._STMT_RECENT, (limit,))
+            return [dict(row, sent=bool(row['sent'])) for row in rows]
         except Exception as e:
             logger.error(f'Failed to get alerts: {e}')
             return []
@@ -398,15 +564,32 @@ class AlertThrottler:
 class AlertManager:
     """Main alert manager coordinating all alert channels"""
     
+    SEND_TIMEOUT_SECONDS = 15  # Max time send_alert waits on channel delivery
+    
     def __init__(self, db_path: str = 'logs/honeypot.db', config_file: str = 'config/alert_config.json'):
         self.config = AlertConfig(config_file)
         self.throttler = AlertThrottler(db_path)
-        self.email = EmailAlert(self.config)
-        self.discord = DiscordAlert(self.config)
-        self.telegram = TelegramAlert(self.config)
+        # One worker per channel so SMTP and webhook round-trips overlap
+        self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix='alerts')
+        # Never block interpreter exit on a hung SMTP or webhook delivery
+        atexit.register(functools.partial(self._pool.shutdown, wait=False, cancel_futures=True))
+    
+    # Channels are built on first use, so ones that stay disabled are never constructed
+    @functools.cached_property
+    def email(self) -> EmailAlert:
+        return EmailAlert(self.config)
+    
+    @functools.cached_property
+    def discord(self) -> DiscordAlert:
+        return DiscordAlert(self.config)
+    
+    @functools.cached_property
+    def telegram(self) -> TelegramAlert:
+        return TelegramAlert(self.config)
     
     def send_alert(self, alert_type: str, severity: str, title: str, message: str, 
-                   ip: Optional[str] = None, fields: Optional[List[Dict]] = None) -> bool:
+                   ip: Optional[str] = None, fields: Optional[List[Dict]] = None,
+                   now: Optional[datetime] = None) -> bool:
         """Send alert through all configured channels"""
         if not self.config.get('enabled'):
             return False
@@ -417,32 +600,33 @@ class AlertManager:
             return False
         
         # Check throttling
-        min_interval_val = self.config.get('throttle.min_interval_seconds', 300)
-        min_interval = int(min_interval_val) if isinstance(min_interval_val, (int, str)) else 300
+        min_interval = self.config.get('throttle.min_interval_seconds', 300)
         if not self.throttler.should_alert(alert_type, ip, min_interval):
             logger.debug(f'Alert throttled: {alert_type} for {ip}')
             self.throttler.log_alert(alert_type, severity, message, ip, sent=False)
             return False
         
-        # Send through all enabled channels
-        sent = False
+        # Send through all enabled channels concurrently, stamped with one shared time
+        now = now or _now()
+        futures = []
         
         # Email alert
         if self.config.get('email.enabled'):
             html_message = self._build_html_message(title, message, fields)
-            if self.email.send(title, message, html_message):
-                sent = True
+            futures.append(self._pool.submit(self.email.send, title, message, html_message))
         
         # Discord alert
         if self.config.get('discord.enabled'):
             color = self._get_color_for_severity(severity)
-            if self.discord.send(title, message, color, fields):
-                sent = True
+            futures.append(self._pool.submit(self.discord.send, title, message, color, fields, now))
         
         # Telegram alert
         if self.config.get('telegram.enabled'):
-            if self.telegram.send(title, message, fields):
-                sent = True
+            futures.append(self._pool.submit(self.telegram.send, title, message, fields, now))
+        
+        # Channels still in flight after the timeout finish in the background
+        done, _ = wait(futures, timeout=self.SEND_TIMEOUT_SECONDS)
+        sent = any(f.result() for f in done)
         
         # Log to database
         self.throttler.log_alert(alert_type, severity, message, ip, sent=sent)
@@ -451,44 +635,26 @@ class AlertManager:
     
     def _build_html_message(self, title: str, message: str, fields: Optional[List[Dict]] = None) -> str:
         """Build HTML email message"""
-        html = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <h2 style="color: #ff3333;">🚨 {title}</h2>
-                <p>{message}</p>
-        """
+        parts = [_HTML_PRE(title=title, message=message)]
         
         if fields:
-            html += '<table style="border-collapse: collapse;">'
-            for field in fields:
-                html += f"""
-                <tr>
-                    <td style="padding: 8px; border: 1px solid #ddd;"><strong>{field.get('name', 'N/A')}</strong></td>
-                    <td style="padding: 8px; border: 1px solid #ddd;">{field.get('value', 'N/A')}</td>
-                </tr>
-                """
-            html += '</table>'
+            parts.append('<table style="border-collapse: collapse;">')
+            parts.extend(
+                _HTML_ROW(name=field.get('name', 'N/A'), value=field.get('value', 'N/A'))
+                for field in fields
+            )
+            parts.append('</table>')
         
-        html += """
-                <hr>
-                <p style="color: #666; font-size: 12px;">DDoSPot Honeypot Alert System</p>
-            </body>
-        </html>
-        """
-        return html
+        parts.append(_HTML_POST)
+        return ''.join(parts)
     
     def _get_color_for_severity(self, severity: str) -> int:
         """Get Discord embed color for severity"""
-        colors = {
-            'low': 0x3498db,      # Blue
-            'medium': 0xf39c12,   # Orange
-            'high': 0xe74c3c,     # Red
-            'critical': 0xc0392b  # Dark Red
-        }
-        return colors.get(severity.lower(), 0xff3333)
+        return _color_for_severity(severity)
     
     def alert_critical_attack(self, ip: str, severity: str, event_count: int, protocols: List[str]):
         """Send critical attack alert"""
+        now = _now()
         title = f'🚨 Critical Attack Detected: {ip}'
         message = f'A critical DDoS attack has been detected from {ip} with {event_count} events using {", ".join(protocols)} protocol(s).'
         
@@ -497,13 +663,14 @@ class AlertManager:
             {'name': 'Event Count', 'value': str(event_count)},
             {'name': 'Protocols', 'value': ', '.join(protocols)},
             {'name': 'Severity', 'value': severity.upper()},
-            {'name': 'Timestamp', 'value': datetime.now().isoformat()}
+            {'name': 'Timestamp', 'value': now.isoformat()}
         ]
         
-        return self.send_alert('critical_attack', severity, title, message, ip, fields)
+        return self.send_alert('critical_attack', severity, title, message, ip, fields, now)
     
     def alert_ip_blacklisted(self, ip: str, reason: str, severity: str):
         """Send IP blacklist alert"""
+        now = _now()
         title = f'🚫 IP Blacklisted: {ip}'
         message = f'IP address {ip} has been automatically blacklisted due to {reason} attack.'
         
@@ -511,23 +678,24 @@ class AlertManager:
             {'name': 'IP Address', 'value': ip},
             {'name': 'Reason', 'value': reason},
             {'name': 'Severity', 'value': severity.upper()},
-            {'name': 'Timestamp', 'value': datetime.now().isoformat()}
+            {'name': 'Timestamp', 'value': now.isoformat()}
         ]
         
-        return self.send_alert('ip_blacklisted', severity, title, message, ip, fields)
+        return self.send_alert('ip_blacklisted', severity, title, message, ip, fields, now)
     
     def alert_sustained_attack(self, duration_minutes: int, event_count: int):
         """Send sustained attack alert"""
+        now = _now()
         title = f'⚠️ Sustained Attack Ongoing ({duration_minutes}m)'
         message = f'A sustained attack has been ongoing for {duration_minutes} minutes with {event_count} total events detected.'
         
         fields = [
             {'name': 'Duration', 'value': f'{duration_minutes} minutes'},
             {'name': 'Event Count', 'value': str(event_count)},
-            {'name': 'Timestamp', 'value': datetime.now().isoformat()}
+            {'name': 'Timestamp', 'value': now.isoformat()}
         ]
         
-        return self.send_alert('sustained_attack', 'high', title, message, fields=fields)
+        return self.send_alert('sustained_attack', 'high', title, message, fields=fields, now=now)
     
     def get_alert_history(self, limit: int = 50) -> List[Dict]:
         """Get alert history"""
@@ -1,39 +1,191 @@
+import atexit
+import functools
 import json
 import logging
+import os
+import queue
 import threading
-from datetime import datetime
+import time
 from core.config import LOG_FILE
-from telemetry.rotation import rotate_logs, enforce_disk_limit
+from telemetry.rotation import rotate_logs, enforce_disk_limit, add_written_bytes
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    _KEY_SEP, _ITEM_SEP = b":", b","
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    # json.dumps default separators, so lines keep the stdlib format
+    _KEY_SEP, _ITEM_SEP = b": ", b", "
+
+_TS_OPEN = b'{"ts"' + _KEY_SEP + b'"'  # Line start up to the timestamp value
 
 _lock = threading.Lock()
 _loggers = {}
 
+# Event log lines are queued by producers and appended in batches by a single
+# writer thread; when the queue is full (flood), new events are dropped
+_QUEUE_MAXSIZE = 10000
+_BATCH_MAX = 512            # max lines per write
+_BATCH_WINDOW = 0.005       # seconds to keep gathering after the first line
+_ROTATE_EVERY_BATCHES = 16  # rotation / disk limit checks run once per N batches
+
+_queue = queue.Queue(maxsize=_QUEUE_MAXSIZE)
+_writer = None
+dropped_events = 0
+
+# Append-only descriptor kept open by the writer thread, with the (path, inode)
+# it was opened for; reopened when the file is rotated away or LOG_FILE changes
+_fd = None
+_fd_key = None
+_fd_size = 0  # bytes in the open log file, tracked from the writes
+
+# (unix second, b'{"ts":"YYYY-MM-DDTHH:MM:SS') for the most recent event timestamp
+_ts_cache = (None, b"")
+
 def get_logger(name: str):
     """Get or create a logger with the specified name."""
-    if name not in _loggers:
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.INFO)
-        
-        # Console handler
-        handler = logging.StreamHandler()
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        
-        _loggers[name] = logger
+    logger = _loggers.get(name)
+    if logger is not None:
+        return logger
+
+    with _lock:
+        if name not in _loggers:
+            logger = logging.getLogger(name)
+            logger.setLevel(logging.INFO)
+            
+            # Console handler
+            handler = logging.StreamHandler()
+            handler.setLevel(logging.INFO)
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+            
+            _loggers[name] = logger
     return _loggers[name]
 
-def log_event(event_type: str, data: dict):
-    entry = {
-        "ts": datetime.utcnow().isoformat(),
-        "type": event_type,
-        **data
-    }
+def _next_batch():
+    """Block for one queued line, then gather more for up to _BATCH_WINDOW."""
+    batch = [_queue.get()]
+    deadline = time.monotonic() + _BATCH_WINDOW
+    while len(batch) < _BATCH_MAX:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+def _log_fd():
+    """Return the open log descriptor, reopening it if LOG_FILE was rotated."""
+    global _fd, _fd_key, _fd_size
+    try:
+        st = os.stat(LOG_FILE)
+        current = (LOG_FILE, st.st_ino)
+    except FileNotFoundError:
+        current = None
 
+    if _fd is None or current != _fd_key:
+        if _fd is not None:
+            os.close(_fd)
+            _fd = None
+        fd = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        st = os.fstat(fd)
+        _fd, _fd_key, _fd_size = fd, (LOG_FILE, st.st_ino), st.st_size
+    return _fd
+
+def _metrics():
+    # Imported lazily: prometheus_metrics imports this module
+    from telemetry.prometheus_metrics import get_metrics
+    return get_metrics()
+
+def _publish_log_metrics(rotated: bool):
+    """Report the log size the writer already knows, and any rotation, to Prometheus."""
+    try:
+        metrics = _metrics()
+        if rotated:
+            metrics.record_log_rotation("honeypot")
+        metrics.update_log_file_size("honeypot", _fd_size)
+    except Exception:
+        pass  # Metrics are best effort; never stall the event log
+
+def _write_loop():
+    global _fd_size
+    batches = 0
+    while True:
+        batch = _next_batch()
+        try:
+            rotated = False
+            if batches % _ROTATE_EVERY_BATCHES == 0:
+                rotated = rotate_logs(LOG_FILE)
+                enforce_disk_limit(LOG_FILE)
+            batches += 1
+
+            data = b"\n".join(batch) + b"\n"
+            fd = _log_fd()
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            _fd_size += len(data)
+            add_written_bytes(len(data))
+            _publish_log_metrics(rotated)
+        except Exception as e:
+            get_logger(__name__).error(f"Failed to write {len(batch)} log event(s): {e}")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+def _ensure_writer():
+    global _writer
     with _lock:
-        rotate_logs(LOG_FILE)
-        enforce_disk_limit(LOG_FILE)
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="event-log-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush_events)
+
+def flush_events():
+    """Block until every queued event has been written."""
+    if _writer is not None:
+        _queue.join()
+
+def _line_start(now: float) -> bytes:
+    """Encoded '{"ts":"<UTC ISO-8601 with microseconds>', formatting the date part once per second."""
+    global _ts_cache
+    sec = int(now)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = _TS_OPEN + time.strftime('%Y-%m-%dT%H:%M:%S.', time.gmtime(sec)).encode()
+        _ts_cache = (sec, prefix)
+    return prefix + b"%06d" % int((now - sec) * 1_000_000)
+
+@functools.lru_cache(maxsize=64)
+def _header(event_type: str) -> bytes:
+    """JSON fragment following the timestamp, e.g. b'","type":"packet"'."""
+    return b'"' + _ITEM_SEP + b'"type"' + _KEY_SEP + _dumps(event_type)
+
+def log_event(event_type: str, data: dict):
+    global dropped_events
+    start = _line_start(time.time())
+
+    if "ts" in data or "type" in data:
+        # data overrides the header fields, as with the original dict merge
+        line = _dumps({"ts": start[len(_TS_OPEN):].decode(), "type": event_type, **data})
+    elif data:
+        line = start + _header(event_type) + _ITEM_SEP + _dumps(data)[1:]
+    else:
+        line = start + _header(event_type) + b"}"
+
+    if _writer is None:
+        _ensure_writer()
 
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+    try:
+        _queue.put_nowait(line)
+    except queue.Full:
+        dropped_events += 1
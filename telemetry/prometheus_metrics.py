@@ -5,15 +5,37 @@ Exposes comprehensive metrics for monitoring attack patterns, service health, an
 
 from prometheus_client import Counter, Gauge, Histogram, Info, generate_latest, CollectorRegistry
 import time
+import threading
 import psutil
 import os
-from pathlib import Path
+import weakref
+from collections import defaultdict
 from typing import Optional
 
+from telemetry.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Label values outside these sets are reported as "other" so attacker-controlled
+# input cannot create unbounded series
+_ALLOWED_EVENT_TYPES = frozenset({
+    'connection', 'packet', 'http_request', 'tcp_data', 'udp_data', 'timeout', 'attack',
+})
+_ALLOWED_HTTP_METHODS = frozenset({
+    'GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS',
+})
+
+# Protocols the honeypot listeners report; their recorders are built up front
+_KNOWN_PROTOCOLS = ('tcp', 'udp')
+
 
 class PrometheusMetrics:
     """Centralized Prometheus metrics for DDoSPoT"""
     
+    FLUSH_INTERVAL_SECONDS = 0.1  # Max age of locally accumulated attack counts
+    SAMPLE_INTERVAL_SECONDS = 5.0  # System gauge refresh period (off the scrape path)
+    SNAPSHOT_TTL_SECONDS = 1.0     # Scrapes within this window share one rendered output
+    
     def __init__(self, registry: Optional[CollectorRegistry] = None):
         """Initialize all Prometheus metrics with optional custom registry"""
         self.registry = registry or CollectorRegistry()
@@ -164,7 +186,7 @@ class PrometheusMetrics:
         self.alerts_failed_total = Counter(
             'ddospot_alerts_failed_total',
             'Failed alert deliveries',
-            ['channel', 'reason'],
+            ['channel'],
             registry=self.registry
         )
         
@@ -196,11 +218,105 @@ class PrometheusMetrics:
         
         # Track start time for uptime calculation
         self.start_time = time.time()
+        
+        # Attack events are accumulated here and applied to the counters in batches
+        self._pending_lock = threading.Lock()
+        self._pending_events = defaultdict(int)  # (protocol, event_type) -> count
+        self._pending_bytes = defaultdict(int)   # protocol -> bytes
+        self._last_flush = time.monotonic()
+        
+        # Per-protocol record(event_type, payload_size) callables
+        self._recorders = {}
+        for protocol in _KNOWN_PROTOCOLS:
+            self.recorder_for(protocol)
+        
+        # Labelled children memoized by (metric, label values); label values
+        # are bounded, so this stays small
+        self._children = {}
+        
+        # (monotonic time, bytes) of the last rendered exposition
+        self._snapshot = (None, b'')
+        
+        # System gauges are sampled in the background
+        self._sampler_stop = threading.Event()
+        self._start_sampler()
+    
+    def _start_sampler(self):
+        """Refresh system gauges every SAMPLE_INTERVAL_SECONDS"""
+        psutil.cpu_percent(interval=None)  # Seed the CPU delta baseline
+        self.update_system_metrics()
+        
+        # Weak reference so a discarded instance (reset_metrics) lets its thread exit
+        ref = weakref.ref(self)
+        stop = self._sampler_stop
+        interval = self.SAMPLE_INTERVAL_SECONDS
+        
+        def run():
+            while not stop.wait(interval):
+                metrics = ref()
+                if metrics is None:
+                    return
+                metrics.update_system_metrics()
+                del metrics
+        
+        threading.Thread(target=run, name='metrics-sampler', daemon=True).start()
+    
+    def stop_sampler(self):
+        """Stop the background gauge sampler"""
+        self._sampler_stop.set()
     
     def record_attack_event(self, protocol: str, event_type: str, payload_size: int):
         """Record an attack event"""
-        self.attack_events_total.labels(protocol=protocol, event_type=event_type).inc()
-        self.attack_bytes_total.labels(protocol=protocol).inc(payload_size)
+        recorder = self._recorders.get(protocol) or self.recorder_for(protocol)
+        recorder(event_type, payload_size)
+    
+    def recorder_for(self, protocol: str):
+        """Get the memoized record(event_type, payload_size) callable for protocol"""
+        recorder = self._recorders.get(protocol)
+        if recorder is None:
+            recorder = self._recorders[protocol] = self._make_recorder(protocol)
+        return recorder
+    
+    def _make_recorder(self, protocol: str):
+        """Build a recorder with the protocol's pending-count keys precomputed"""
+        keys = {event_type: (protocol, event_type) for event_type in _ALLOWED_EVENT_TYPES}
+        other = (protocol, 'other')
+        lock = self._pending_lock
+        monotonic = time.monotonic
+        
+        def record(event_type: str, payload_size: int):
+            key = keys.get(event_type, other)
+            with lock:
+                self._pending_events[key] += 1
+                if payload_size:  # Zero-byte events (e.g. bare connects) add nothing
+                    self._pending_bytes[protocol] += payload_size
+                due = monotonic() - self._last_flush >= self.FLUSH_INTERVAL_SECONDS
+            if due:
+                self.flush_attack_events()
+        
+        return record
+    
+    def flush_attack_events(self):
+        """Apply accumulated attack counts to the Prometheus counters"""
+        with self._pending_lock:
+            events, self._pending_events = self._pending_events, defaultdict(int)
+            sizes, self._pending_bytes = self._pending_bytes, defaultdict(int)
+            self._last_flush = time.monotonic()
+        
+        for key, count in events.items():
+            self._labels(self.attack_events_total, *key).inc(count)
+        
+        for protocol, size in sizes.items():
+            if size:
+                self._labels(self.attack_bytes_total, protocol).inc(size)
+    
+    def _labels(self, metric, *values):
+        """Get the child of metric for positional label values, memoized"""
+        key = (metric, values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = metric.labels(*values)
+        return child
     
     def update_database_metrics(self, size_bytes: int, event_count: int, profile_count: int):
         """Update database-related metrics"""
@@ -210,17 +326,17 @@ class PrometheusMetrics:
     
     def update_service_status(self, service: str, running: bool):
         """Update service status (1=running, 0=stopped)"""
-        self.service_status.labels(service=service).set(1 if running else 0)
+        self._labels(self.service_status, service).set(1 if running else 0)
     
     def update_service_uptime(self, service: str, uptime_seconds: float):
         """Update service uptime"""
-        self.service_uptime_seconds.labels(service=service).set(uptime_seconds)
+        self._labels(self.service_uptime_seconds, service).set(uptime_seconds)
     
     def update_system_metrics(self):
         """Update system resource metrics"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            # CPU usage since the previous sample (non-blocking)
+            cpu_percent = psutil.cpu_percent(interval=None)
             self.cpu_usage_percent.set(cpu_percent)
             
             # Memory usage
@@ -233,29 +349,29 @@ class PrometheusMetrics:
         except Exception:
             pass
     
-    def update_log_metrics(self):
-        """Update log file metrics"""
-        logs = [
-            ("honeypot", Path("/tmp/honeypot.log")),
-            ("dashboard", Path("/tmp/dashboard.log"))
-        ]
-        
-        for log_type, log_path in logs:
-            if log_path.exists():
-                size = log_path.stat().st_size
-                self.log_file_size_bytes.labels(log_type=log_type).set(size)
+    def update_log_file_size(self, log_type: str, size_bytes: int):
+        """Update log file size (reported by the log writer)"""
+        self._labels(self.log_file_size_bytes, log_type).set(size_bytes)
     
     def record_http_request(self, method: str, endpoint: str, status: int, duration: float):
         """Record HTTP request metrics"""
-        self.http_requests_total.labels(method=method, endpoint=endpoint, status=str(status)).inc()
-        self.http_request_duration_seconds.labels(method=method, endpoint=endpoint).observe(duration)
+        # endpoint is the Flask endpoint name (bounded by the route table);
+        # method and status are folded into fixed buckets
+        if method not in _ALLOWED_HTTP_METHODS:
+            method = 'other'
+        status = f'{status // 100}xx'
+        self._labels(self.http_requests_total, method, endpoint, status).inc()
+        self._labels(self.http_request_duration_seconds, method, endpoint).observe(duration)
     
     def record_alert(self, channel: str, severity: str, success: bool, reason: str = ""):
         """Record alert metrics"""
         if success:
-            self.alerts_sent_total.labels(channel=channel, severity=severity).inc()
+            self._labels(self.alerts_sent_total, channel, severity).inc()
         else:
-            self.alerts_failed_total.labels(channel=channel, reason=reason).inc()
+            # Free-form failure reasons go to the log, not into a label
+            self._labels(self.alerts_failed_total, channel).inc()
+            if reason:
+                logger.warning(f'Alert delivery via {channel} failed: {reason}')
     
     def record_geolocation_lookup(self, cache_hit: bool):
         """Record geolocation cache metrics"""
@@ -266,16 +382,24 @@ class PrometheusMetrics:
     
     def record_ml_prediction(self, prediction: str, duration: float):
         """Record ML prediction metrics"""
-        self.ml_predictions_total.labels(prediction=prediction).inc()
+        self._labels(self.ml_predictions_total, prediction).inc()
         self.ml_prediction_duration_seconds.observe(duration)
     
     def record_log_rotation(self, log_type: str):
         """Record log rotation event"""
-        self.log_rotations_total.labels(log_type=log_type).inc()
+        self._labels(self.log_rotations_total, log_type).inc()
     
     def get_metrics(self) -> bytes:
         """Generate Prometheus metrics output"""
-        return generate_latest(self.registry)
+        now = time.monotonic()
+        rendered_at, output = self._snapshot
+        if rendered_at is not None and now - rendered_at < self.SNAPSHOT_TTL_SECONDS:
+            return output
+        
+        self.flush_attack_events()
+        output = generate_latest(self.registry)
+        self._snapshot = (now, output)
+        return output
 
 
 # Global metrics instance
@@ -293,4 +417,6 @@ def get_metrics() -> PrometheusMetrics:
 def reset_metrics():
     """Reset metrics instance (useful for testing)"""
     global _metrics_instance
+    if _metrics_instance is not None:
+        _metrics_instance.stop_sampler()
     _metrics_instance = None
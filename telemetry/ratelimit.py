@@ -1,8 +1,12 @@
+import threading
 import time
-from collections import defaultdict, deque
+from collections import OrderedDict, deque
 
 
 class RateLimiter:
+    LOCK_STRIPES = 64           # power of two; IPs hash onto independent locks
+    MAX_BLACKLIST = 100_000     # oldest entries are evicted beyond this (spoofed floods)
+
     def __init__(
         self,
         max_events: int = 20,
@@ -13,44 +17,64 @@ class RateLimiter:
         self.window = window_seconds
         self.blacklist_seconds = blacklist_seconds
 
-        self.events = defaultdict(lambda: deque())
-        self.blacklist = {}
+        # Per-IP ring of the last max_events + 1 timestamps; older ones fall off
+        # the left in C, so no trimming loop and memory per IP stays bounded.
+        # A plain dict: rings are only created by register_event for allowed IPs
+        self.events = {}
+        self.blacklist = OrderedDict()
+        self._stripes = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
 
-    def is_blacklisted(self, ip: str) -> bool:
+    def _stripe(self, ip: str) -> threading.Lock:
+        return self._stripes[hash(ip) & (self.LOCK_STRIPES - 1)]
+
+    def _is_blacklisted(self, ip: str, now: float) -> bool:
+        # Caller holds the IP's stripe
         until = self.blacklist.get(ip)
         if not until:
             return False
 
-        if time.time() > until:
-            del self.blacklist[ip]
+        if now > until:
+            self.blacklist.pop(ip, None)
             return False
 
         return True
 
+    def is_blacklisted(self, ip: str) -> bool:
+        with self._stripe(ip):
+            return self._is_blacklisted(ip, time.time())
+
     def register_event(self, ip: str) -> bool:
         """
         Returns True if allowed, False if rate-limited / blacklisted
         """
         now = time.time()
 
-        q = self.events[ip]
-        # Always allow the first event for a new IP
-        if len(q) == 0:
-            q.append(now)
-            return True
-        
-        # Blacklist check after first event allowance
-        if self.is_blacklisted(ip):
-            return False
-        
-        q.append(now)
+        with self._stripe(ip):
+            # Banned IPs are turned away before any per-IP history is touched
+            if self._is_blacklisted(ip, now):
+                return False
 
-        while q and now - q[0] > self.window:
-            q.popleft()
+            q = self.events.get(ip)
+            if q is None:
+                self.events[ip] = deque((now,), maxlen=self.max_events + 1)
+                return True
 
-        if len(q) > self.max_events:
-            self.blacklist[ip] = now + self.blacklist_seconds
-            self.events[ip].clear()
-            return False
+            q.append(now)
+
+            # Over the limit exactly when the oldest retained timestamp is still in the window
+            if len(q) == q.maxlen and now - q[0] <= self.window:
+                self.blacklist[ip] = now + self.blacklist_seconds
+                self.blacklist.move_to_end(ip)
+                del self.events[ip]
+                self._evict_blacklist()
+                return False
 
         return True
+
+    def _evict_blacklist(self):
+        # Insertion order approximates age, so the oldest bans go first
+        while len(self.blacklist) > self.MAX_BLACKLIST:
+            try:
+                self.blacklist.popitem(last=False)
+            except KeyError:
+                break
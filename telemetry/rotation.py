@@ -1,37 +1,69 @@
+import glob
 import os
+import time
 from core.config import MAX_LOG_SIZE_MB, MAX_LOG_FILES, DISK_USAGE_LIMIT_MB
 
+# Directory size is rescanned at most every _CACHE_TTL seconds; in between,
+# bytes reported by the log writer keep the cached total roughly current
+_CACHE_TTL = 10.0
+_cached_size_mb = 0.0
+_cached_at = None
+
 def get_dir_size_mb(path="."):
     total = 0
-    for root, _, files in os.walk(path):
-        for f in files:
-            fp = os.path.join(root, f)
-            if os.path.isfile(fp):
-                total += os.path.getsize(fp)
+    pending = [path]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
     return total / (1024 * 1024)
 
-def rotate_logs(log_file: str):
+def add_written_bytes(count: int):
+    global _cached_size_mb
+    _cached_size_mb += count / (1024 * 1024)
+
+def _backups(log_file: str):
+    """Rotated copies of log_file, oldest first (suffix is time.time_ns())."""
+    backups = []
+    for path in glob.glob(f"{glob.escape(log_file)}.*"):
+        suffix = path[len(log_file) + 1:]
+        if suffix.isdigit():
+            backups.append((int(suffix), path))
+    backups.sort()
+    return [path for _, path in backups]
+
+def rotate_logs(log_file: str) -> bool:
+    """Rotate log_file once it reaches MAX_LOG_SIZE_MB; returns True if it was rotated."""
     if not os.path.exists(log_file):
-        return
+        return False
 
     size_mb = os.path.getsize(log_file) / (1024 * 1024)
     if size_mb < MAX_LOG_SIZE_MB:
-        return
+        return False
 
-    for i in range(MAX_LOG_FILES - 1, 0, -1):
-        src = f"{log_file}.{i}"
-        dst = f"{log_file}.{i+1}"
-        if os.path.exists(src):
-            os.rename(src, dst)
+    os.rename(log_file, f"{log_file}.{time.time_ns()}")
 
-    os.rename(log_file, f"{log_file}.1")
+    backups = _backups(log_file)
+    for path in backups[:-MAX_LOG_FILES]:
+        os.remove(path)
+    return True
 
 def enforce_disk_limit(log_file: str):
-    if get_dir_size_mb(".") < DISK_USAGE_LIMIT_MB:
+    global _cached_size_mb, _cached_at
+    now = time.monotonic()
+    if _cached_at is None or now - _cached_at >= _CACHE_TTL:
+        _cached_size_mb = get_dir_size_mb(".")
+        _cached_at = now
+
+    if _cached_size_mb < DISK_USAGE_LIMIT_MB:
         return
 
-    for i in range(MAX_LOG_FILES, 0, -1):
-        f = f"{log_file}.{i}"
-        if os.path.exists(f):
-            os.remove(f)
-            return
+    # Rescan on the next call once a backup has been removed
+    _cached_at = None
+
+    backups = _backups(log_file)
+    if backups:
+        os.remove(backups[0])
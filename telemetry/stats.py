@@ -1,16 +1,48 @@
-from collections import defaultdict
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
 import time
 
+# Longest window ip_rate() answers exactly; older timestamps are trimmed
+MAX_WINDOW = 300
+# Most IPs tracked at once; the least recently seen IP is dropped beyond this
+MAX_TRACKED_IPS = 65536
+
+
+class _LRUDict(OrderedDict):
+    """OrderedDict that evicts its least recently used key past a capacity."""
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.capacity = capacity
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+
+
 _service_counter = defaultdict(int)
-_ip_timestamps = defaultdict(list)
+_ip_timestamps = _LRUDict(MAX_TRACKED_IPS)  # per IP, ascending monotonic times
 
 def record(service: str, ip: str):
     _service_counter[service] += 1
-    _ip_timestamps[ip].append(time.time())
+    now = time.monotonic()
+    ts = _ip_timestamps.get(ip)
+    if ts is None:
+        ts = _ip_timestamps[ip] = []
+    else:
+        _ip_timestamps.move_to_end(ip)
+    ts.append(now)
+    # Trim once the oldest entry is two windows old, so the prefix delete
+    # runs at most once per MAX_WINDOW per IP
+    if ts[0] < now - 2 * MAX_WINDOW:
+        del ts[:bisect_right(ts, now - MAX_WINDOW)]
 
 def service_stats():
     return dict(_service_counter)
 
 def ip_rate(ip: str, window: int = 60):
-    now = time.time()
-    return len([t for t in _ip_timestamps[ip] if now - t < window])
+    ts = _ip_timestamps.get(ip)
+    if not ts:
+        return 0
+    return len(ts) - bisect_right(ts, time.monotonic() - window)
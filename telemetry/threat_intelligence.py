@@ -3,146 +3,373 @@ Threat Intelligence Module
 Provides IP reputation scoring, WHOIS lookups, threat feeds, and botnet detection
 """
 
+import atexit
 import socket
+import ipaddress
 import json
 import time
 import logging
-from typing import Dict, Optional, List, Tuple, Any
+from typing import Dict, Optional, List, Sequence, Tuple, Any
 from datetime import datetime, timedelta
-from collections import defaultdict
+from types import MappingProxyType
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import heapq
+import itertools
 import threading
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Lookup tables below are read-only views; edit the literals, not the tables at runtime
+
 # Known threat feeds and blocklists
-KNOWN_THREAT_IPS = {
+KNOWN_THREAT_IPS = MappingProxyType({
     # Botnet C&C servers (example)
-    '192.168.1.100': {'name': 'Mirai C&C', 'confidence': 0.95},
-    '10.0.0.1': {'name': 'DDoS Botnet', 'confidence': 0.90},
-}
+    '192.168.1.100': MappingProxyType({'name': 'Mirai C&C', 'confidence': 0.95}),
+    '10.0.0.1': MappingProxyType({'name': 'DDoS Botnet', 'confidence': 0.90}),
+})
 
 # Known malicious ASNs (examples)
-MALICIOUS_ASNS = {
-    'AS16509': {'name': 'AWS (abuse common)', 'threat_level': 'low'},
-    'AS15169': {'name': 'Google (abuse possible)', 'threat_level': 'low'},
-}
+MALICIOUS_ASNS = MappingProxyType({
+    'AS16509': MappingProxyType({'name': 'AWS (abuse common)', 'threat_level': 'low'}),
+    'AS15169': MappingProxyType({'name': 'Google (abuse possible)', 'threat_level': 'low'}),
+})
 
 # Country threat levels
-COUNTRY_THREAT_LEVELS = {
+COUNTRY_THREAT_LEVELS = MappingProxyType({
     'KP': 'critical',  # North Korea
     'IR': 'high',      # Iran
     'SY': 'high',      # Syria
     'CU': 'medium',    # Cuba
-}
+})
+
+# Reputation score ladders: a value strictly above THRESHOLDS[i - 1] (and not
+# above THRESHOLDS[i]) earns POINTS[i]
+_VOLUME_THRESHOLDS, _VOLUME_POINTS = (10, 100, 1000), (5, 20, 30, 40)
+_DIVERSITY_THRESHOLDS, _DIVERSITY_POINTS = (1, 3, 5), (0, 10, 15, 20)
+_RATE_THRESHOLDS, _RATE_POINTS = (1, 10, 100), (0, 10, 15, 20)
+_COUNTRY_POINTS = MappingProxyType({'critical': 5, 'high': 3})
+
+# Array copies of the ladders for IPReputationScorer.calculate_scores_batch
+_VOLUME_LADDER = (np.array(_VOLUME_THRESHOLDS), np.array(_VOLUME_POINTS))
+_DIVERSITY_LADDER = (np.array(_DIVERSITY_THRESHOLDS), np.array(_DIVERSITY_POINTS))
+_RATE_LADDER = (np.array(_RATE_THRESHOLDS), np.array(_RATE_POINTS))
+
+# Display bands for a 0-100 reputation score (a band starts at its threshold),
+# expanded into per-score tables so in-range lookups are a single index
+_SCORE_BAND_THRESHOLDS = (20, 40, 60, 80)
+_THREAT_LEVELS = ('minimal', 'low', 'medium', 'high', 'critical')
+_SCORE_COLORS = ('#4caf50', '#8bc34a', '#ffc107', '#ff9800', '#f44336')  # Green .. Red
+_LEVEL_TABLE = tuple(_THREAT_LEVELS[bisect_right(_SCORE_BAND_THRESHOLDS, s)] for s in range(101))
+_COLOR_TABLE = tuple(_SCORE_COLORS[bisect_right(_SCORE_BAND_THRESHOLDS, s)] for s in range(101))
+
+def _parse_ip(ip: str) -> Optional[Tuple[int, int]]:
+    """(IP version, address as int), or None if ip is not an IP address"""
+    # inet_pton is strict (no '127.1' shorthands) and far cheaper than ipaddress
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError, ValueError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except (OSError, TypeError, ValueError):
+        return None
+
+_IPV6_FLAG = 1 << 128
+
+def _ip_key(ip: str):
+    """Compact cache key for an IP: an int (IPv6 offset past the IPv4 range), else the string"""
+    parsed = _parse_ip(ip)
+    if parsed is None:
+        return ip
+    version, value = parsed
+    return value if version == 4 else value | _IPV6_FLAG
+
+# (unix second, local ISO-8601 timestamp) for the most recent _now_iso() call
+_iso_cache = (None, '')
+
+def _now_iso() -> str:
+    """Local ISO-8601 timestamp at second resolution, formatted once per second"""
+    global _iso_cache
+    sec = int(time.time())
+    cached_sec, stamp = _iso_cache
+    if sec != cached_sec:
+        stamp = datetime.fromtimestamp(sec).isoformat()
+        _iso_cache = (sec, stamp)
+    return stamp
+
+# Shared result for lookups that find nothing, so misses allocate no list
+_EMPTY = ()
+
+# Simplified first-octet heuristics: (exclusive upper bound, value) ranges
+_ASN_RANGES = ((10, 'AS16509'), (50, 'AS15169'), (100, 'AS8452'), (150, 'AS3352'), (256, 'AS3741'))
+_COUNTRY_RANGES = ((10, 'US'), (20, 'GB'), (50, 'DE'), (100, 'EG'), (150, 'ES'), (256, 'RU'))
+_ASN_ORGS = MappingProxyType({
+    'AS16509': 'Amazon Web Services',
+    'AS15169': 'Google LLC',
+    'AS8452': 'TeData',
+    'AS3352': 'Telefonica',
+    'AS3741': 'Saturn Naptali',
+    'AS0': 'Unknown'
+})
+
+def _in_range(ranges, octet: int) -> str:
+    return next(value for bound, value in ranges if octet < bound)
+
+# (ASN, organization, country) for every first octet, built once at import
+_FIRST_OCTET_TABLE = tuple(
+    (_in_range(_ASN_RANGES, octet), _ASN_ORGS[_in_range(_ASN_RANGES, octet)], _in_range(_COUNTRY_RANGES, octet))
+    for octet in range(256)
+)
+_UNKNOWN_NETWORK = ('AS0', _ASN_ORGS['AS0'], 'XX')
+
+_MISS = object()
+
+
+class _CacheShard:
+    """
+    One segment of a sharded TTL + LRU cache. Reads and claims are lock-free,
+    relying on single dict / OrderedDict operations being atomic; the lock
+    only guards put(), whose eviction and expiry heap span several operations
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # key -> (expires_at, value), least recently used first
+        self.entries = OrderedDict()
+        # (expires_at, seq, key) min-heap used to drop expired entries early
+        self.expiry = []
+        self.seq = itertools.count()
+        # key -> Future for a value some caller is currently computing
+        self.inflight = {}
+        self.lock = threading.Lock()
+    
+    def get(self, key, now: float):
+        """Live value for key, or _MISS (expired entries are left for put() to prune)"""
+        entry = self.entries.get(key)
+        if entry is None or now >= entry[0]:
+            return _MISS
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            pass  # Evicted by a concurrent put(); the value read is still good
+        return entry[1]
+    
+    def get_or_claim(self, key, now: float):
+        """
+        (value, None, False) for a live entry, else (_MISS, future, owner);
+        owner means this caller claimed the key and must release() it
+        """
+        value = self.get(key, now)
+        if value is not _MISS:
+            return value, None, False
+        
+        # setdefault installs the claim atomically; losers get the winner's Future
+        claim = Future()
+        pending = self.inflight.setdefault(key, claim)
+        if pending is not claim:
+            return _MISS, pending, False
+        
+        # A previous owner may have stored and released between the miss and the claim
+        value = self.get(key, now)
+        if value is not _MISS:
+            self.release(key, claim, value)
+            return value, None, False
+        return _MISS, claim, True
+    
+    def release(self, key, future: Future, value):
+        """Drop a claim taken by get_or_claim and hand value to its waiters"""
+        # Only the owner removes its claim, and nobody replaces an installed one
+        self.inflight.pop(key, None)
+        future.set_result(value)
+    
+    def put(self, key, value, now: float, ttl: float):
+        """Cache value, pruning expired and least recently used entries"""
+        expires_at = now + ttl
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            heapq.heappush(self.expiry, (expires_at, next(self.seq), key))
+            
+            while self.expiry and self.expiry[0][0] <= now:
+                expired_at, _, old_key = heapq.heappop(self.expiry)
+                entry = self.entries.get(old_key)
+                if entry is not None and entry[0] == expired_at:
+                    del self.entries[old_key]
+            
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+            
+            # Refreshed and evicted keys leave stale heap entries; rebuild before they pile up
+            if len(self.expiry) > 2 * self.capacity:
+                # list() snapshots in one call, so lock-free readers' move_to_end can't interleave
+                self.expiry = [(entry[0], next(self.seq), k) for k, entry in list(self.entries.items())]
+                heapq.heapify(self.expiry)
+
+
+class _ShardedCache:
+    """TTL + LRU cache split into independent shards by key hash"""
+    
+    SHARDS = 16  # power of two
+    
+    def __init__(self, capacity: int):
+        per_shard = max(1, -(-capacity // self.SHARDS))
+        self._shards = [_CacheShard(per_shard) for _ in range(self.SHARDS)]
+    
+    def _shard(self, key) -> _CacheShard:
+        return self._shards[hash(key) & (self.SHARDS - 1)]
+    
+    def get(self, key, now: float):
+        return self._shard(key).get(key, now)
+    
+    def get_or_claim(self, key, now: float):
+        return self._shard(key).get_or_claim(key, now)
+    
+    def release(self, key, future: Future, value):
+        self._shard(key).release(key, future, value)
+    
+    def put(self, key, value, now: float, ttl: float):
+        self._shard(key).put(key, value, now, ttl)
+    
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
 
 class WHOISLookup:
     """Handle WHOIS lookups for IP information"""
     
+    MAX_CACHE_ENTRIES = 100_000
+    RDNS_WORKERS = 32           # concurrent reverse DNS resolutions
+    RDNS_TIMEOUT_SECONDS = 2.0  # hostnames not resolved by then are reported as "Unknown"
+    INFLIGHT_WAIT_SECONDS = 5.0  # max wait on another caller's lookup of the same IP
+    
     def __init__(self, cache_timeout=86400):
-        self.cache = {}
+        self.cache = _ShardedCache(self.MAX_CACHE_ENTRIES)
         self.cache_timeout = cache_timeout
-        self.lock = threading.Lock()
+        self._rdns_pool = ThreadPoolExecutor(max_workers=self.RDNS_WORKERS, thread_name_prefix='rdns')
+        atexit.register(self._rdns_pool.shutdown, wait=False, cancel_futures=True)
     
-    def lookup(self, ip: str) -> Optional[Dict]:
+    def lookup(self, ip: str, key=None) -> Optional[Dict]:
         """
         Perform WHOIS lookup for an IP address
         Returns cached result if available
+        (key: _ip_key(ip), when the caller already computed it)
         """
-        with self.lock:
-            # Check cache
-            if ip in self.cache:
-                cached_time, cached_data = self.cache[ip]
-                if time.time() - cached_time < self.cache_timeout:
-                    return cached_data
+        if key is None:
+            key = _ip_key(ip)
+        cached, pending, owner = self.cache.get_or_claim(key, time.time())
+        if pending is None:
+            return cached
+        if not owner:
+            return self._await(ip, pending)
+        
+        return self._fetch(ip, key, pending)
+    
+    def lookup_many(self, ips: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Perform WHOIS lookups for several IPs, resolving the reverse DNS
+        of every uncached IP concurrently
+        """
+        now = time.time()
+        results = {}
+        claimed = {}
+        waiting = {}
+        for ip in dict.fromkeys(ips):
+            cached, pending, owner = self.cache.get_or_claim(_ip_key(ip), now)
+            if pending is None:
+                results[ip] = cached
+            elif owner:
+                claimed[ip] = pending
+            else:
+                waiting[ip] = pending
         
-        # Perform lookup
+        if claimed:
+            unreleased = dict(claimed)
+            try:
+                hostnames = self._reverse_dns(list(claimed))
+                for ip, claim in claimed.items():
+                    del unreleased[ip]  # _fetch releases the claim
+                    results[ip] = self._fetch(ip, _ip_key(ip), claim, hostnames[ip])
+            finally:
+                # A failed batch must not strand waiters on claims nobody resolves
+                for ip, claim in unreleased.items():
+                    self.cache.release(_ip_key(ip), claim, None)
+        
+        for ip, pending in waiting.items():
+            results[ip] = self._await(ip, pending)
+        
+        return results
+    
+    def _await(self, ip: str, pending: Future) -> Optional[Dict]:
+        """Result of a lookup another caller is already performing"""
         try:
-            result = self._perform_whois(ip)
+            return pending.result(timeout=self.INFLIGHT_WAIT_SECONDS)
+        except Exception as e:
+            logger.warning(f"WHOIS lookup failed for {ip}: {e}")
+            return None
+    
+    def _fetch(self, ip: str, key, claim: Future, hostname: Optional[str] = None) -> Optional[Dict]:
+        """Perform and cache a claimed lookup, then release it to any waiters"""
+        result = None
+        try:
+            result = self._perform_whois(ip, hostname)
             
             # Cache result
-            with self.lock:
-                self.cache[ip] = (time.time(), result)
+            self.cache.put(key, result, time.time(), self.cache_timeout)
             
             return result
         except Exception as e:
             logger.warning(f"WHOIS lookup failed for {ip}: {e}")
             return None
+        finally:
+            self.cache.release(key, claim, result)
+    
+    def _reverse_dns(self, ips: List[str]) -> Dict[str, str]:
+        """Resolve hostnames on the resolver pool; failures and stragglers map to Unknown"""
+        futures = {self._rdns_pool.submit(socket.gethostbyaddr, ip): ip for ip in ips}
+        done, _ = wait(futures, timeout=self.RDNS_TIMEOUT_SECONDS)
+        
+        hostnames = dict.fromkeys(ips, "Unknown")
+        for future in done:
+            if future.exception() is None:
+                hostnames[futures[future]] = future.result()[0]
+        return hostnames
     
-    def _perform_whois(self, ip: str) -> Dict:
+    def _perform_whois(self, ip: str, hostname: Optional[str] = None) -> Dict:
         """Simulate WHOIS lookup (in production, use real WHOIS service)"""
         try:
-            # Try to resolve reverse DNS
-            try:
-                hostname = socket.gethostbyaddr(ip)[0]
-            except:
-                hostname = "Unknown"
-            
             # Extract ISP/Organization from IP range (simplified)
-            asn = self._estimate_asn(ip)
+            asn, organization, country = self._estimate_network(ip)
+            
+            # Resolve reverse DNS unless the caller already did
+            if hostname is None:
+                hostname = self._reverse_dns([ip])[ip]
             
             return {
                 'ip': ip,
                 'hostname': hostname,
                 'asn': asn,
-                'organization': self._get_org_name(asn),
-                'country': self._get_country_from_ip(ip),
-                'lookup_time': datetime.now().isoformat()
+                'organization': organization,
+                'country': country,
+                'lookup_time': _now_iso()
             }
         except Exception as e:
             logger.error(f"Error in WHOIS lookup: {e}")
             return None  # type: ignore
     
-    def _estimate_asn(self, ip: str) -> str:
-        """Estimate ASN from IP (simplified - real implementation would use GeoIP DB)"""
-        parts = ip.split('.')
-        if len(parts) >= 2:
-            first_octet = int(parts[0])
-            
-            # Simple heuristics for common ASNs
-            if first_octet < 10:
-                return 'AS16509'  # AWS
-            elif first_octet < 50:
-                return 'AS15169'  # Google
-            elif first_octet < 100:
-                return 'AS8452'    # TeData (Egypt)
-            elif first_octet < 150:
-                return 'AS3352'    # Telefonica
-            else:
-                return 'AS3741'    # Saturn Naptali (UK)
-        return 'AS0'
-    
-    def _get_org_name(self, asn: str) -> str:
-        """Get organization name from ASN"""
-        asn_map = {
-            'AS16509': 'Amazon Web Services',
-            'AS15169': 'Google LLC',
-            'AS8452': 'TeData',
-            'AS3352': 'Telefonica',
-            'AS3741': 'Saturn Naptali',
-            'AS0': 'Unknown'
-        }
-        return asn_map.get(asn, 'Unknown ISP')
-    
-    def _get_country_from_ip(self, ip: str) -> str:
-        """Get country code from IP (simplified)"""
-        parts = ip.split('.')
-        if len(parts) >= 2:
-            first_octet = int(parts[0])
-            
-            # Simplified geolocation based on IP ranges
-            if first_octet < 10:
-                return 'US'
-            elif first_octet < 20:
-                return 'GB'
-            elif first_octet < 50:
-                return 'DE'
-            elif first_octet < 100:
-                return 'EG'
-            elif first_octet < 150:
-                return 'ES'
-            else:
-                return 'RU'
-        return 'XX'
+    def _estimate_network(self, ip: str) -> Tuple[str, str, str]:
+        """
+        Estimate (ASN, organization, country) from the first octet
+        (simplified - real implementation would use GeoIP DB)
+        """
+        first, dot, _ = ip.partition('.')
+        if not dot:
+            return _UNKNOWN_NETWORK
+        return _FIRST_OCTET_TABLE[min(max(int(first), 0), 255)]
 
 
 class IPReputationScorer:
@@ -163,62 +390,31 @@ class IPReputationScorer:
         
         Returns: (score: 0-100, factors: dict)
         """
-        factors = {}
-        score = 0
-        
         # Factor 1: Attack volume (0-40 points)
-        attack_count = attack_profile.get('total_events', 0)
-        if attack_count > 1000:
-            factors['attack_volume'] = 40
-        elif attack_count > 100:
-            factors['attack_volume'] = 30
-        elif attack_count > 10:
-            factors['attack_volume'] = 20
-        else:
-            factors['attack_volume'] = 5
-        score += factors['attack_volume']
+        attack_volume = _VOLUME_POINTS[bisect_left(_VOLUME_THRESHOLDS, attack_profile.get('total_events', 0))]
         
         # Factor 2: Attack diversity (0-20 points)
         protocols = len(attack_profile.get('protocols_used', set()))
-        if protocols > 5:
-            factors['attack_diversity'] = 20
-        elif protocols > 3:
-            factors['attack_diversity'] = 15
-        elif protocols > 1:
-            factors['attack_diversity'] = 10
-        else:
-            factors['attack_diversity'] = 0
-        score += factors['attack_diversity']
+        attack_diversity = _DIVERSITY_POINTS[bisect_left(_DIVERSITY_THRESHOLDS, protocols)]
         
         # Factor 3: Attack rate (0-20 points)
         events_per_minute = attack_profile.get('events_per_minute', 0)
-        if events_per_minute > 100:
-            factors['attack_rate'] = 20
-        elif events_per_minute > 10:
-            factors['attack_rate'] = 15
-        elif events_per_minute > 1:
-            factors['attack_rate'] = 10
-        else:
-            factors['attack_rate'] = 0
-        score += factors['attack_rate']
+        attack_rate = _RATE_POINTS[bisect_left(_RATE_THRESHOLDS, events_per_minute)]
         
         # Factor 4: Known threat list (0-15 points)
-        factors['known_threats'] = 0
-        if ip in KNOWN_THREAT_IPS:
-            factors['known_threats'] = 15
-            score += 15
+        known_threats = 15 if ip in KNOWN_THREAT_IPS else 0
         
         # Factor 5: Country reputation (0-5 points)
-        country = attack_profile.get('country', 'XX')
-        threat_level = COUNTRY_THREAT_LEVELS.get(country)
-        if threat_level == 'critical':
-            factors['country_threat'] = 5
-            score += 5
-        elif threat_level == 'high':
-            factors['country_threat'] = 3
-            score += 3
-        else:
-            factors['country_threat'] = 0
+        country_threat = _COUNTRY_POINTS.get(COUNTRY_THREAT_LEVELS.get(attack_profile.get('country', 'XX')), 0)
+        
+        score = attack_volume + attack_diversity + attack_rate + known_threats + country_threat
+        factors = {
+            'attack_volume': attack_volume,
+            'attack_diversity': attack_diversity,
+            'attack_rate': attack_rate,
+            'known_threats': known_threats,
+            'country_threat': country_threat,
+        }
         
         # Ensure score is within bounds
         score = min(100, max(0, score))
@@ -226,31 +422,47 @@ class IPReputationScorer:
         
         return score, factors
     
+    def calculate_scores_batch(self, items: List[Tuple[str, Dict]]) -> List[int]:
+        """
+        Reputation scores for many (ip, attack_profile) pairs at once.
+        Same values as calculate_score, without the per-IP factors breakdown.
+        """
+        count = len(items)
+        if not count:
+            return []
+        
+        volumes = np.fromiter((p.get('total_events', 0) for _, p in items), dtype=np.float64, count=count)
+        protocols = np.fromiter((len(p.get('protocols_used', ())) for _, p in items), dtype=np.int64, count=count)
+        rates = np.fromiter((p.get('events_per_minute', 0) for _, p in items), dtype=np.float64, count=count)
+        # Known-threat and country points are plain dict lookups per IP,
+        # with the tables bound to locals for the per-item loop
+        known, levels, country_points = KNOWN_THREAT_IPS, COUNTRY_THREAT_LEVELS, _COUNTRY_POINTS
+        bonuses = np.fromiter(
+            ((15 if ip in known else 0) + country_points.get(levels.get(p.get('country', 'XX')), 0)
+             for ip, p in items),
+            dtype=np.int64, count=count
+        )
+        
+        scores = bonuses
+        for (thresholds, points), values in ((_VOLUME_LADDER, volumes),
+                                             (_DIVERSITY_LADDER, protocols),
+                                             (_RATE_LADDER, rates)):
+            # side='left' matches bisect_left: a tier needs a value strictly above its threshold
+            scores = scores + points[np.searchsorted(thresholds, values, side='left')]
+        
+        return np.clip(scores, 0, 100).tolist()
+    
     def get_threat_level(self, score: int) -> str:
         """Convert numeric score to threat level"""
-        if score >= 80:
-            return 'critical'
-        elif score >= 60:
-            return 'high'
-        elif score >= 40:
-            return 'medium'
-        elif score >= 20:
-            return 'low'
-        else:
-            return 'minimal'
+        if type(score) is int and 0 <= score <= 100:
+            return _LEVEL_TABLE[score]
+        return _THREAT_LEVELS[bisect_right(_SCORE_BAND_THRESHOLDS, score)]
     
     def get_score_color(self, score: int) -> str:
         """Get color for reputation score display"""
-        if score >= 80:
-            return '#f44336'  # Red
-        elif score >= 60:
-            return '#ff9800'  # Orange
-        elif score >= 40:
-            return '#ffc107'  # Yellow
-        elif score >= 20:
-            return '#8bc34a'  # Light Green
-        else:
-            return '#4caf50'  # Green
+        if type(score) is int and 0 <= score <= 100:
+            return _COLOR_TABLE[score]
+        return _SCORE_COLORS[bisect_right(_SCORE_BAND_THRESHOLDS, score)]
 
 
 class ThreatFeedMatcher:
@@ -258,6 +470,12 @@ class ThreatFeedMatcher:
     
     def __init__(self):
         self.threat_feeds = []
+        # Per IP version: [(prefixlen, {network as int: [feeds]})], longest prefix first
+        self._prefixes = {4: [], 6: []}
+        # Per IP version: (shift, top bits of every indexed network) at the
+        # shortest indexed prefix length; an address whose top bits are absent
+        # cannot be in any feed, so most benign IPs skip the per-length probes
+        self._coarse = {4: (0, frozenset()), 6: (0, frozenset())}
         self._load_threat_feeds()
     
     def _load_threat_feeds(self):
@@ -279,113 +497,218 @@ class ThreatFeedMatcher:
                 'updated': datetime.now()
             }
         ]
+        self.index_feeds()
     
-    def check_ip(self, ip: str) -> List[Dict]:
-        """Check if IP appears in any threat feeds"""
+    def index_feeds(self):
+        """
+        Build the longest-prefix-match index from every feed's 'ips'
+        (single addresses or CIDR blocks); call again after updating a feed
+        """
+        index = {4: defaultdict(dict), 6: defaultdict(dict)}
+        for feed in self.threat_feeds:
+            for entry in feed['ips']:
+                try:
+                    network = ipaddress.ip_network(entry, strict=False)
+                except ValueError:
+                    logger.warning(f"Ignoring invalid entry {entry!r} in feed {feed['name']}")
+                    continue
+                networks = index[network.version][network.prefixlen]
+                networks.setdefault(int(network.network_address), []).append(feed)
+        
+        self._prefixes = {
+            version: sorted(by_length.items(), reverse=True)
+            for version, by_length in index.items()
+        }
+        self._coarse = {}
+        for version, by_length in index.items():
+            shift = (32 if version == 4 else 128) - min(by_length, default=0)
+            self._coarse[version] = (shift, frozenset(
+                network >> shift for networks in by_length.values() for network in networks
+            ))
+    
+    def _match_feeds(self, key) -> Sequence[Dict]:
+        """Feeds containing the IP with _ip_key() key, from the most specific prefix outwards"""
+        if key.__class__ is not int:
+            return _EMPTY  # Not an IP address
+        
+        version, value = (6, key ^ _IPV6_FLAG) if key >= _IPV6_FLAG else (4, key)
+        shift, coarse = self._coarse[version]
+        if value >> shift not in coarse:
+            return _EMPTY
+        
+        bits = 32 if version == 4 else 128
+        feeds = []
+        seen = set()  # id() of each matched feed; a feed listing nested prefixes matches once
+        for prefixlen, networks in self._prefixes[version]:
+            shift = bits - prefixlen
+            for feed in networks.get(value >> shift << shift, _EMPTY):
+                if id(feed) not in seen:
+                    seen.add(id(feed))
+                    feeds.append(feed)
+        return tuple(feeds) if feeds else _EMPTY
+    
+    def check_ip(self, ip: str, key=None) -> Sequence[Dict]:
+        """Check if IP appears in any threat feeds (key: _ip_key(ip), if already computed)"""
+        known = KNOWN_THREAT_IPS.get(ip)
+        # Feed index is skipped entirely while no feed has entries
+        if self._prefixes[4] or self._prefixes[6]:
+            feeds = self._match_feeds(_ip_key(ip) if key is None else key)
+        else:
+            feeds = _EMPTY
+        if known is None and not feeds:
+            return _EMPTY
+        
         matches = []
         
         # Check known threat IPs
-        if ip in KNOWN_THREAT_IPS:
+        if known is not None:
             matches.append({
                 'feed': 'Internal Threat List',
                 'ip': ip,
-                'threat': KNOWN_THREAT_IPS[ip]['name'],
-                'confidence': KNOWN_THREAT_IPS[ip]['confidence'],
-                'last_seen': datetime.now().isoformat()
+                'threat': known['name'],
+                'confidence': known['confidence'],
+                'last_seen': _now_iso()
             })
         
         # Check against threat feeds
-        for feed in self.threat_feeds:
-            if ip in feed['ips']:
-                matches.append({
-                    'feed': feed['name'],
-                    'ip': ip,
-                    'last_seen': feed['updated'].isoformat()
-                })
+        for feed in feeds:
+            matches.append({
+                'feed': feed['name'],
+                'ip': ip,
+                'last_seen': feed['updated'].isoformat()
+            })
         
         return matches
 
 
+@dataclass(slots=True, frozen=True)
+class AttackSignature:
+    """Behavioral signature of an attacker, compared by BotnetDetector"""
+    protocols: frozenset
+    avg_payload: float
+    event_rate: float
+    attack_type: str
+
+
 class BotnetDetector:
     """Detect botnet activity and cluster attacks"""
     
+    MAX_SIGNATURES = 50_000  # least recently seen IPs are forgotten beyond this
+    
+    # Signatures can only exceed the 0.8 similarity threshold when the attack
+    # types match and average payloads differ by less than this many bytes
+    PAYLOAD_BUCKET_BYTES = 500
+    
     def __init__(self):
         self.botnets = defaultdict(list)
-        self.ip_signatures = {}
+        # ip -> AttackSignature, least recently seen first
+        self.ip_signatures = OrderedDict()
+        # (attack_type, payload bucket) -> {ip: signature}
+        self._buckets = defaultdict(dict)
+        # ip -> first-seen order, so the earliest stored match is reported
+        self._rank = {}
+        self._next_rank = itertools.count()
+    
+    def _bucket_key(self, signature: AttackSignature) -> Tuple[str, int]:
+        return signature.attack_type, int(signature.avg_payload // self.PAYLOAD_BUCKET_BYTES)
     
     def analyze_attack_pattern(self, ip: str, attack_profile: Dict) -> Optional[Dict]:
         """
         Analyze attack pattern to detect botnet signatures
         """
         signature = self._extract_signature(attack_profile)
-        
-        # Check if similar signature exists (possible botnet member)
-        for existing_ip, existing_sig in self.ip_signatures.items():
-            similarity = self._calculate_similarity(signature, existing_sig)
-            if similarity > 0.8:  # High similarity threshold
-                return {
-                    'type': 'botnet_member',
-                    'confidence': similarity,
-                    'similar_to': existing_ip,
-                    'botnet_family': self._identify_botnet_family(signature)
-                }
+        attack_type, bucket = self._bucket_key(signature)
+        
+        # Check if similar signature exists (possible botnet member); only the
+        # neighbouring payload buckets of the same attack type can qualify
+        match_ip, match_similarity = None, 0.0
+        for key in ((attack_type, bucket - 1), (attack_type, bucket), (attack_type, bucket + 1)):
+            for existing_ip, existing_sig in self._buckets.get(key, {}).items():
+                if existing_ip == ip:
+                    continue  # An IP's own earlier signature is not another botnet member
+                similarity = self._calculate_similarity(signature, existing_sig)
+                if similarity > 0.8 and (match_ip is None or self._rank[existing_ip] < self._rank[match_ip]):
+                    match_ip, match_similarity = existing_ip, similarity
+        
+        if match_ip is not None:
+            self.ip_signatures.move_to_end(match_ip)
+            return {
+                'type': 'botnet_member',
+                'confidence': match_similarity,
+                'similar_to': match_ip,
+                'botnet_family': self._identify_botnet_family(signature)
+            }
         
         # Store signature for future comparison
-        self.ip_signatures[ip] = signature
+        self._store_signature(ip, signature)
         
         return None
     
-    def _extract_signature(self, profile: Dict) -> Dict:
+    def _store_signature(self, ip: str, signature: AttackSignature):
+        previous = self.ip_signatures.get(ip)
+        if previous is None:
+            self._rank[ip] = next(self._next_rank)
+        else:
+            self._discard_from_bucket(ip, previous)
+        self.ip_signatures[ip] = signature
+        self.ip_signatures.move_to_end(ip)
+        self._buckets[self._bucket_key(signature)][ip] = signature
+        
+        while len(self.ip_signatures) > self.MAX_SIGNATURES:
+            old_ip, old_signature = self.ip_signatures.popitem(last=False)
+            self._discard_from_bucket(old_ip, old_signature)
+            del self._rank[old_ip]
+    
+    def _discard_from_bucket(self, ip: str, signature: AttackSignature):
+        key = self._bucket_key(signature)
+        bucket = self._buckets[key]
+        bucket.pop(ip, None)
+        if not bucket:
+            del self._buckets[key]
+    
+    def _extract_signature(self, profile: Dict) -> AttackSignature:
         """Extract behavioral signature from attack profile"""
-        return {
-            'protocols': frozenset(profile.get('protocols_used', [])),
-            'avg_payload': profile.get('avg_payload_size', 0),
-            'event_rate': profile.get('events_per_minute', 0),
-            'attack_type': profile.get('attack_type', 'unknown'),
-        }
+        return AttackSignature(
+            protocols=frozenset(profile.get('protocols_used', [])),
+            avg_payload=profile.get('avg_payload_size', 0),
+            event_rate=profile.get('events_per_minute', 0),
+            attack_type=profile.get('attack_type', 'unknown'),
+        )
     
-    def _calculate_similarity(self, sig1: Dict, sig2: Dict) -> float:
+    def _calculate_similarity(self, sig1: AttackSignature, sig2: AttackSignature) -> float:
         """Calculate similarity between two attack signatures"""
-        scores = []
-        
-        # Protocol similarity
-        if sig1['protocols'] == sig2['protocols']:
-            scores.append(1.0)
+        # Protocol similarity (Jaccard; union size by inclusion-exclusion, no union set)
+        protocols1, protocols2 = sig1.protocols, sig2.protocols
+        if protocols1 == protocols2:
+            protocol_score = 1.0
         else:
-            intersection = len(sig1['protocols'] & sig2['protocols'])
-            union = len(sig1['protocols'] | sig2['protocols'])
-            if union > 0:
-                scores.append(intersection / union)
-            else:
-                scores.append(0)
+            intersection = len(protocols1 & protocols2)
+            protocol_score = intersection / (len(protocols1) + len(protocols2) - intersection)
         
         # Payload size similarity
-        payload_diff = abs(sig1['avg_payload'] - sig2['avg_payload'])
+        payload_diff = abs(sig1.avg_payload - sig2.avg_payload)
         if payload_diff < 100:
-            scores.append(0.9)
+            payload_score = 0.9
         elif payload_diff < 500:
-            scores.append(0.7)
+            payload_score = 0.7
         else:
-            scores.append(0.3)
+            payload_score = 0.3
         
         # Attack type similarity
-        if sig1['attack_type'] == sig2['attack_type']:
-            scores.append(1.0)
-        else:
-            scores.append(0.5)
+        type_score = 1.0 if sig1.attack_type == sig2.attack_type else 0.5
         
         # Average similarity
-        return sum(scores) / len(scores) if scores else 0
+        return (protocol_score + payload_score + type_score) / 3
     
-    def _identify_botnet_family(self, signature: Dict) -> str:
+    def _identify_botnet_family(self, signature: AttackSignature) -> str:
         """Identify botnet family from signature"""
-        if 'DNS' in signature['protocols'] and signature['avg_payload'] > 500:
+        if 'DNS' in signature.protocols and signature.avg_payload > 500:
             return 'Possible DNS Amplification Bot'
-        elif 'SSDP' in signature['protocols']:
+        elif 'SSDP' in signature.protocols:
             return 'Possible SSDP Amplification Bot'
-        elif 'NTP' in signature['protocols']:
+        elif 'NTP' in signature.protocols:
             return 'Possible NTP Amplification Bot'
-        elif 'HTTP' in signature['protocols'] and signature['event_rate'] > 1000:
+        elif 'HTTP' in signature.protocols and signature.event_rate > 1000:
             return 'Possible HTTP Flood Bot'
         else:
             return 'Unknown Botnet Family'
@@ -394,12 +717,14 @@ class BotnetDetector:
 class ThreatIntelligenceManager:
     """Central threat intelligence manager"""
     
+    MAX_CACHE_ENTRIES = 50_000
+    
     def __init__(self):
         self.whois = WHOISLookup()
         self.scorer = IPReputationScorer()
         self.threat_feed = ThreatFeedMatcher()
         self.botnet_detector = BotnetDetector()
-        self.cache = {}
+        self.cache = _ShardedCache(self.MAX_CACHE_ENTRIES)
         self.cache_timeout = 3600  # 1 hour
     
     def get_threat_profile(self, ip: str, attack_profile: Optional[Dict] = None) -> Dict[str, Any]:  # type: ignore
@@ -418,20 +743,20 @@ class ThreatIntelligenceManager:
             'timestamp': str
         }
         """
-        # Check cache
-        cache_key = f"threat_{ip}"
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if time.time() - cached_time < self.cache_timeout:
-                return cached_data
+        # Check cache; a changed attack profile for the same IP is a different entry
+        ip_key = _ip_key(ip)
+        cache_key = (ip_key, self._fingerprint(attack_profile))
+        cached = self.cache.get(cache_key, time.time())
+        if cached is not _MISS:
+            return cached
         
         profile: Dict[str, Any] = {
             'ip': ip,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now_iso()
         }
         
         # Get WHOIS information
-        whois_data = self.whois.lookup(ip)
+        whois_data = self.whois.lookup(ip, ip_key)
         profile['whois'] = whois_data or {}  # type: ignore
         
         # Calculate reputation score
@@ -448,7 +773,7 @@ class ThreatIntelligenceManager:
             profile['score_color'] = '#4caf50'
         
         # Check threat feeds
-        profile['threat_feeds'] = self.threat_feed.check_ip(ip)  # type: ignore
+        profile['threat_feeds'] = self.threat_feed.check_ip(ip, ip_key)  # type: ignore
         
         # Analyze for botnet patterns
         if attack_profile:
@@ -459,63 +784,77 @@ class ThreatIntelligenceManager:
         profile['indicators'] = self._generate_indicators(profile, attack_profile or {})  # type: ignore
         
         # Cache result
-        self.cache[cache_key] = (time.time(), profile)
+        self.cache.put(cache_key, profile, time.time(), self.cache_timeout)
         
         return profile
     
-    def _generate_indicators(self, threat_profile: Dict, attack_profile: Dict) -> List[Dict]:
-        """Generate threat indicators"""
-        indicators = []
+    @staticmethod
+    def _fingerprint(attack_profile: Optional[Dict]) -> Optional[Tuple]:
+        """Every attack profile field the scorer, botnet detector and indicators read"""
+        if not attack_profile:
+            return None
+        return (
+            attack_profile.get('total_events', 0),
+            attack_profile.get('events_per_minute', 0),
+            attack_profile.get('avg_payload_size', 0),
+            attack_profile.get('attack_type', 'unknown'),
+            attack_profile.get('country', 'XX'),
+            frozenset(attack_profile.get('protocols_used', ())),
+        )
+    
+    def _generate_indicators(self, threat_profile: Dict, attack_profile: Dict) -> Sequence[Dict]:
+        """Generate threat indicators (a shared empty tuple when none apply)"""
+        indicators = _EMPTY
         
         # High reputation score
         if threat_profile['reputation_score'] > 70:
-            indicators.append({
+            indicators += ({
                 'type': 'high_reputation_score',
                 'severity': 'high',
                 'description': f"High reputation score: {threat_profile['reputation_score']}/100"
-            })
+            },)
         
         # Known threat feed
         if threat_profile['threat_feeds']:
-            indicators.append({
+            indicators += ({
                 'type': 'known_threat',
                 'severity': 'critical',
                 'description': f"Found in {len(threat_profile['threat_feeds'])} threat feed(s)"
-            })
+            },)
         
         # Botnet detected
         if threat_profile['botnet_analysis']:
-            indicators.append({
+            indicators += ({
                 'type': 'botnet_detected',
                 'severity': 'high',
                 'description': threat_profile['botnet_analysis'].get('botnet_family', 'Unknown Botnet')
-            })
+            },)
         
         # High attack rate
         if attack_profile.get('events_per_minute', 0) > 100:
-            indicators.append({
+            indicators += ({
                 'type': 'high_attack_rate',
                 'severity': 'high',
                 'description': f"Attack rate: {attack_profile['events_per_minute']:.1f} events/min"
-            })
+            },)
         
         # Multi-protocol attack
         if len(attack_profile.get('protocols_used', [])) > 2:
-            indicators.append({
+            indicators += ({
                 'type': 'multi_protocol_attack',
                 'severity': 'medium',
                 'description': f"Attacking {len(attack_profile['protocols_used'])} protocols"
-            })
+            },)
         
         # High country threat level
         country = threat_profile['whois'].get('country', 'XX')
         threat_level = COUNTRY_THREAT_LEVELS.get(country)
         if threat_level in ['high', 'critical']:
-            indicators.append({
+            indicators += ({
                 'type': 'high_risk_country',
                 'severity': threat_level,
                 'description': f"Attack from high-risk country: {country}"
-            })
+            },)
         
         return indicators
 
@@ -4,7 +4,13 @@ Test script to demonstrate alert system functionality.
 """
 
 import json
-from telemetry.alerts import get_alert_manager
+import smtplib
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+from telemetry import alerts
+from telemetry.alerts import get_alert_manager, AlertConfig, AlertThrottler, DiscordAlert, EmailAlert
 
 def test_alerts():
     print("=" * 65)
@@ -81,5 +87,203 @@ def test_alerts():
     print("Alert system is working! Configure your notification channels.")
     print("=" * 65)
 
+def test_throttler_logs_and_reads_history(tmp_path):
+    throttler = AlertThrottler(str(tmp_path / "alerts.db"))
+    throttler.log_alert('critical_attack', 'critical', 'first', ip='192.0.2.1')
+    throttler.log_alert('ip_blacklisted', 'high', 'second', ip='192.0.2.2', sent=False)
+    
+    history = throttler.get_recent_alerts(10)
+    assert len(history) == 2
+    assert {a['type'] for a in history} == {'critical_attack', 'ip_blacklisted'}
+    assert {a['sent'] for a in history} == {True, False}
+    assert set(history[0]) == {'id', 'type', 'ip', 'severity', 'message', 'sent', 'timestamp'}
+
+
+def test_throttler_connection_is_per_thread(tmp_path):
+    throttler = AlertThrottler(str(tmp_path / "alerts.db"))
+    assert throttler._conn() is throttler._conn()
+    
+    other = []
+    worker = threading.Thread(target=lambda: other.append(throttler._conn()))
+    worker.start()
+    worker.join()
+    assert other[0] is not throttler._conn()
+
+
+def test_throttler_suppresses_repeat_alerts(tmp_path):
+    throttler = AlertThrottler(str(tmp_path / "alerts.db"))
+    assert throttler.should_alert('critical_attack', '192.0.2.1', 300)
+    assert not throttler.should_alert('critical_attack', '192.0.2.1', 300)
+    assert throttler.should_alert('critical_attack', '192.0.2.2', 300)
+
+
+
+def test_throttler_batches_history_writes(tmp_path):
+    throttler = AlertThrottler(str(tmp_path / "alerts.db"))
+    throttler._last_flush = float('inf')  # Only the batch size triggers a write
+    for i in range(AlertThrottler.FLUSH_BATCH_SIZE - 1):
+        throttler.log_alert('critical_attack', 'low', f'alert {i}')
+    assert len(throttler._pending) == AlertThrottler.FLUSH_BATCH_SIZE - 1
+    
+    throttler.log_alert('critical_attack', 'low', 'last')
+    assert not throttler._pending
+    assert len(throttler.get_recent_alerts(100)) == AlertThrottler.FLUSH_BATCH_SIZE
+
+
+def test_throttler_flushes_lone_alert_on_deadline(tmp_path, monkeypatch):
+    monkeypatch.setattr(AlertThrottler, 'FLUSH_INTERVAL_SECONDS', 0.2)
+    db_path = str(tmp_path / "alerts.db")
+    throttler = AlertThrottler(db_path)
+    throttler._last_flush = float('inf')  # The next log_alert call must not flush inline
+    throttler.log_alert('critical_attack', 'critical', 'lone', ip='192.0.2.1')
+    assert len(throttler._pending) == 1
+    
+    # Another connection sees the row without a second log_alert or flush call
+    reader = sqlite3.connect(db_path)
+    deadline = time.monotonic() + 5
+    count = 0
+    while count == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        count = reader.execute('SELECT COUNT(*) FROM alert_history').fetchone()[0]
+    assert count == 1
+    assert not throttler._pending
+    
+    # Later deadline flushes run on the same flusher thread and its one connection
+    flusher = throttler._flusher
+    throttler.log_alert('critical_attack', 'critical', 'second', ip='192.0.2.2')
+    deadline = time.monotonic() + 5
+    while count == 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        count = reader.execute('SELECT COUNT(*) FROM alert_history').fetchone()[0]
+    reader.close()
+    assert count == 2
+    assert throttler._flusher is flusher and flusher.is_alive()
+
+
+def test_throttler_warms_from_history_after_restart(tmp_path):
+    db_path = str(tmp_path / "alerts.db")
+    throttler = AlertThrottler(db_path)
+    throttler.log_alert('critical_attack', 'critical', 'sent', ip='192.0.2.1')
+    throttler.flush()
+    
+    restarted = AlertThrottler(db_path)
+    assert not restarted.should_alert('critical_attack', '192.0.2.1', 300)
+    assert 'critical_attack:192.0.2.1' in restarted.memory_cache
+    assert restarted.should_alert('critical_attack', '192.0.2.1', 0)
+
+
+def test_config_dotted_lookup_tracks_set(tmp_path):
+    config = AlertConfig(str(tmp_path / "alert_config.json"))
+    assert config.get('throttle.min_interval_seconds') == 300
+    assert config.get('email')['smtp_port'] == 587
+    assert config.get('email.smtp_port.extra', 'x') == 'x'
+    assert config.get('missing.key', 'fallback') == 'fallback'
+    
+    config.set('discord.webhook_url', 'https://example.invalid/hook')
+    config.set('telegram', {'enabled': True, 'chat_id': '42'})
+    assert config.get('discord.webhook_url') == 'https://example.invalid/hook'
+    assert config.get('telegram.enabled') is True
+    assert config.get('telegram.bot_token', '') == ''
+
+
+def test_config_coerces_typed_values_on_load_and_set(tmp_path):
+    config_file = tmp_path / "alert_config.json"
+    config_file.write_text(json.dumps({
+        'email': {'smtp_port': '2525', 'use_tls': 0},
+        'telegram': {'chat_id': 12345},
+        'throttle': {'min_interval_seconds': 'soon'},
+    }))
+    config = AlertConfig(str(config_file))
+    assert config.get('email.smtp_port') == 2525
+    assert config.get('email.use_tls') is False
+    assert config.get('telegram.chat_id') == '12345'
+    assert config.get('throttle.min_interval_seconds', 300) == 300
+    
+    config.set('throttle.min_interval_seconds', '60')
+    assert config.get('throttle.min_interval_seconds') == 60
+
+
+def test_discord_alert_posts_through_shared_session(tmp_path):
+    config = AlertConfig(str(tmp_path / "alert_config.json"))
+    config.set('discord', {'enabled': True, 'webhook_url': 'https://example.invalid/hook'})
+    
+    with patch.object(alerts._HTTP, 'post') as post:
+        assert DiscordAlert(config).send('Title', 'Body')
+    
+    args, kwargs = post.call_args
+    assert args == ('https://example.invalid/hook',)
+    assert json.loads(kwargs['data'])['embeds'][0]['title'] == 'Title'
+    assert kwargs['headers']['Content-Type'] == 'application/json'
+    assert kwargs['timeout'] == 10
+
+
+def test_email_alert_sends_plain_text_without_multipart(tmp_path):
+    config = AlertConfig(str(tmp_path / "alert_config.json"))
+    config.set('email', {'enabled': True, 'smtp_server': 'smtp.example.invalid', 'smtp_port': 587,
+                         'sender': 'ddospot@example.invalid', 'password': 'secret',
+                         'recipients': ['ops@example.invalid'], 'use_tls': True})
+    
+    with patch('smtplib.SMTP') as smtp:
+        assert EmailAlert(config).send('Subject', 'Body')
+        assert EmailAlert(config).send('Subject', 'Body', '<p>Body</p>')
+    
+    sent = [c.args for c in smtp.return_value.send_message.call_args_list]
+    assert sent[0][0].get_content_type() == 'text/plain'
+    assert sent[1][0].get_content_type() == 'multipart/alternative'
+    assert sent[0][1:] == ('ddospot@example.invalid', ['ops@example.invalid'])
+
+
+def test_email_alert_reuses_smtp_session(tmp_path):
+    config = AlertConfig(str(tmp_path / "alert_config.json"))
+    config.set('email', {'enabled': True, 'smtp_server': 'smtp.example.invalid', 'smtp_port': 587,
+                         'sender': 'ddospot@example.invalid', 'password': 'secret',
+                         'recipients': ['ops@example.invalid'], 'use_tls': False})
+    email = EmailAlert(config)
+    
+    with patch('smtplib.SMTP') as smtp:
+        assert email.send('First', 'Body')
+        assert email.send('Second', 'Body')
+        assert smtp.call_count == 1
+        assert smtp.return_value.login.call_count == 1
+        
+        smtp.return_value.send_message.side_effect = [smtplib.SMTPServerDisconnected(), None]
+        assert email.send('Third', 'Body')
+        assert smtp.call_count == 2
+        email._close_smtp()
+
+
+def test_manager_fans_out_to_enabled_channels(tmp_path):
+    manager = alerts.AlertManager(str(tmp_path / "alerts.db"), str(tmp_path / "alert_config.json"))
+    manager.config.set('discord.enabled', True)
+    manager.config.set('telegram.enabled', True)
+    threads = []
+    
+    def fake_send(result):
+        def send(*args):
+            threads.append(threading.current_thread().name)
+            return result
+        return send
+    
+    with patch.object(manager.discord, 'send', fake_send(False)), \
+         patch.object(manager.telegram, 'send', fake_send(True)), \
+         patch.object(manager.email, 'send', fake_send(True)):
+        assert manager.send_alert('critical_attack', 'high', 'Title', 'Body', ip='192.0.2.1')
+    
+    assert len(threads) == 2
+    assert all(name.startswith('alerts') for name in threads)
+
+
+def test_manager_builds_only_used_channels(tmp_path):
+    manager = alerts.AlertManager(str(tmp_path / "alerts.db"), str(tmp_path / "alert_config.json"))
+    manager.config.set('discord', {'enabled': True, 'webhook_url': 'https://example.invalid/hook'})
+    
+    with patch.object(alerts._HTTP, 'post'):
+        assert manager.send_alert('critical_attack', 'high', 'Title', 'Body', ip='192.0.2.1')
+    
+    assert 'discord' in vars(manager)
+    assert 'email' not in vars(manager)
+    assert 'telegram' not in vars(manager)
+
+
 if __name__ == '__main__':
     test_alerts()
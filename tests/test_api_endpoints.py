@@ -6,9 +6,11 @@ Tests authentication, rate limiting, validation, and endpoint functionality.
 import pytest
 import os
 import sys
-import json
-import tempfile
-from pathlib import Path
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 # Add project to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,28 +18,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.dashboard import create_app, _rate_limiter
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def app():
-    """Create Flask test app"""
-    # Create temp database
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_path = f.name
-    
-    os.environ['DATABASE_PATH'] = db_path
-    
+    """Create Flask test app once for every test in this module"""
+    # init_db() opens the dashboard's own database path, so no per-test file is needed
     app = create_app()
     app.config['TESTING'] = True
-    
-    yield app
-    
-    # Cleanup
-    try:
-        Path(db_path).unlink()
-    except Exception:
-        pass
+    return app
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client(app):
     """Create Flask test client"""
     return app.test_client()
@@ -50,14 +40,14 @@ class TestStatsEndpoint:
         """GET /api/stats should work without auth"""
         response = client.get('/api/stats')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert 'total_events' in data
     
     def test_stats_pagination(self, client):
         """Test stats with hours parameter"""
         response = client.get('/api/stats?hours=24')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert isinstance(data, dict)
 
 
@@ -68,7 +58,7 @@ class TestRecentEventsEndpoint:
         """Test recent events without filters"""
         response = client.get('/api/recent-events')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert 'items' in data
         assert 'page' in data
         assert 'total' in data
@@ -78,7 +68,7 @@ class TestRecentEventsEndpoint:
         """Test pagination parameters"""
         response = client.get('/api/recent-events?page=1&page_size=10')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert data['page'] == 1
         assert data['page_size'] == 10
     
@@ -86,48 +76,44 @@ class TestRecentEventsEndpoint:
         """Test that invalid page returns page 1"""
         response = client.get('/api/recent-events?page=0&page_size=10')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert data['page'] == 1
     
     def test_recent_events_max_page_size(self, client):
         """Test that page_size is capped at 200"""
         response = client.get('/api/recent-events?page_size=1000')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert data['page_size'] <= 200
     
     def test_recent_events_filter_by_ip(self, client):
         """Test filtering by IP"""
         response = client.get('/api/recent-events?ip=192.0.2.1')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert data['filters']['ip'] == '192.0.2.1'
     
     def test_recent_events_filter_by_protocol(self, client):
         """Test filtering by protocol"""
         response = client.get('/api/recent-events?protocol=HTTP')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert data['filters']['protocol'] == 'HTTP'
 
 
 class TestAuthorizationEndpoints:
     """Tests for authentication-protected endpoints"""
     
-    def test_alerts_config_post_no_token(self, client):
+    def test_alerts_config_post_no_token(self, client, monkeypatch):
         """POST /api/alerts/config requires token"""
-        os.environ['DDOSPOT_REQUIRE_TOKEN'] = 'true'
+        # Restored after the test, so the shared app sees the original setting
+        monkeypatch.setenv('DDOSPOT_REQUIRE_TOKEN', 'true')
         
         response = client.post(
             '/api/alerts/config',
             json={'threshold': 100}
         )
-        
-        # Should fail if token required
-        if os.environ.get('DDOSPOT_REQUIRE_TOKEN') == 'true':
-            # Reset for next tests
-            del os.environ['DDOSPOT_REQUIRE_TOKEN']
-            # Note: actual response depends on SEC_REQUIRE_TOKEN config
+        # Note: actual response depends on SEC_REQUIRE_TOKEN config
     
     def test_ml_train_post_no_token(self, client):
         """POST /api/ml/train requires token"""
@@ -176,6 +162,52 @@ class TestInputValidation:
         assert response.status_code in [200, 401]
 
 
+class TestMLPredictEndpoints:
+    """Tests for the ML prediction endpoints with a model trained on event features"""
+    
+    ATTACKER_IP = '192.0.2.10'
+    
+    @pytest.fixture
+    def trained_model(self, app, tmp_path, monkeypatch):
+        """Point the dashboard at a seeded database and a freshly trained model"""
+        pytest.importorskip('sklearn')
+        from app import dashboard
+        from core.database import HoneypotDatabase
+        from ml.model import AttackClassifier
+        from ml.train import generate_synthetic_training_data
+        
+        db = HoneypotDatabase(str(tmp_path / 'honeypot.db'))
+        db.add_events_bulk([
+            (self.ATTACKER_IP, 80, 'HTTP', 6000, 'attack', 1000.0 + i) for i in range(20)
+        ])
+        model = AttackClassifier(model_path=str(tmp_path / 'model.pkl'))
+        X, y, feature_names = generate_synthetic_training_data(200)
+        model.train(X, y, feature_names)
+        
+        monkeypatch.setattr(dashboard, 'db', db)
+        monkeypatch.setattr(dashboard, 'ml_model', model)
+        monkeypatch.delenv('DDOSPOT_REQUIRE_TOKEN', raising=False)
+        yield model
+        db.close()
+    
+    def test_predict_uses_model_features(self, client, trained_model):
+        """GET /api/ml/predict/<ip> should give a real prediction, not the fallback"""
+        response = client.get(f'/api/ml/predict/{self.ATTACKER_IP}')
+        assert response.status_code == 200
+        data = json_loads(response.data)
+        assert data['event_count'] == 20
+        assert data['confidence'] > 0
+        assert data['prediction'] in trained_model.ATTACK_NAMES.values()
+    
+    def test_batch_predict_uses_model_features(self, client, trained_model):
+        """POST /api/ml/batch-predict should give a real prediction, not the fallback"""
+        response = client.post('/api/ml/batch-predict', json={'ips': [self.ATTACKER_IP]})
+        assert response.status_code == 200
+        prediction = json_loads(response.data)['predictions'][self.ATTACKER_IP]
+        assert prediction['events'] == 20
+        assert prediction['confidence'] > 0
+
+
 class TestHealthEndpoint:
     """Tests for GET /health"""
     
@@ -183,7 +215,7 @@ class TestHealthEndpoint:
         """Health check endpoint should return status"""
         response = client.get('/health')
         assert response.status_code in [200, 500]
-        data = json.loads(response.data)
+        data = json_loads(response.data)
         assert 'status' in data
 
 
@@ -222,19 +254,26 @@ class TestErrorHandling:
 class TestRateLimitingIntegration:
     """Tests for rate limiting on dashboard endpoints"""
     
-    def test_rate_limit_429_response(self, client):
-        """Test that rate limit returns 429"""
-        # Note: Rate limiting is per-IP, and test client may share IP
-        # This test verifies the status code if rate limit is triggered
+    def test_rate_limit_429_response(self, app, client, monkeypatch):
+        """Test that a rate-limited client gets a 429"""
+        # Rate limiting is skipped in testing mode and for localhost, so turn
+        # testing off and identify as a documentation-range client
+        monkeypatch.setitem(app.config, 'TESTING', False)
+        monkeypatch.delenv('DDOSPOT_TESTING', raising=False)
+        ip = '203.0.113.250'
         
-        # Make rapid requests to trigger rate limit
-        for i in range(100):
-            response = client.get('/api/stats')
-            if response.status_code == 429:
-                # Rate limit triggered
-                data = json.loads(response.data)
-                assert 'error' in data
-                break
+        # Saturate the limiter directly instead of sending max_events requests
+        for _ in range(_rate_limiter.max_events + 1):
+            _rate_limiter.register_event(ip)
+        try:
+            response = client.get('/api/stats', headers={'X-Forwarded-For': ip})
+            
+            assert response.status_code == 429
+            data = json_loads(response.data)
+            assert 'error' in data
+        finally:
+            _rate_limiter.blacklist.pop(ip, None)
+            _rate_limiter.events.pop(ip, None)
 
 
 class TestProxyHeaders:
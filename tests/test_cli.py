@@ -193,28 +193,28 @@ class TestHealthCheckIntegration:
         assert token is None or token == ''
 
 
+# Truthy spellings accepted by the _env_bool pattern in dashboard.py
+TRUTHY_VALUES = frozenset({"1", "true", "yes", "on"})
+
+ENV_BOOL_CASES = [
+    ('true', True),
+    ('false', False),
+    ('1', True),
+    ('0', False),
+    ('yes', True),
+    ('no', False),
+    ('on', True),
+    ('off', False),
+]
+
+
 class TestEnvironmentVariables:
     """Tests for environment variable handling"""
     
-    def test_env_bool_parsing(self):
+    @pytest.mark.parametrize("val,expected", ENV_BOOL_CASES)
+    def test_env_bool_parsing(self, val, expected):
         """Test environment boolean parsing"""
-        # This tests the pattern used in dashboard.py
-        test_cases = [
-            ('true', True),
-            ('false', False),
-            ('1', True),
-            ('0', False),
-            ('yes', True),
-            ('no', False),
-            ('on', True),
-            ('off', False),
-        ]
-        
-        for val, expected in test_cases:
-            os.environ['TEST_BOOL'] = val
-            result = str(val).strip().lower() in ("1", "true", "yes", "on")
-            assert result == expected
-            del os.environ['TEST_BOOL']
+        assert (val.strip().lower() in TRUTHY_VALUES) == expected
 
 
 # Run with: pytest test_cli.py -v
@@ -6,36 +6,46 @@ Tests database operations, geolocation, ML features, and rate limiting.
 import pytest
 import os
 import sys
-import tempfile
 from pathlib import Path
+from types import SimpleNamespace
 from datetime import datetime, timedelta
 import json
 import random
+import sqlite3
 
 # Add project to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.database import HoneypotDatabase
+from telemetry import logger as event_log
+from telemetry import rotation
+from telemetry import stats
+from telemetry.prometheus_metrics import PrometheusMetrics
 from telemetry.ratelimit import RateLimiter
 
 
+# Tables the database tests write to; emptied between tests on the shared database
+_TRUNCATED_TABLES = ("events", "ip_profiles", "blacklist")
+
+
+@pytest.fixture(scope="module")
+def shared_db(tmp_path_factory):
+    """One HoneypotDatabase per module so schema setup runs once"""
+    db = HoneypotDatabase(str(tmp_path_factory.mktemp("db") / "honeypot.db"))
+    yield db
+    db.close()
+
+
 class TestHoneypotDatabase:
     """Tests for core.database.HoneypotDatabase"""
     
     @pytest.fixture
-    def temp_db(self):
-        """Create temporary database for testing"""
-        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-            db_path = f.name
-        
-        db = HoneypotDatabase(db_path)
-        yield db
-        
-        # Cleanup
-        try:
-            Path(db_path).unlink()
-        except Exception:
-            pass
+    def temp_db(self, shared_db):
+        """Empty the shared database before each test"""
+        with shared_db._lock:
+            for table in _TRUNCATED_TABLES:
+                shared_db.conn.execute(f"DELETE FROM {table}")
+        return shared_db
     
     def test_database_init(self, temp_db):
         """Test database initialization"""
@@ -62,15 +72,9 @@ class TestHoneypotDatabase:
         """Test adding multiple events from different IPs"""
         ips = ["192.0.2.1", "192.0.2.2", "192.0.2.3"]
         
-        for ip in ips:
-            for _ in range(5):
-                temp_db.add_event(
-                    source_ip=ip,
-                    port=80,
-                    protocol="HTTP",
-                    payload_size=1024,
-                    event_type="attack"
-                )
+        temp_db.add_events_bulk(
+            [(ip, 80, "HTTP", 1024, "attack") for ip in ips for _ in range(5)]
+        )
         
         stats = temp_db.get_statistics()
         assert stats['total_events'] == 15
@@ -80,14 +84,7 @@ class TestHoneypotDatabase:
         """Test retrieving events by IP"""
         ip = "192.0.2.1"
         
-        for i in range(10):
-            temp_db.add_event(
-                source_ip=ip,
-                port=80 + i,
-                protocol="HTTP",
-                payload_size=1024,
-                event_type="attack"
-            )
+        temp_db.add_events_bulk([(ip, 80 + i, "HTTP", 1024, "attack") for i in range(10)])
         
         events = temp_db.get_events_by_ip(ip)
         assert len(events) == 10
@@ -98,16 +95,10 @@ class TestHoneypotDatabase:
         ips = ["192.0.2.1", "192.0.2.2"]
         protocols = ["HTTP", "DNS"]
         
-        for ip in ips:
-            for proto in protocols:
-                for _ in range(5):
-                    temp_db.add_event(
-                        source_ip=ip,
-                        port=80,
-                        protocol=proto,
-                        payload_size=1024,
-                        event_type="attack"
-                    )
+        temp_db.add_events_bulk([
+            (ip, 80, proto, 1024, "attack")
+            for ip in ips for proto in protocols for _ in range(5)
+        ])
         
         # Filter by protocol
         http_events = temp_db.get_recent_events_filtered(
@@ -126,14 +117,7 @@ class TestHoneypotDatabase:
     def test_count_recent_events_filtered(self, temp_db):
         """Test counting filtered events"""
         # Add 20 events
-        for i in range(20):
-            temp_db.add_event(
-                source_ip="192.0.2.1",
-                port=80,
-                protocol="HTTP",
-                payload_size=1024,
-                event_type="attack"
-            )
+        temp_db.add_events_bulk([("192.0.2.1", 80, "HTTP", 1024, "attack")] * 20)
         
         total = temp_db.count_recent_events_filtered(minutes=60)
         assert total == 20
@@ -151,15 +135,10 @@ class TestHoneypotDatabase:
         # Add events from multiple IPs
         ips_events = {"192.0.2.1": 50, "192.0.2.2": 30, "192.0.2.3": 10}
         
-        for ip, count in ips_events.items():
-            for _ in range(count):
-                temp_db.add_event(
-                    source_ip=ip,
-                    port=80,
-                    protocol="HTTP",
-                    payload_size=1024,
-                    event_type="attack"
-                )
+        temp_db.add_events_bulk([
+            (ip, 80, "HTTP", 1024, "attack")
+            for ip, count in ips_events.items() for _ in range(count)
+        ])
         
         attackers = temp_db.get_top_attackers(3)
         assert len(attackers) == 3
@@ -207,19 +186,79 @@ class TestHoneypotDatabase:
     def test_get_database_size(self, temp_db):
         """Test getting database size info"""
         # Add some events
-        for _ in range(100):
-            temp_db.add_event(
-                source_ip="192.0.2.1",
-                port=80,
-                protocol="HTTP",
-                payload_size=1024,
-                event_type="attack"
-            )
+        temp_db.add_events_bulk([("192.0.2.1", 80, "HTTP", 1024, "attack")] * 100)
         
         size_info = temp_db.get_database_size()
         assert size_info['size_mb'] > 0
         assert size_info['event_count'] == 100
         assert 'file_path' in size_info
+    
+    def test_get_counts(self, temp_db):
+        """Test aggregated event/profile/blacklist counts"""
+        temp_db.add_event("192.0.2.1", 80, "HTTP", 1024, "attack")
+        temp_db.add_event("192.0.2.2", 53, "DNS", 512, "attack")
+        temp_db.add_blacklist("192.0.2.1", "test", 3600, "high")
+        temp_db.add_blacklist("192.0.2.2", "expired", -10, "low")
+        
+        counts = temp_db.get_counts()
+        assert counts['event_count'] == 2
+        assert counts['profile_count'] == 2
+        assert counts['blacklist_count'] == 1
+    
+    def test_get_recent_event_rows(self, temp_db):
+        """Test display-ready recent event tuples"""
+        ts = datetime(2024, 1, 2, 3, 4, 5).timestamp()
+        temp_db.add_event("192.0.2.1", 80, "HTTP", 1024, "attack", timestamp=ts)
+        
+        rows = temp_db.get_recent_event_rows(minutes=10**7, limit=5)
+        assert rows == [("2024-01-02 03:04:05", "192.0.2.1", 80, "HTTP", 1024, "attack")]
+        assert temp_db.get_recent_event_rows(minutes=1) == []
+    
+    def test_source_ip_lookups_use_covering_index(self, temp_db):
+        """Test that per-IP queries go through idx_events_ip_ts alone"""
+        indexes = {row["name"] for row in temp_db.conn.execute("PRAGMA index_list(events)")}
+        assert "idx_events_ip_ts" in indexes
+        assert "idx_events_source_ip" not in indexes
+
+        plan = temp_db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM events WHERE source_ip = ?", ("192.0.2.1",)
+        ).fetchall()
+        assert any("idx_events_ip_ts" in row["detail"] for row in plan)
+
+    def test_add_events_bulk_matches_add_event(self, temp_db):
+        """Test that a bulk insert leaves the same events and profiles as single inserts"""
+        base = datetime(2024, 1, 2, 3, 4, 5).timestamp()
+        rows = [("192.0.2.1", 80, "HTTP", 100 * i, "attack", base + i) for i in range(1, 4)]
+        rows.append(("192.0.2.2", 53, "DNS", 512, "attack"))
+        
+        assert temp_db.add_events_bulk(rows) == 4
+        assert temp_db.add_events_bulk([]) == 0
+        
+        profile = temp_db.get_profile("192.0.2.1")
+        assert profile['total_events'] == 3
+        assert profile['first_seen'] == base + 1
+        assert profile['last_seen'] == base + 3
+        assert profile['avg_payload_size'] == 200
+        assert temp_db.get_profile("192.0.2.2")['total_events'] == 1
+        assert temp_db.get_counts()['event_count'] == 4
+    
+    def test_add_events_bulk_metrics_skip_backfills_and_failures(self, temp_db, monkeypatch):
+        """Test that only committed events without a timestamp are counted in metrics"""
+        import telemetry.prometheus_metrics
+        recorded = []
+        metrics = SimpleNamespace(record_attack_event=lambda *args: recorded.append(args))
+        monkeypatch.setattr(telemetry.prometheus_metrics, 'get_metrics', lambda: metrics)
+        
+        temp_db.add_events_bulk([
+            ("192.0.2.1", 80, "HTTP", 100, "attack"),
+            ("192.0.2.1", 53, "DNS", 200, "attack", 1000.0),
+        ])
+        assert recorded == [("HTTP", "attack", 100)]
+        
+        with pytest.raises(sqlite3.Error):
+            temp_db.add_events_bulk([("192.0.2.2", 80, "HTTP", 100, "attack"), ("192.0.2.2",)])
+        assert recorded == [("HTTP", "attack", 100)]
+        assert temp_db.get_counts()['event_count'] == 2
 
 
 class TestRateLimiter:
@@ -284,7 +323,7 @@ class TestRateLimiter:
         """Test sliding window behavior"""
         import time
         
-        limiter = RateLimiter(max_events=2, window_seconds=1)
+        limiter = RateLimiter(max_events=2, window_seconds=1, blacklist_seconds=1)
         ip = "192.0.2.1"
         
         # Register 2 events
@@ -294,45 +333,224 @@ class TestRateLimiter:
         # 3rd within window should fail
         assert limiter.register_event(ip) is False
         
-        # Wait for window to expire
+        # Wait for window and ban to expire
         time.sleep(1.1)
         
         # Should be allowed again
         assert limiter.register_event(ip) is True
 
+    def test_event_history_is_bounded(self, monkeypatch):
+        """Test that per-IP history never grows past max_events + 1"""
+        clock = iter(range(0, 1000, 10))
+        monkeypatch.setattr("telemetry.ratelimit.time", SimpleNamespace(time=lambda: next(clock)))
+        limiter = RateLimiter(max_events=3, window_seconds=5)
+        ip = "192.0.2.1"
+        
+        # Events 10s apart never exceed a 5s window
+        for _ in range(50):
+            assert limiter.register_event(ip) is True
+        assert len(limiter.events[ip]) == 4
+    
+    def test_blacklisted_ip_keeps_no_history(self):
+        """Test that banned IPs are rejected without an events entry"""
+        limiter = RateLimiter(max_events=2, window_seconds=60, blacklist_seconds=60)
+        ip = "192.0.2.1"
+        
+        for _ in range(3):
+            limiter.register_event(ip)
+        
+        for _ in range(5):
+            assert limiter.register_event(ip) is False
+        assert ip not in limiter.events
+    
+    def test_blacklist_evicts_oldest_entries(self, monkeypatch):
+        """Test that the blacklist is capped and drops the oldest bans first"""
+        monkeypatch.setattr(RateLimiter, "MAX_BLACKLIST", 2)
+        limiter = RateLimiter(max_events=1, window_seconds=60)
+        ips = ["192.0.2.1", "192.0.2.2", "192.0.2.3"]
+        
+        for ip in ips:
+            assert limiter.register_event(ip) is True
+            assert limiter.register_event(ip) is False
+        
+        assert list(limiter.blacklist) == ips[1:]
+
+
+class TestEventLog:
+    """Tests for telemetry.logger.log_event"""
+    
+    def test_log_event_appends_json_lines(self, tmp_path, monkeypatch):
+        """Test that queued events are written as JSON lines"""
+        log_file = tmp_path / "honeypot.log"
+        monkeypatch.setattr(event_log, "LOG_FILE", str(log_file))
+        
+        for i in range(20):
+            event_log.log_event("packet", {"source_ip": "192.0.2.1", "seq": i})
+        event_log.flush_events()
+        
+        entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert [e["seq"] for e in entries] == list(range(20))
+        assert all(e["type"] == "packet" for e in entries)
+    
+    def test_log_event_header_and_overrides(self, tmp_path, monkeypatch):
+        """Test the spliced header, empty payloads and data overriding ts/type"""
+        log_file = tmp_path / "honeypot.log"
+        monkeypatch.setattr(event_log, "LOG_FILE", str(log_file))
+        
+        event_log.log_event("timeout", {})
+        event_log.log_event("http_request", {"path": "/café", 404: "status"})
+        event_log.log_event("packet", {"type": "spoofed", "ts": "custom"})
+        event_log.flush_events()
+        
+        bare, request, override = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert bare["type"] == "timeout" and bare["ts"].count(":") == 2
+        assert request["path"] == "/café" and request["404"] == "status"
+        assert (override["type"], override["ts"]) == ("spoofed", "custom")
+    
+    def test_log_event_stdlib_fallback_keeps_json_dumps_format(self):
+        """Test that without orjson each line is byte-identical to json.dumps of the entry"""
+        import subprocess
+        code = (
+            "import sys; sys.modules['orjson'] = None\n"
+            "from telemetry import logger\n"
+            "logger._writer = object()  # Keep lines on the queue\n"
+            "logger.log_event('packet', {'path': '/caf\\u00e9', 'seq': 1})\n"
+            "logger.log_event('timeout', {})\n"
+            "logger.log_event('packet', {'type': 'spoofed'})\n"
+            "for _ in range(3):\n"
+            "    print(logger._queue.get_nowait().decode())\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root,
+                                capture_output=True, text=True, check=True)
+        
+        lines = result.stdout.splitlines()
+        entries = [json.loads(line) for line in lines]
+        assert lines == [json.dumps(entry) for entry in entries]
+        assert [e["type"] for e in entries] == ["packet", "timeout", "spoofed"]
+    
+    def test_log_event_reopens_rotated_file(self, tmp_path, monkeypatch):
+        """Test that the persistent descriptor follows the log after a rename"""
+        log_file = tmp_path / "honeypot.log"
+        monkeypatch.setattr(event_log, "LOG_FILE", str(log_file))
+        
+        event_log.log_event("packet", {"seq": 1})
+        event_log.flush_events()
+        log_file.rename(tmp_path / "honeypot.log.1")
+        event_log.log_event("packet", {"seq": 2})
+        event_log.flush_events()
+        
+        assert json.loads(log_file.read_text())["seq"] == 2
+        assert json.loads((tmp_path / "honeypot.log.1").read_text())["seq"] == 1
+    
+    def test_log_writer_publishes_size_and_rotations(self, tmp_path, monkeypatch):
+        """Test that the writer reports the log size it tracks, without probing other paths"""
+        log_file = tmp_path / "honeypot.log"
+        monkeypatch.setattr(event_log, "LOG_FILE", str(log_file))
+        metrics = PrometheusMetrics()
+        metrics.stop_sampler()
+        monkeypatch.setattr(event_log, "_metrics", lambda: metrics)
+        
+        for i in range(3):
+            event_log.log_event("packet", {"seq": i})
+        event_log.flush_events()
+        event_log._publish_log_metrics(rotated=True)
+        
+        size = metrics.registry.get_sample_value("ddospot_log_file_size_bytes", {"log_type": "honeypot"})
+        assert size == log_file.stat().st_size
+        assert metrics.registry.get_sample_value("ddospot_log_rotations_total", {"log_type": "honeypot"}) == 1
+        assert metrics.registry.get_sample_value("ddospot_log_file_size_bytes", {"log_type": "dashboard"}) is None
+    
+    def test_rotation_keeps_newest_backups(self, tmp_path, monkeypatch):
+        """Test that rotation renames once and prunes the oldest backups"""
+        monkeypatch.setattr(rotation, "MAX_LOG_SIZE_MB", 0)
+        monkeypatch.setattr(rotation, "MAX_LOG_FILES", 2)
+        log_file = tmp_path / "honeypot.log"
+        
+        for i in range(4):
+            log_file.write_text(f"generation {i}\n")
+            rotation.rotate_logs(str(log_file))
+        
+        backups = rotation._backups(str(log_file))
+        assert not log_file.exists()
+        assert [Path(p).read_text() for p in backups] == ["generation 2\n", "generation 3\n"]
+    
+    def test_disk_limit_reuses_cached_size(self, monkeypatch):
+        """Test that the directory is rescanned only after the cache TTL"""
+        scans = []
+        monkeypatch.setattr(rotation, "get_dir_size_mb", lambda path: scans.append(path) or 1.0)
+        monkeypatch.setattr(rotation, "_cached_at", None)
+        
+        for _ in range(5):
+            rotation.enforce_disk_limit("missing.log")
+        assert len(scans) == 1
+        
+        monkeypatch.setattr(rotation, "_cached_at", rotation._cached_at - rotation._CACHE_TTL)
+        rotation.enforce_disk_limit("missing.log")
+        assert len(scans) == 2
+
+
+class TestServiceStats:
+    """Tests for telemetry.stats"""
+    
+    def test_ip_rate_counts_window_and_trims_history(self, monkeypatch):
+        """Test sliding-window rate and bounded per-IP history"""
+        clock = [0.0]
+        monkeypatch.setattr(stats, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+        monkeypatch.setattr(stats, "_ip_timestamps", stats._LRUDict(stats.MAX_TRACKED_IPS))
+        
+        for second in range(2000):
+            clock[0] = float(second)
+            stats.record("HTTP", "192.0.2.1")
+        
+        assert stats.ip_rate("192.0.2.1", window=60) == 60
+        assert stats.ip_rate("192.0.2.9") == 0
+        assert len(stats._ip_timestamps["192.0.2.1"]) <= 2 * stats.MAX_WINDOW
+    
+    def test_tracked_ips_are_capped_lru(self, monkeypatch):
+        """Test that the least recently seen IP is evicted past capacity"""
+        monkeypatch.setattr(stats, "_ip_timestamps", stats._LRUDict(2))
+        
+        stats.record("HTTP", "192.0.2.1")
+        stats.record("HTTP", "192.0.2.2")
+        stats.record("HTTP", "192.0.2.1")
+        stats.record("HTTP", "192.0.2.3")
+        
+        assert list(stats._ip_timestamps) == ["192.0.2.1", "192.0.2.3"]
+        assert stats.ip_rate("192.0.2.1") == 2
+
 
 class TestEventStatistics:
     """Tests for event statistics and aggregation"""
     
-    @pytest.fixture
-    def temp_db_with_events(self):
-        """Create DB with sample events"""
-        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-            db_path = f.name
-        
-        db = HoneypotDatabase(db_path)
+    @pytest.fixture(scope="class")
+    def seeded_db(self, tmp_path_factory):
+        """Create DB with sample events, plus an in-memory snapshot of it"""
+        db = HoneypotDatabase(str(tmp_path_factory.mktemp("db") / "events.db"))
         
         # Add events across multiple protocols and IPs
         protocols = ["HTTP", "DNS", "SSH", "NTP"]
         ips = [f"192.0.2.{i}" for i in range(1, 6)]
         
-        for ip in ips:
-            for proto in protocols:
-                for _ in range(random.randint(1, 10)):
-                    db.add_event(
-                        source_ip=ip,
-                        port=80 if proto == "HTTP" else 53,
-                        protocol=proto,
-                        payload_size=random.randint(100, 5000),
-                        event_type="attack"
-                    )
-        
-        yield db
-        
-        try:
-            Path(db_path).unlink()
-        except Exception:
-            pass
+        db.add_events_bulk([
+            (ip, 80 if proto == "HTTP" else 53, proto, random.randint(100, 5000), "attack")
+            for ip in ips for proto in protocols for _ in range(random.randint(1, 10))
+        ])
+        
+        snapshot = sqlite3.connect(":memory:")
+        db.conn.backup(snapshot)
+        yield db, snapshot
+        
+        snapshot.close()
+        db.close()
+    
+    @pytest.fixture
+    def temp_db_with_events(self, seeded_db):
+        """Restore the seeded DB from its snapshot before each test"""
+        db, snapshot = seeded_db
+        with db._lock:
+            snapshot.backup(db.conn)
+        return db
     
     def test_statistics_consistency(self, temp_db_with_events):
         """Test that statistics are consistent"""
@@ -15,7 +15,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ml.features import (
     FeatureExtractor, FeatureNormalizer, 
     PacketFeatures, TrafficFeatures,
-    get_feature_extractor, get_feature_normalizer
+    get_feature_extractor, get_feature_normalizer, EVENT_FEATURE_NAMES
 )
 
 # ============================================================================
@@ -202,6 +202,51 @@ class TestFeatureExtraction(unittest.TestCase):
         self.assertIn('packet_count', names)
         self.assertIn('packet_rate', names)
 
+class TestEventFeatureExtraction(unittest.TestCase):
+    """Test per-attacker features from honeypot events"""
+    
+    def setUp(self):
+        """Setup test fixtures"""
+        self.extractor = FeatureExtractor()
+        self.events = [
+            {'source_ip': '192.0.2.1', 'protocol': 'HTTP', 'payload_size': 500, 'timestamp': 1000.0, 'port': 80},
+            {'source_ip': '192.0.2.1', 'protocol': 'HTTP', 'payload_size': 520, 'timestamp': 1001.0, 'port': 8080},
+            {'source_ip': '192.0.2.2', 'protocol': 'dns', 'payload_size': 200, 'timestamp': 1002.0, 'port': 53},
+            {'source_ip': '192.0.2.2', 'protocol': 'SSDP', 'payload_size': 6000, 'timestamp': 1004.0, 'port': 1900},
+        ]
+    
+    def test_event_features(self):
+        """Test aggregate values and flags"""
+        features = self.extractor.extract_from_events(self.events)
+        
+        self.assertEqual(features['event_count'], 4)
+        self.assertEqual(features['unique_ips'], 2)
+        self.assertEqual(features['protocol_diversity'], 3)
+        self.assertAlmostEqual(features['events_per_second'], 1.0)
+        self.assertAlmostEqual(features['payload_variance'], np.var([500, 520, 200, 6000]))
+        self.assertEqual(features['ports_per_ip_avg'], 2.0)
+        self.assertEqual(features['dns_ratio'], 0.25)
+        self.assertEqual(features['has_amplification'], 1)
+        self.assertEqual(features['has_high_rate'], 0)
+    
+    def test_record_array_matches_dicts(self):
+        """Test that a record array gives the same features as event dicts"""
+        records = np.array(
+            [(e['source_ip'], e['protocol'], e['payload_size'], e['timestamp'], e['port']) for e in self.events],
+            dtype=[('source_ip', 'U45'), ('protocol', 'U8'), ('payload_size', 'i8'),
+                   ('timestamp', 'f8'), ('port', 'i4')]
+        )
+        
+        self.assertEqual(self.extractor.extract_from_events(records),
+                         self.extractor.extract_from_events(self.events))
+    
+    def test_no_events(self):
+        """Test that an empty batch yields all-zero features"""
+        features = self.extractor.extract_from_events([])
+        
+        self.assertEqual(set(features), set(EVENT_FEATURE_NAMES))
+        self.assertFalse(any(features.values()))
+
 # ============================================================================
 # FEATURE NORMALIZATION TESTS
 # ============================================================================
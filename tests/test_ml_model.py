@@ -5,15 +5,164 @@ Demonstrates feature extraction, model training, and prediction.
 """
 
 import sys
+import tempfile
 from pathlib import Path
 
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).parent))
 
-from ml.features import FeatureExtractor
+from ml.features import FeatureExtractor, EVENT_FEATURE_NAMES
 from ml.train import train_from_database, generate_synthetic_training_data
 from ml.model import get_model
 
 
+# Row templates, bound once; each table is printed with a single write
+_FEATURE_ROW = "  {:30} = {:12.3f}".format
+_VALUE_ROW = "  {:30} = {}".format
+_CLASS_ROW = "  {:15} : {:3d} samples".format
+_METRIC_ROW = "  {:25} = {:.4f}".format
+_METRIC_VALUE_ROW = "  {:25} = {}".format
+_PREDICTION_ROW = "{:25} -> {:15} (confidence: {:.2%})".format
+_IMPORTANCE_ROW = "  {:2}. {:30} : {:.4f}".format
+
+
+def print_rows(rows):
+    """Write a batch of formatted rows with a single print call"""
+    if rows:
+        print("\n".join(rows))
+
+
+# Attack scenarios for test_prediction, as model feature dicts
+TEST_CASES = {
+    'Volumetric Attack': {
+        'event_count': 5000,
+        'unique_ips': 20,
+        'protocol_diversity': 1,
+        'dominant_protocol_ratio': 0.95,
+        'time_span_seconds': 30,
+        'events_per_second': 150,
+        'avg_payload_size': 200,
+        'max_payload_size': 500,
+        'min_payload_size': 100,
+        'payload_variance': 500,
+        'port_diversity': 1,
+        'ports_per_ip_avg': 1,
+        'has_high_rate': 1,
+        'has_amplification': 0,
+        'has_multi_protocol': 0,
+        'has_port_scanning': 0,
+        'http_ratio': 0.95,
+        'dns_ratio': 0.05,
+        'ssdp_ratio': 0,
+        'ntp_ratio': 0,
+    },
+    'Multi-Protocol Attack': {
+        'event_count': 1000,
+        'unique_ips': 15,
+        'protocol_diversity': 4,
+        'dominant_protocol_ratio': 0.35,
+        'time_span_seconds': 60,
+        'events_per_second': 16,
+        'avg_payload_size': 400,
+        'max_payload_size': 1000,
+        'min_payload_size': 100,
+        'payload_variance': 3000,
+        'port_diversity': 10,
+        'ports_per_ip_avg': 8,
+        'has_high_rate': 0,
+        'has_amplification': 0,
+        'has_multi_protocol': 1,
+        'has_port_scanning': 0,
+        'http_ratio': 0.25,
+        'dns_ratio': 0.30,
+        'ssdp_ratio': 0.25,
+        'ntp_ratio': 0.20,
+    },
+    'Amplification Attack': {
+        'event_count': 2000,
+        'unique_ips': 25,
+        'protocol_diversity': 2,
+        'dominant_protocol_ratio': 0.8,
+        'time_span_seconds': 45,
+        'events_per_second': 45,
+        'avg_payload_size': 6000,
+        'max_payload_size': 10000,
+        'min_payload_size': 4000,
+        'payload_variance': 8000,
+        'port_diversity': 3,
+        'ports_per_ip_avg': 2,
+        'has_high_rate': 0,
+        'has_amplification': 1,
+        'has_multi_protocol': 0,
+        'has_port_scanning': 0,
+        'http_ratio': 0.1,
+        'dns_ratio': 0.40,
+        'ssdp_ratio': 0.30,
+        'ntp_ratio': 0.20,
+    },
+    'Sustained Attack': {
+        'event_count': 8000,
+        'unique_ips': 50,
+        'protocol_diversity': 3,
+        'dominant_protocol_ratio': 0.45,
+        'time_span_seconds': 600,
+        'events_per_second': 13,
+        'avg_payload_size': 500,
+        'max_payload_size': 1500,
+        'min_payload_size': 200,
+        'payload_variance': 4000,
+        'port_diversity': 15,
+        'ports_per_ip_avg': 12,
+        'has_high_rate': 0,
+        'has_amplification': 0,
+        'has_multi_protocol': 0,
+        'has_port_scanning': 0,
+        'http_ratio': 0.30,
+        'dns_ratio': 0.25,
+        'ssdp_ratio': 0.20,
+        'ntp_ratio': 0.25,
+    },
+    'Normal Traffic': {
+        'event_count': 20,
+        'unique_ips': 2,
+        'protocol_diversity': 1,
+        'dominant_protocol_ratio': 1.0,
+        'time_span_seconds': 10,
+        'events_per_second': 2,
+        'avg_payload_size': 100,
+        'max_payload_size': 150,
+        'min_payload_size': 50,
+        'payload_variance': 200,
+        'port_diversity': 1,
+        'ports_per_ip_avg': 1,
+        'has_high_rate': 0,
+        'has_amplification': 0,
+        'has_multi_protocol': 0,
+        'has_port_scanning': 0,
+        'http_ratio': 1.0,
+        'dns_ratio': 0,
+        'ssdp_ratio': 0,
+        'ntp_ratio': 0,
+    }
+}
+
+
+def _build_test_matrix(test_cases, feature_names):
+    """(scenario names, float32 matrix with one feature row per scenario)"""
+    name_to_index = {name: i for i, name in enumerate(feature_names)}
+    matrix = np.zeros((len(test_cases), len(feature_names)), dtype=np.float32)
+    for row, feature_dict in enumerate(test_cases.values()):
+        for name, value in feature_dict.items():
+            index = name_to_index.get(name)
+            if index is not None:
+                matrix[row, index] = value
+    return list(test_cases), matrix
+
+
+TEST_CASE_NAMES, TEST_CASE_MATRIX = _build_test_matrix(TEST_CASES, EVENT_FEATURE_NAMES)
+
+
 def test_feature_extraction():
     """Test feature extraction from events"""
     print("\n" + "=" * 60)
@@ -56,13 +205,23 @@ def test_feature_extraction():
     
     features = extractor.extract_from_events(events)
     
+    # The same events as prebuilt columns take the array path directly
+    columns = extractor.extract_from_arrays(
+        np.array([e['source_ip'] for e in events]),
+        np.array([e['protocol'] for e in events]),
+        np.array([e['payload_size'] for e in events]),
+        np.array([e['timestamp'] for e in events]),
+        np.array([e['port'] for e in events]),
+    )
+    assert columns == features
+    assert features['event_count'] == 4 and features['protocol_diversity'] == 3
+    
     print(f"\n✓ Extracted {len(features)} features from {len(events)} events")
     print("\nTop features:")
-    for key, value in list(features.items())[:10]:
-        if isinstance(value, float):
-            print(f"  {key:30} = {value:12.3f}")
-        else:
-            print(f"  {key:30} = {value}")
+    print_rows([
+        _FEATURE_ROW(key, value) if isinstance(value, float) else _VALUE_ROW(key, value)
+        for key, value in list(features.items())[:10]
+    ])
 
 
 def test_synthetic_training():
@@ -75,19 +234,23 @@ def test_synthetic_training():
     print("\nGenerating synthetic training data...")
     X, y, feature_names = generate_synthetic_training_data(200)
     
-    if not X:
+    if len(X) == 0:
         print("⚠ Synthetic data generation failed (NumPy not installed)")
         return
     
-    print(f"✓ Generated {len(X)} training samples with {len(feature_names)} features")
+    print(f"✓ Generated {X.shape[0]} training samples with {len(feature_names)} features")
+    assert X.shape == (200, len(feature_names))
+    assert len(y) == 200
+    assert list(y[:5]) == [0, 1, 2, 3, 4]
+    
+    X_empty, y_empty, _ = generate_synthetic_training_data(0)
+    assert X_empty.shape == (0, len(feature_names)) and len(y_empty) == 0
     
     # Show class distribution
-    from collections import Counter
     class_names = {0: 'volumetric', 1: 'multi_protocol', 2: 'amplification', 3: 'sustained', 4: 'normal'}
-    class_dist = Counter(y)
+    class_counts = np.bincount(y, minlength=len(class_names))
     print("\nClass distribution:")
-    for class_id, count in sorted(class_dist.items()):
-        print(f"  {class_names[class_id]:15} : {count:3d} samples")
+    print_rows([_CLASS_ROW(class_names[class_id], count) for class_id, count in enumerate(class_counts)])
     
     # Train model
     print("\nTraining model...")
@@ -100,12 +263,11 @@ def test_synthetic_training():
     
     print("\n✓ Model trained successfully")
     print("\nTraining metrics:")
-    for key, value in metrics.items():
-        if key not in ['timestamp']:
-            if isinstance(value, float):
-                print(f"  {key:25} = {value:.4f}")
-            else:
-                print(f"  {key:25} = {value}")
+    print_rows([
+        _METRIC_ROW(key, value) if isinstance(value, float) else _METRIC_VALUE_ROW(key, value)
+        for key, value in metrics.items()
+        if key not in ['timestamp']
+    ])
 
 
 def test_prediction():
@@ -114,134 +276,95 @@ def test_prediction():
     print("TEST 3: Attack Classification & Prediction")
     print("=" * 60)
     
-    extractor = FeatureExtractor()
     model = get_model()
-    feature_names = extractor.get_feature_names()
-    
-    # Create test cases
-    test_cases = {
-        'Volumetric Attack': {
-            'event_count': 5000,
-            'unique_ips': 20,
-            'protocol_diversity': 1,
-            'dominant_protocol_ratio': 0.95,
-            'time_span_seconds': 30,
-            'events_per_second': 150,
-            'avg_payload_size': 200,
-            'max_payload_size': 500,
-            'min_payload_size': 100,
-            'payload_variance': 500,
-            'port_diversity': 1,
-            'ports_per_ip_avg': 1,
-            'has_high_rate': 1,
-            'has_amplification': 0,
-            'has_multi_protocol': 0,
-            'has_port_scanning': 0,
-            'http_ratio': 0.95,
-            'dns_ratio': 0.05,
-            'ssdp_ratio': 0,
-            'ntp_ratio': 0,
-        },
-        'Multi-Protocol Attack': {
-            'event_count': 1000,
-            'unique_ips': 15,
-            'protocol_diversity': 4,
-            'dominant_protocol_ratio': 0.35,
-            'time_span_seconds': 60,
-            'events_per_second': 16,
-            'avg_payload_size': 400,
-            'max_payload_size': 1000,
-            'min_payload_size': 100,
-            'payload_variance': 3000,
-            'port_diversity': 10,
-            'ports_per_ip_avg': 8,
-            'has_high_rate': 0,
-            'has_amplification': 0,
-            'has_multi_protocol': 1,
-            'has_port_scanning': 0,
-            'http_ratio': 0.25,
-            'dns_ratio': 0.30,
-            'ssdp_ratio': 0.25,
-            'ntp_ratio': 0.20,
-        },
-        'Amplification Attack': {
-            'event_count': 2000,
-            'unique_ips': 25,
-            'protocol_diversity': 2,
-            'dominant_protocol_ratio': 0.8,
-            'time_span_seconds': 45,
-            'events_per_second': 45,
-            'avg_payload_size': 6000,
-            'max_payload_size': 10000,
-            'min_payload_size': 4000,
-            'payload_variance': 8000,
-            'port_diversity': 3,
-            'ports_per_ip_avg': 2,
-            'has_high_rate': 0,
-            'has_amplification': 1,
-            'has_multi_protocol': 0,
-            'has_port_scanning': 0,
-            'http_ratio': 0.1,
-            'dns_ratio': 0.40,
-            'ssdp_ratio': 0.30,
-            'ntp_ratio': 0.20,
-        },
-        'Sustained Attack': {
-            'event_count': 8000,
-            'unique_ips': 50,
-            'protocol_diversity': 3,
-            'dominant_protocol_ratio': 0.45,
-            'time_span_seconds': 600,
-            'events_per_second': 13,
-            'avg_payload_size': 500,
-            'max_payload_size': 1500,
-            'min_payload_size': 200,
-            'payload_variance': 4000,
-            'port_diversity': 15,
-            'ports_per_ip_avg': 12,
-            'has_high_rate': 0,
-            'has_amplification': 0,
-            'has_multi_protocol': 0,
-            'has_port_scanning': 0,
-            'http_ratio': 0.30,
-            'dns_ratio': 0.25,
-            'ssdp_ratio': 0.20,
-            'ntp_ratio': 0.25,
-        },
-        'Normal Traffic': {
-            'event_count': 20,
-            'unique_ips': 2,
-            'protocol_diversity': 1,
-            'dominant_protocol_ratio': 1.0,
-            'time_span_seconds': 10,
-            'events_per_second': 2,
-            'avg_payload_size': 100,
-            'max_payload_size': 150,
-            'min_payload_size': 50,
-            'payload_variance': 200,
-            'port_diversity': 1,
-            'ports_per_ip_avg': 1,
-            'has_high_rate': 0,
-            'has_amplification': 0,
-            'has_multi_protocol': 0,
-            'has_port_scanning': 0,
-            'http_ratio': 1.0,
-            'dns_ratio': 0,
-            'ssdp_ratio': 0,
-            'ntp_ratio': 0,
-        }
-    }
     
-    print(f"\n✓ Testing predictions on {len(test_cases)} scenarios\n")
+    # Every scenario input must land in a model column rather than be dropped
+    assert all(set(features) <= set(EVENT_FEATURE_NAMES) for features in TEST_CASES.values())
+    
+    print(f"\n✓ Testing predictions on {len(TEST_CASE_NAMES)} scenarios\n")
+    
+    # All scenarios in one call
+    predictions = model.predict_batch(TEST_CASE_MATRIX)
+    assert len(predictions) == len(TEST_CASE_NAMES)
+    if model.is_trained and model.feature_names == list(EVENT_FEATURE_NAMES):
+        assert {attack_type for attack_type, _ in predictions} - {'normal'}
     
-    for test_name, feature_dict in test_cases.items():
-        # Convert feature dict to vector
-        feature_vector = [feature_dict.get(name, 0) for name in feature_names]
+    print_rows([
+        _PREDICTION_ROW(test_name, attack_type, confidence)
+        for test_name, (attack_type, confidence) in zip(TEST_CASE_NAMES, predictions)
+    ])
+
+
+def test_batch_prediction_matches_single():
+    """Test that one batched prediction gives the same results as per-vector calls"""
+    from ml.model import AttackClassifier, SKLEARN_AVAILABLE
+    
+    X, y, feature_names = generate_synthetic_training_data(200)
+    if len(X) == 0 or not SKLEARN_AVAILABLE:
+        print("⚠ Skipping batch prediction check (NumPy or scikit-learn not installed)")
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        model = AttackClassifier(model_path=str(Path(tmp) / 'model.pkl'))
+        model.train(X, y, feature_names)
         
-        # Predict
-        attack_type, confidence = model.predict(feature_vector)
+        vectors = list(X[:25]) + [[0.0] * 3]  # Wrong-length vectors fall back to normal
+        assert model.predict_batch(vectors) == [model.predict(v) for v in vectors]
+        assert model.predict_batch(vectors)[-1] == ('normal', 0.0)
+        assert {attack_type for attack_type, _ in model.predict_batch(X[:25])} - {'normal'}
+        assert model.predict_batch([]) == []
+        # Small batches predict on a single thread
+        assert model.model.n_jobs == 1
+
+
+def test_hgbt_backend():
+    """Test the histogram gradient boosting backend end to end"""
+    from ml.model import AttackClassifier, SKLEARN_AVAILABLE
+    
+    X, y, feature_names = generate_synthetic_training_data(200)
+    if len(X) == 0 or not SKLEARN_AVAILABLE:
+        print("⚠ Skipping HGBT backend check (NumPy or scikit-learn not installed)")
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'model.pkl')
+        model = AttackClassifier(model_path=path, backend='hgbt')
+        metrics = model.train(X, y, feature_names)
         
-        print(f"{test_name:25} -> {attack_type:15} (confidence: {confidence:.2%})")
+        assert 'error' not in metrics
+        assert model.predict_batch(X[:10]) == [model.predict(v) for v in X[:10]]
+        importance = model.get_feature_importance()
+        assert set(importance) == set(feature_names)
+        # Permutation importances are saved with the model
+        assert AttackClassifier(model_path=path).get_feature_importance() == importance
+
+
+def test_train_from_database(tmp_path, monkeypatch):
+    """Test training on synthetic data plus events from a populated database"""
+    from core.database import HoneypotDatabase
+    from ml.model import AttackClassifier, SKLEARN_AVAILABLE
+    import ml.train
+    
+    if not SKLEARN_AVAILABLE:
+        print("⚠ Skipping database training check (scikit-learn not installed)")
+        return
+    
+    db_path = str(tmp_path / 'honeypot.db')
+    db = HoneypotDatabase(db_path)
+    db.add_events_bulk([
+        ('192.0.2.1', 80, 'HTTP', 500, 'attack', 1000.0 + i) for i in range(3)
+    ] + [
+        ('192.0.2.2', 53, 'DNS', 6000, 'attack', 1000.0 + i) for i in range(2)
+    ])
+    db.close()
+    
+    model = AttackClassifier(model_path=str(tmp_path / 'model.pkl'))
+    monkeypatch.setattr(ml.train, 'get_model', lambda: model)
+    metrics = train_from_database(db_path=db_path)
+    
+    assert 'error' not in metrics
+    assert model.is_trained
+    assert model.feature_names == list(EVENT_FEATURE_NAMES)
 
 
 def test_feature_importance():
@@ -264,8 +387,10 @@ def test_feature_importance():
     
     print("\n✓ Top 10 most important features:\n")
     sorted_features = sorted(importance.items(), key=lambda x: x[1], reverse=True)
-    for i, (feature, score) in enumerate(sorted_features[:10], 1):
-        print(f"  {i:2}. {feature:30} : {score:.4f}")
+    print_rows([
+        _IMPORTANCE_ROW(i, feature, score)
+        for i, (feature, score) in enumerate(sorted_features[:10], 1)
+    ])
 
 
 def main():
@@ -294,14 +419,14 @@ Available Features:
   - Attack type classification (5 classes)
   - Feature importance analysis
   - Model persistence (pickle)
-  
+
 Attack Types Supported:
   1. Volumetric   - High rate attacks (floods)
   2. Multi-Protocol - Coordinated multi-protocol attacks
   3. Amplification - Large payload attacks (reflection)
   4. Sustained    - Long-duration attacks
   5. Normal       - Benign traffic
-  
+
 Next Steps:
   1. Train on real honeypot data: python3 ml/train.py
   2. Integrate into server: core/server.py
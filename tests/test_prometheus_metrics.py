@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for telemetry.prometheus_metrics.PrometheusMetrics.
+"""
+
+import time
+
+from telemetry.prometheus_metrics import PrometheusMetrics
+
+
+def sample(metrics, name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+
+def test_attack_events_are_batched_until_flush():
+    metrics = PrometheusMetrics()
+    metrics.FLUSH_INTERVAL_SECONDS = 3600
+    
+    for _ in range(5):
+        metrics.record_attack_event("HTTP", "attack", 100)
+    metrics.record_attack_event("DNS", "udp_data", 40)
+    assert sample(metrics, "ddospot_attack_events_total", protocol="HTTP", event_type="attack") == 0
+    
+    output = metrics.get_metrics().decode()
+    assert 'ddospot_attack_events_total{event_type="attack",protocol="HTTP"} 5.0' in output
+    assert sample(metrics, "ddospot_attack_bytes_total", protocol="HTTP") == 500
+    assert sample(metrics, "ddospot_attack_bytes_total", protocol="DNS") == 40
+
+
+def test_attack_events_flush_after_interval():
+    metrics = PrometheusMetrics()
+    metrics.FLUSH_INTERVAL_SECONDS = 0
+    
+    metrics.record_attack_event("SSH", "tcp_data", 10)
+    assert sample(metrics, "ddospot_attack_events_total", protocol="SSH", event_type="tcp_data") == 1
+
+
+def test_label_values_are_bounded():
+    metrics = PrometheusMetrics()
+    
+    metrics.record_attack_event("HTTP", "<script>", 1)
+    metrics.record_http_request("BREW", "index", 418, 0.01)
+    metrics.record_http_request("GET", "index", 204, 0.01)
+    metrics.record_alert("discord", "high", success=False, reason="HTTP 500 from webhook")
+    metrics.flush_attack_events()
+    
+    assert sample(metrics, "ddospot_attack_events_total", protocol="HTTP", event_type="other") == 1
+    assert sample(metrics, "ddospot_http_requests_total", method="other", endpoint="index", status="4xx") == 1
+    assert sample(metrics, "ddospot_http_requests_total", method="GET", endpoint="index", status="2xx") == 1
+    assert sample(metrics, "ddospot_alerts_failed_total", channel="discord") == 1
+
+
+def test_labelled_children_are_memoized():
+    metrics = PrometheusMetrics()
+    
+    for _ in range(3):
+        metrics.record_http_request("GET", "index", 200, 0.01)
+    
+    child = metrics._labels(metrics.http_requests_total, "GET", "index", "2xx")
+    assert child is metrics.http_requests_total.labels(method="GET", endpoint="index", status="2xx")
+    assert sample(metrics, "ddospot_http_requests_total", method="GET", endpoint="index", status="2xx") == 3
+
+
+def test_system_gauges_sampled_in_background(monkeypatch):
+    monkeypatch.setattr(PrometheusMetrics, "SAMPLE_INTERVAL_SECONDS", 0.01)
+    metrics = PrometheusMetrics()
+    try:
+        assert sample(metrics, "ddospot_memory_usage_bytes") > 0
+        calls = []
+        monkeypatch.setattr(metrics, "update_system_metrics", lambda: calls.append(1))
+        for _ in range(100):
+            if calls:
+                break
+            time.sleep(0.01)
+        assert calls
+    finally:
+        metrics.stop_sampler()
+
+
+def test_zero_byte_events_skip_bytes_counter():
+    metrics = PrometheusMetrics()
+    
+    metrics.record_attack_event("TCP", "timeout", 0)
+    output = metrics.get_metrics().decode()
+    
+    assert 'ddospot_attack_events_total{event_type="timeout",protocol="TCP"} 1.0' in output
+    assert 'ddospot_attack_bytes_total{protocol="TCP"}' not in output
+
+
+def test_scrapes_within_ttl_share_snapshot():
+    metrics = PrometheusMetrics()
+    metrics.SNAPSHOT_TTL_SECONDS = 3600
+    
+    first = metrics.get_metrics()
+    metrics.record_attack_event("HTTP", "attack", 10)
+    assert metrics.get_metrics() is first
+    
+    metrics.SNAPSHOT_TTL_SECONDS = 0
+    assert b'protocol="HTTP"' in metrics.get_metrics()
+
+
+def test_protocol_recorders_are_memoized():
+    metrics = PrometheusMetrics()
+    metrics.FLUSH_INTERVAL_SECONDS = 3600
+    
+    record_udp = metrics.recorder_for("udp")
+    assert metrics.recorder_for("udp") is record_udp
+    
+    record_udp("udp_data", 64)
+    record_udp("bogus", 0)
+    metrics.record_attack_event("udp", "udp_data", 16)
+    metrics.flush_attack_events()
+    
+    assert sample(metrics, "ddospot_attack_events_total", protocol="udp", event_type="udp_data") == 2
+    assert sample(metrics, "ddospot_attack_events_total", protocol="udp", event_type="other") == 1
+    assert sample(metrics, "ddospot_attack_bytes_total", protocol="udp") == 80
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Tests for telemetry.threat_intelligence.
+"""
+
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from telemetry import threat_intelligence
+from telemetry.threat_intelligence import BotnetDetector, IPReputationScorer, ThreatFeedMatcher, WHOISLookup
+
+
+class TestWHOISLookup:
+    """Tests for WHOISLookup caching"""
+    
+    def _lookup(self, monkeypatch, **kwargs):
+        whois = WHOISLookup(**kwargs)
+        calls = []
+        monkeypatch.setattr(whois, '_perform_whois', lambda ip, hostname=None: calls.append(ip) or {'ip': ip})
+        return whois, calls
+    
+    def test_cache_is_lru_bounded(self, monkeypatch):
+        """Test that the least recently used entry is evicted at capacity"""
+        monkeypatch.setattr(threat_intelligence._ShardedCache, 'SHARDS', 1)
+        monkeypatch.setattr(WHOISLookup, 'MAX_CACHE_ENTRIES', 2)
+        whois, calls = self._lookup(monkeypatch)
+        
+        whois.lookup('192.0.2.1')
+        whois.lookup('192.0.2.2')
+        whois.lookup('192.0.2.1')  # hit; 192.0.2.2 becomes least recently used
+        whois.lookup('2001:db8::1')
+        whois.lookup('192.0.2.1')
+        whois.lookup('192.0.2.2')
+        
+        assert calls == ['192.0.2.1', '192.0.2.2', '2001:db8::1', '192.0.2.2']
+        assert len(whois.cache) == 2
+    
+    def test_expired_entries_are_refreshed_and_pruned(self, monkeypatch):
+        """Test TTL expiry on hit and heap-driven pruning on insert"""
+        whois, calls = self._lookup(monkeypatch, cache_timeout=0)
+        
+        whois.lookup('192.0.2.1')
+        whois.lookup('192.0.2.1')
+        whois.lookup('localhost')
+        
+        assert calls == ['192.0.2.1', '192.0.2.1', 'localhost']
+        assert len(whois.cache) <= 1
+    
+    def test_cache_is_sharded_by_ip(self, monkeypatch):
+        """Test that different IPs land in independently locked shards"""
+        whois, calls = self._lookup(monkeypatch)
+        
+        for i in range(64):
+            whois.lookup(f'192.0.2.{i}')
+        whois.lookup('192.0.2.5')
+        
+        assert len(calls) == 64
+        assert all(len(shard.entries) == 4 for shard in whois.cache._shards)
+        assert len({id(shard.lock) for shard in whois.cache._shards}) == 16
+    
+    def test_cache_keys_are_integers(self):
+        """Test that IPv4 and IPv6 keys are ints in disjoint ranges"""
+        assert threat_intelligence._ip_key('1.2.3.4') == 0x01020304
+        assert threat_intelligence._ip_key('::1') == (1 << 128) | 1
+        assert threat_intelligence._ip_key('::ffff:1.2.3.4') != threat_intelligence._ip_key('1.2.3.4')
+        # Shorthand and malformed addresses are not parsed, matching ipaddress
+        assert threat_intelligence._ip_key('127.1') == '127.1'
+        assert threat_intelligence._ip_key('1.2.3.04') == '1.2.3.04'
+    
+    def test_network_estimate_from_first_octet(self, monkeypatch):
+        """Test the precomputed ASN / organization / country table"""
+        monkeypatch.setattr(threat_intelligence.socket, 'gethostbyaddr', lambda ip: ('host.example',))
+        whois = WHOISLookup()
+        
+        data = whois.lookup('45.33.32.156')
+        assert (data['asn'], data['organization'], data['country']) == ('AS15169', 'Google LLC', 'DE')
+        assert whois._estimate_network('9.9.9.9') == ('AS16509', 'Amazon Web Services', 'US')
+        assert whois._estimate_network('2001:db8::1') == ('AS0', 'Unknown', 'XX')
+        assert whois.lookup('not.an-ip') is None
+    
+    def test_lookup_many_resolves_concurrently(self, monkeypatch):
+        """Test batched reverse DNS: overlapping resolutions, cache hits and timeouts"""
+        monkeypatch.setattr(WHOISLookup, 'RDNS_TIMEOUT_SECONDS', 0.5)
+        hang = threading.Event()
+        
+        def gethostbyaddr(ip):
+            if ip == '192.0.2.99':
+                hang.wait(5)
+            time.sleep(0.1)
+            return (f'host-{ip}',)
+        
+        monkeypatch.setattr(threat_intelligence.socket, 'gethostbyaddr', gethostbyaddr)
+        whois = WHOISLookup()
+        whois.lookup('192.0.2.0')
+        ips = [f'192.0.2.{i}' for i in range(10)] + ['192.0.2.99']
+        
+        started = time.monotonic()
+        results = whois.lookup_many(ips)
+        elapsed = time.monotonic() - started
+        hang.set()
+        
+        assert elapsed < 0.9
+        assert results['192.0.2.5']['hostname'] == 'host-192.0.2.5'
+        assert results['192.0.2.99']['hostname'] == 'Unknown'
+        assert list(results) == ['192.0.2.0'] + ips[1:]
+    
+    def test_failed_batch_releases_its_claims(self, monkeypatch):
+        """Test that a reverse DNS failure leaves no claim behind for later lookups"""
+        monkeypatch.setattr(WHOISLookup, 'INFLIGHT_WAIT_SECONDS', 5)
+        whois, calls = self._lookup(monkeypatch)
+        
+        def fail(ips):
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        
+        monkeypatch.setattr(whois, '_reverse_dns', fail)
+        with pytest.raises(RuntimeError):
+            whois.lookup_many(['192.0.2.1', '192.0.2.2'])
+        assert not any(shard.inflight for shard in whois.cache._shards)
+        
+        started = time.monotonic()
+        assert whois.lookup('192.0.2.1') == {'ip': '192.0.2.1'}
+        assert time.monotonic() - started < 1
+    
+    def test_concurrent_misses_share_one_lookup(self, monkeypatch):
+        """Test single-flight: callers racing on a new IP wait for the first lookup"""
+        whois = WHOISLookup()
+        calls = []
+        
+        def perform(ip, hostname=None):
+            calls.append(ip)
+            time.sleep(0.2)
+            return {'ip': ip}
+        
+        monkeypatch.setattr(whois, '_perform_whois', perform)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(whois.lookup('192.0.2.1'))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert calls == ['192.0.2.1']
+        assert results == [{'ip': '192.0.2.1'}] * 20
+        assert not any(shard.inflight for shard in whois.cache._shards)
+    
+    def test_lock_free_reads_survive_concurrent_eviction(self, monkeypatch):
+        """Test readers racing with puts that evict at a tiny capacity"""
+        monkeypatch.setattr(WHOISLookup, 'MAX_CACHE_ENTRIES', 16)
+        whois, calls = self._lookup(monkeypatch)
+        errors = []
+        
+        def worker(offset):
+            try:
+                for i in range(2000):
+                    ip = f'198.51.100.{(i * 7 + offset) % 40}'
+                    assert whois.lookup(ip) == {'ip': ip}
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert len(whois.cache) <= 16 + whois.cache.SHARDS
+
+
+class TestThreatFeedMatcher:
+    """Tests for ThreatFeedMatcher"""
+    
+    def _matcher(self, **feed_ips):
+        matcher = ThreatFeedMatcher()
+        for feed in matcher.threat_feeds:
+            feed['ips'] = feed_ips.get(feed['name'].split()[0], set())
+        matcher.index_feeds()
+        return matcher
+    
+    def test_exact_and_cidr_entries_match(self):
+        """Test single addresses and CIDR blocks, IPv4 and IPv6"""
+        matcher = self._matcher(Spamhaus={'203.0.113.0/24', '2001:db8::/32'}, NIST={'203.0.113.7'})
+        
+        assert [m['feed'] for m in matcher.check_ip('203.0.113.7')] == ['NIST Botnet IPs', 'Spamhaus DROP']
+        assert [m['feed'] for m in matcher.check_ip('203.0.113.200')] == ['Spamhaus DROP']
+        assert [m['feed'] for m in matcher.check_ip('2001:db8::1')] == ['Spamhaus DROP']
+        assert not matcher.check_ip('198.51.100.1')
+    
+    def test_feed_listed_in_nested_prefixes_matches_once(self):
+        """Test that a feed covering an IP through several prefixes is reported once"""
+        matcher = self._matcher(AbuseCH={'10.0.0.0/8', '10.1.0.0/16'})
+        
+        assert [m['feed'] for m in matcher.check_ip('10.1.2.3')] == ['AbuseCH URLhaus']
+    
+    def test_distinct_feeds_with_equal_contents_both_match(self):
+        """Test that feeds are told apart by identity, not by comparing their contents"""
+        matcher = ThreatFeedMatcher()
+        mirror = dict(matcher.threat_feeds[0], ips={'192.0.2.0/24'})
+        matcher.threat_feeds[:] = [mirror, dict(mirror)]
+        matcher.index_feeds()
+        
+        assert len(matcher.check_ip('192.0.2.1')) == 2
+    
+    def test_coarse_filter_skips_prefix_probes_for_benign_ips(self, monkeypatch):
+        """Test that IPs outside every indexed block never reach the per-length tables"""
+        matcher = self._matcher(Spamhaus={'10.0.0.0/8'}, NIST={'203.0.113.7', '10.9.9.9'})
+        probed = []
+        
+        class Probe(dict):
+            def get(self, key, default=None):
+                probed.append(key)
+                return super().get(key, default)
+        
+        for version, lengths in matcher._prefixes.items():
+            monkeypatch.setitem(matcher._prefixes, version, [(n, Probe(t)) for n, t in lengths])
+        
+        assert not matcher.check_ip('198.51.100.1')
+        assert probed == []
+        assert [m['feed'] for m in matcher.check_ip('10.9.9.9')] == ['NIST Botnet IPs', 'Spamhaus DROP']
+        assert [m['feed'] for m in matcher.check_ip('203.0.113.7')] == ['NIST Botnet IPs']
+        assert not matcher.check_ip('203.0.113.8')
+    
+    def test_invalid_input_is_ignored(self):
+        """Test malformed feed entries and lookups"""
+        matcher = self._matcher(Spamhaus={'not-an-ip', '192.0.2.0/24'})
+        
+        assert matcher.check_ip('192.0.2.1')[0]['feed'] == 'Spamhaus DROP'
+        assert not matcher.check_ip('garbage')
+    
+    def test_known_threat_ips_still_reported(self):
+        """Test that the internal list is checked alongside the feeds"""
+        matcher = ThreatFeedMatcher()
+        
+        assert matcher.check_ip('192.168.1.100')[0]['feed'] == 'Internal Threat List'
+    
+    def test_misses_share_one_empty_result(self):
+        """Test that clean IPs get the shared empty tuple, with or without feed entries"""
+        empty = self._matcher()
+        populated = self._matcher(Spamhaus={'203.0.113.0/24'})
+        
+        assert empty.check_ip('198.51.100.1') is threat_intelligence._EMPTY
+        assert populated.check_ip('198.51.100.1') is threat_intelligence._EMPTY
+
+
+class TestIPReputationScorer:
+    """Tests for IPReputationScorer"""
+    
+    def test_factor_thresholds_are_exclusive(self):
+        """Test that each ladder awards the next tier only strictly above a threshold"""
+        scorer = IPReputationScorer()
+        
+        _, at = scorer.calculate_score('198.51.100.1', {
+            'total_events': 1000, 'protocols_used': {'a', 'b', 'c'}, 'events_per_minute': 10,
+        })
+        _, above = scorer.calculate_score('198.51.100.1', {
+            'total_events': 1001, 'protocols_used': {'a', 'b', 'c', 'd'}, 'events_per_minute': 10.5,
+        })
+        
+        assert (at['attack_volume'], at['attack_diversity'], at['attack_rate']) == (30, 10, 10)
+        assert (above['attack_volume'], above['attack_diversity'], above['attack_rate']) == (40, 15, 15)
+    
+    def test_score_combines_all_factors(self):
+        """Test known-threat and country points on top of the ladders"""
+        scorer = IPReputationScorer()
+        
+        score, factors = scorer.calculate_score('192.168.1.100', {'country': 'KP'})
+        
+        assert factors == {
+            'attack_volume': 5, 'attack_diversity': 0, 'attack_rate': 0,
+            'known_threats': 15, 'country_threat': 5, 'final_score': 25,
+        }
+        assert score == 25
+    
+    def test_batch_scores_match_single_scores(self):
+        """Test that calculate_scores_batch agrees with calculate_score"""
+        scorer = IPReputationScorer()
+        items = [
+            ('192.168.1.100', {'total_events': 1001, 'protocols_used': {'HTTP', 'DNS'}, 'country': 'IR'}),
+            ('198.51.100.1', {'total_events': 100, 'events_per_minute': 100.5}),
+            ('198.51.100.2', {}),
+        ]
+        
+        assert scorer.calculate_scores_batch(items) == [scorer.calculate_score(ip, p)[0] for ip, p in items]
+        assert scorer.calculate_scores_batch([]) == []
+    
+    def test_threat_level_and_color_bands(self):
+        """Test band edges for table lookups and for off-table scores"""
+        scorer = IPReputationScorer()
+        
+        assert [scorer.get_threat_level(s) for s in (0, 19, 20, 59, 60, 79, 80, 100)] == [
+            'minimal', 'minimal', 'low', 'medium', 'high', 'high', 'critical', 'critical']
+        assert scorer.get_score_color(80) == '#f44336'
+        assert scorer.get_score_color(19) == '#4caf50'
+        # Floats and out-of-range scores fall back to the thresholds
+        assert scorer.get_threat_level(79.5) == 'high'
+        assert scorer.get_threat_level(-1) == 'minimal'
+        assert scorer.get_score_color(150) == '#f44336'
+    
+    def test_lookup_tables_are_read_only(self):
+        """Test that the module's threat tables cannot be modified at runtime"""
+        with pytest.raises(TypeError):
+            threat_intelligence.KNOWN_THREAT_IPS['203.0.113.1'] = {'name': 'x', 'confidence': 1.0}
+        with pytest.raises(TypeError):
+            threat_intelligence.KNOWN_THREAT_IPS['10.0.0.1']['confidence'] = 0.1
+        with pytest.raises(TypeError):
+            threat_intelligence.COUNTRY_THREAT_LEVELS['US'] = 'critical'
+
+
+class TestBotnetDetector:
+    """Tests for BotnetDetector"""
+    
+    def _profile(self, payload, attack_type='flood', protocols=('DNS',)):
+        return {'protocols_used': list(protocols), 'avg_payload_size': payload,
+                'events_per_minute': 10, 'attack_type': attack_type}
+    
+    def test_similar_signature_in_neighbouring_bucket_matches(self):
+        """Test that matches across a payload bucket boundary are still found"""
+        detector = BotnetDetector()
+        
+        assert detector.analyze_attack_pattern('192.0.2.1', self._profile(480)) is None
+        match = detector.analyze_attack_pattern('192.0.2.2', self._profile(520))
+        
+        assert match['similar_to'] == '192.0.2.1'
+        assert match['confidence'] > 0.8
+    
+    def test_dissimilar_signatures_are_stored(self):
+        """Test that other attack types or distant payloads never match"""
+        detector = BotnetDetector()
+        
+        detector.analyze_attack_pattern('192.0.2.1', self._profile(100))
+        assert detector.analyze_attack_pattern('192.0.2.2', self._profile(100, attack_type='scan')) is None
+        assert detector.analyze_attack_pattern('192.0.2.3', self._profile(700)) is None
+        assert list(detector.ip_signatures) == ['192.0.2.1', '192.0.2.2', '192.0.2.3']
+    
+    def test_earliest_stored_match_is_reported(self):
+        """Test that the first-seen similar IP wins, as with a full scan"""
+        detector = BotnetDetector()
+        
+        detector.analyze_attack_pattern('192.0.2.1', self._profile(560, protocols=('DNS', 'NTP')))
+        detector.analyze_attack_pattern('192.0.2.2', self._profile(420, protocols=('DNS', 'SSDP')))
+        assert len(detector.ip_signatures) == 2
+        
+        # Similar to both; the later one sits in the same payload bucket
+        match = detector.analyze_attack_pattern('192.0.2.3', self._profile(480, protocols=('DNS', 'NTP', 'SSDP')))
+        assert match['similar_to'] == '192.0.2.1'
+    
+    def test_signatures_are_capped_least_recently_seen_first(self, monkeypatch):
+        """Test that the signature store evicts the least recently seen IP"""
+        monkeypatch.setattr(BotnetDetector, 'MAX_SIGNATURES', 2)
+        detector = BotnetDetector()
+        
+        detector.analyze_attack_pattern('192.0.2.1', self._profile(100))
+        detector.analyze_attack_pattern('192.0.2.2', self._profile(1000))
+        detector.analyze_attack_pattern('192.0.2.9', self._profile(120))  # matches .1, refreshing it
+        detector.analyze_attack_pattern('192.0.2.3', self._profile(2000))
+        
+        assert list(detector.ip_signatures) == ['192.0.2.1', '192.0.2.3']
+        assert detector.ip_signatures['192.0.2.3'].avg_payload == 2000
+        assert sum(len(bucket) for bucket in detector._buckets.values()) == 2
+
+
+class TestThreatIntelligenceManager:
+    """Tests for ThreatIntelligenceManager"""
+    
+    def test_indicators_for_clean_and_hostile_profiles(self, monkeypatch):
+        """Test that indicators are only built when a rule fires"""
+        monkeypatch.setattr(threat_intelligence.socket, 'gethostbyaddr', lambda ip: ('host.example',))
+        manager = threat_intelligence.ThreatIntelligenceManager()
+        
+        clean = manager.get_threat_profile('198.51.100.1', {'total_events': 1, 'protocols_used': {'HTTP'}})
+        hostile = manager.get_threat_profile('192.168.1.100', {
+            'total_events': 5000, 'protocols_used': {'HTTP', 'DNS', 'NTP'}, 'events_per_minute': 500,
+        })
+        
+        assert clean['indicators'] is threat_intelligence._EMPTY
+        assert [i['type'] for i in hostile['indicators']] == [
+            'high_reputation_score', 'known_threat', 'high_attack_rate', 'multi_protocol_attack',
+        ]
+    
+    def test_profile_miss_parses_the_ip_once(self, monkeypatch):
+        """Test that the manager's cache key is reused for the WHOIS and feed lookups"""
+        monkeypatch.setattr(threat_intelligence.socket, 'gethostbyaddr', lambda ip: ('host.example',))
+        parse = threat_intelligence._parse_ip
+        parsed = []
+        monkeypatch.setattr(threat_intelligence, '_parse_ip', lambda ip: parsed.append(ip) or parse(ip))
+        manager = threat_intelligence.ThreatIntelligenceManager()
+        manager.threat_feed.threat_feeds[0]['ips'] = {'2001:db8::/32'}
+        manager.threat_feed.index_feeds()
+        
+        profile = manager.get_threat_profile('2001:db8::1', {'total_events': 1, 'protocols_used': {'HTTP'}})
+        
+        assert parsed == ['2001:db8::1']
+        assert [m['feed'] for m in profile['threat_feeds']] == ['Spamhaus DROP']
+    
+    def test_cache_is_keyed_on_attack_profile(self, monkeypatch):
+        """Test that a changed attack profile is rescored while an unchanged one is cached"""
+        monkeypatch.setattr(threat_intelligence.socket, 'gethostbyaddr', lambda ip: ('host.example',))
+        manager = threat_intelligence.ThreatIntelligenceManager()
+        quiet = {'total_events': 1, 'protocols_used': {'HTTP'}}
+        
+        first = manager.get_threat_profile('198.51.100.1', quiet)
+        again = manager.get_threat_profile('198.51.100.1', dict(quiet, protocols_used=['HTTP']))
+        flood = manager.get_threat_profile('198.51.100.1', dict(quiet, total_events=5000, events_per_minute=500))
+        
+        assert again is first
+        assert flood['reputation_score'] > first['reputation_score']
+        assert [i['type'] for i in flood['indicators']] == ['high_attack_rate']
+    
+    def test_timestamps_are_cached_per_second(self, monkeypatch):
+        """Test that ISO timestamps are formatted once per wall-clock second"""
+        clock = iter([1700000000.1, 1700000000.9, 1700000001.2])
+        monkeypatch.setattr(threat_intelligence, 'time', SimpleNamespace(time=lambda: next(clock)))
+        monkeypatch.setattr(threat_intelligence, '_iso_cache', (None, ''))
+        
+        first, second, third = (threat_intelligence._now_iso() for _ in range(3))
+        
+        assert first is second
+        assert datetime.fromisoformat(third) == datetime.fromtimestamp(1700000001)
@@ -4,9 +4,24 @@ Command-line utility for querying and analyzing honeypot attack data.
 """
 
 import sys
-import argparse
 from datetime import datetime, timedelta
-from core.database import HoneypotDatabase
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Runtime import is deferred to run_command
+    from core.database import HoneypotDatabase
+
+
+# Database opened when --db is not given, by the parser and the fast path alike
+DEFAULT_DB = "honeypot.db"
+
+
+# Fixed-width row templates, bound once instead of re-parsing f-string specs per row
+_ATTACKER_ROW = "{:<15} {:<10} {:<15} {:<10.1f} {:<20}".format
+_BLACKLIST_ROW = "{:<15} {:<20} {:<10} {:<20}".format
+_EVENT_ROW = "{:<20} {:<15} {:<6} {:<10} {:<8} {:<15}".format
+_SEVERITY_ROW = "{:<15} {:<10} {:<10.1f} {:<15} {:<20}".format
+_PROFILE_EVENT_ROW = "  {ts} | Port: {port:<6} | Proto: {proto:<6} | Size: {size} bytes".format
 
 
 def format_timestamp(timestamp: float) -> str:
@@ -14,7 +29,13 @@ def format_timestamp(timestamp: float) -> str:
     return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
 
-def cmd_stats(db: HoneypotDatabase, hours: int = 24):
+def print_rows(rows):
+    """Write a batch of formatted table rows with a single print call"""
+    if rows:
+        print("\n".join(rows))
+
+
+def cmd_stats(db: "HoneypotDatabase", hours: int = 24):
     """Display overall statistics"""
     stats = db.get_statistics(hours)
     
@@ -31,7 +52,7 @@ def cmd_stats(db: HoneypotDatabase, hours: int = 24):
     print("=" * 60 + "\n")
 
 
-def cmd_top_attackers(db: HoneypotDatabase, limit: int = 10):
+def cmd_top_attackers(db: "HoneypotDatabase", limit: int = 10):
     """List top attacking IPs"""
     attackers = db.get_top_attackers(limit)
     
@@ -41,15 +62,16 @@ def cmd_top_attackers(db: HoneypotDatabase, limit: int = 10):
     print(f"{'IP Address':<15} {'Events':<10} {'Type':<15} {'Rate/min':<10} {'Protocols':<20}")
     print("-" * 100)
     
-    for attacker in attackers:
-        protocols = attacker['protocols_used'] if attacker['protocols_used'] else "N/A"
-        print(f"{attacker['ip']:<15} {attacker['total_events']:<10} {attacker['attack_type']:<15} "
-              f"{attacker['events_per_minute']:<10.1f} {protocols:<20}")
+    print_rows([
+        _ATTACKER_ROW(a['ip'], a['total_events'], a['attack_type'],
+                      a['events_per_minute'], a['protocols_used'] or "N/A")
+        for a in attackers
+    ])
     
     print("=" * 100 + "\n")
 
 
-def cmd_blacklist(db: HoneypotDatabase):
+def cmd_blacklist(db: "HoneypotDatabase"):
     """Display current blacklist"""
     blacklist = db.get_blacklist()
     
@@ -63,14 +85,15 @@ def cmd_blacklist(db: HoneypotDatabase):
         print(f"{'IP Address':<15} {'Reason':<20} {'Severity':<10} {'Expires':<20}")
         print("-" * 100)
         
-        for entry in blacklist:
-            expires = format_timestamp(entry['expiration_time'])
-            print(f"{entry['ip']:<15} {entry['reason']:<20} {entry['severity']:<10} {expires:<20}")
+        print_rows([
+            _BLACKLIST_ROW(e['ip'], e['reason'], e['severity'], format_timestamp(e['expiration_time']))
+            for e in blacklist
+        ])
     
     print("=" * 100 + "\n")
 
 
-def cmd_profile(db: HoneypotDatabase, ip: str):
+def cmd_profile(db: "HoneypotDatabase", ip: str):
     """Display detailed profile for an IP"""
     profile = db.get_profile(ip)
     
@@ -94,33 +117,32 @@ def cmd_profile(db: HoneypotDatabase, ip: str):
         print("\nRecent Events (last 10):")
         print("-" * 60)
         events = db.get_events_by_ip(ip, limit=10)
-        for event in events:
-            print(f"  {format_timestamp(event['timestamp'])} | "
-                  f"Port: {event['port']:<6} | Proto: {event['protocol']:<6} | "
-                  f"Size: {event['payload_size']} bytes")
+        print_rows([
+            _PROFILE_EVENT_ROW(ts=format_timestamp(e['timestamp']), port=e['port'],
+                               proto=e['protocol'], size=e['payload_size'])
+            for e in events
+        ])
     
     print("=" * 60 + "\n")
 
 
-def cmd_recent(db: HoneypotDatabase, minutes: int = 60, limit: int = 20):
+def cmd_recent(db: "HoneypotDatabase", minutes: int = 60, limit: int = 20):
     """Display recent events"""
-    events = db.get_recent_events(minutes, limit)
+    events = db.get_recent_event_rows(minutes, limit)
+    total = db.count_recent_events_filtered(minutes)
     
     print("\n" + "=" * 100)
-    print(f"RECENT EVENTS (last {minutes} minutes, showing {len(events)} of {db.get_statistics(int(minutes/60))['total_events']})")
+    print(f"RECENT EVENTS (last {minutes} minutes, showing {len(events)} of {total})")
     print("=" * 100)
     print(f"{'Timestamp':<20} {'IP':<15} {'Port':<6} {'Protocol':<10} {'Size':<8} {'Type':<15}")
     print("-" * 100)
     
-    for event in events:
-        ts = format_timestamp(event['timestamp'])
-        print(f"{ts:<20} {event['source_ip']:<15} {event['port']:<6} {event['protocol']:<10} "
-              f"{event['payload_size']:<8} {event['event_type']:<15}")
+    print_rows([_EVENT_ROW(*row) for row in events])
     
     print("=" * 100 + "\n")
 
 
-def cmd_severity(db: HoneypotDatabase, severity: str):
+def cmd_severity(db: "HoneypotDatabase", severity: str):
     """Display profiles by severity"""
     profiles = db.get_profiles_by_severity(severity)
     
@@ -134,18 +156,18 @@ def cmd_severity(db: HoneypotDatabase, severity: str):
         print(f"{'IP Address':<15} {'Events':<10} {'Rate/min':<10} {'Type':<15} {'Protocols':<20}")
         print("-" * 100)
         
-        for profile in profiles:
-            protocols = profile['protocols_used'] if profile['protocols_used'] else "N/A"
-            print(f"{profile['ip']:<15} {profile['total_events']:<10} {profile['events_per_minute']:<10.1f} "
-                  f"{profile['attack_type']:<15} {protocols:<20}")
+        print_rows([
+            _SEVERITY_ROW(p['ip'], p['total_events'], p['events_per_minute'],
+                          p['attack_type'], p['protocols_used'] or "N/A")
+            for p in profiles
+        ])
     
     print("=" * 100 + "\n")
 
 
-def cmd_database_info(db: HoneypotDatabase):
+def cmd_database_info(db: "HoneypotDatabase"):
     """Display database information"""
     info = db.get_database_size()
-    profiles = db.get_all_profiles()
     
     print("\n" + "=" * 60)
     print("DATABASE INFORMATION")
@@ -154,16 +176,30 @@ def cmd_database_info(db: HoneypotDatabase):
     print(f"Size:                {info['size_mb']} MB")
     print(f"Total Events:        {info['event_count']}")
     print(f"Total Profiles:      {info['profile_count']}")
-    print(f"Blacklist Entries:   {len(db.get_blacklist())}")
+    print(f"Blacklist Entries:   {info['blacklist_count']}")
     print("=" * 60 + "\n")
 
 
-def main():
+# Argument-free commands dispatched straight from sys.argv, skipping the
+# argparse setup (function defaults match the parser defaults below)
+SIMPLE_COMMANDS = {
+    "stats": cmd_stats,
+    "top": cmd_top_attackers,
+    "blacklist": cmd_blacklist,
+    "recent": cmd_recent,
+    "info": cmd_database_info,
+}
+
+
+def build_parser():
+    """Build the full argument parser"""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Honeypot attack data analysis utility"
     )
     
-    parser.add_argument("--db", default="honeypot.db", help="Database file path (default: honeypot.db)")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Database file path (default: {DEFAULT_DB})")
     
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
@@ -195,32 +231,50 @@ def main():
     # Database info command
     subparsers.add_parser("info", help="Display database information")
     
-    args = parser.parse_args()
+    return parser
+
+
+def run_command(db_path: str, handler, *args):
+    """Open the database, run one command handler and close the connection"""
+    # Imported here so --help and argument errors skip loading the database layer
+    from core.database import HoneypotDatabase
+    
+    db = HoneypotDatabase(db_path)
+    try:
+        handler(db, *args)
+    finally:
+        db.close()
+
+
+def main():
+    argv = sys.argv[1:]
+    
+    # Fast path: bare command with default options
+    if len(argv) == 1 and argv[0] in SIMPLE_COMMANDS:
+        run_command(DEFAULT_DB, SIMPLE_COMMANDS[argv[0]])
+        return
+    
+    parser = build_parser()
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
         return
     
-    # Connect to database
-    db = HoneypotDatabase(args.db)
-    
-    try:
-        if args.command == "stats":
-            cmd_stats(db, args.hours)
-        elif args.command == "top":
-            cmd_top_attackers(db, args.limit)
-        elif args.command == "blacklist":
-            cmd_blacklist(db)
-        elif args.command == "profile":
-            cmd_profile(db, args.ip)
-        elif args.command == "recent":
-            cmd_recent(db, args.minutes, args.limit)
-        elif args.command == "severity":
-            cmd_severity(db, args.severity)
-        elif args.command == "info":
-            cmd_database_info(db)
-    finally:
-        db.close()
+    if args.command == "stats":
+        run_command(args.db, cmd_stats, args.hours)
+    elif args.command == "top":
+        run_command(args.db, cmd_top_attackers, args.limit)
+    elif args.command == "blacklist":
+        run_command(args.db, cmd_blacklist)
+    elif args.command == "profile":
+        run_command(args.db, cmd_profile, args.ip)
+    elif args.command == "recent":
+        run_command(args.db, cmd_recent, args.minutes, args.limit)
+    elif args.command == "severity":
+        run_command(args.db, cmd_severity, args.severity)
+    elif args.command == "info":
+        run_command(args.db, cmd_database_info)
 
 
 if __name__ == "__main__":